@@ -0,0 +1,222 @@
+"""
+Análisis vectorizado del libro de finanzas con NumPy.
+
+`LedgerArrays` carga `finanzas` una vez en arrays por columna (importe en
+centavos, día, código de categoría, creadora y máscara de ingresos) y calcula
+tendencias, rentabilidad por creadora, desgloses por categoría y medias móviles
+con agrupaciones vectorizadas (`np.bincount`), sin volver a consultar SQLite.
+
+Al refrescar solo se leen las filas nuevas: los triggers de `table_versions`
+suman 1 a la versión de `finanzas` por cada fila insertada, modificada o
+borrada, así que si la versión avanzó exactamente tantas filas como ids nuevos
+hay, solo hubo inserciones y basta con añadirlas al final. Cualquier otro
+cambio (ediciones, borrados, una reconstrucción) recarga todo.
+
+    python analytics.py --db db_ofmkevin.db --porcentaje 1500
+"""
+import threading
+
+import numpy as np
+
+import db
+from db import connection
+from money import BASIS_POINTS
+
+LOAD_BATCH = 100_000
+
+LEDGER_QUERY = """SELECT id, tipo = 'ingreso', IFNULL(categoria, ''), IFNULL(monto, 0),
+                         IFNULL(substr(fecha, 1, 10), '1970-01-01'), IFNULL(creadora_id, 0)
+                  FROM finanzas WHERE id > ? ORDER BY id"""
+
+
+def group_sum(keys, values, size):
+    """Suma de `values` (enteros) por clave 0..size-1. Exacto mientras cada total quepa en 2**53."""
+    return np.rint(np.bincount(keys, weights=values, minlength=size)).astype(np.int64)
+
+
+def percent_of_array(cents, basis_points):
+    """money.percent_of elemento a elemento: redondeo a la mitad lejos de cero, también con importes negativos."""
+    product = cents * basis_points
+    return np.sign(product) * ((np.abs(product) + BASIS_POINTS // 2) // BASIS_POINTS)
+
+
+def days_to_months(days):
+    """Días desde 1970-01-01 a meses desde 1970-01."""
+    return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int32)
+
+
+def month_label(month):
+    return str(np.datetime64(int(month), "M"))
+
+
+class LedgerArrays:
+    """Columnas de `finanzas` en memoria. Los importes están en centavos (int64)."""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self.version = None
+        self.categories = []
+        self._category_codes = {}
+        self._lock = threading.Lock()
+        self._reset()
+        self.full_loads = 0; self.appends = 0
+
+    def _reset(self):
+        self.ids = np.empty(0, np.int64)
+        self.amount = np.empty(0, np.int64)
+        self.day = np.empty(0, np.int32)
+        self.category = np.empty(0, np.int32)
+        self.creator = np.empty(0, np.int64)
+        self.is_income = np.empty(0, bool)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def month(self):
+        return days_to_months(self.day)
+
+    def _encode_categories(self, names):
+        unique, inverse = np.unique(names, return_inverse=True)
+        for name in unique:
+            if name not in self._category_codes:
+                self._category_codes[name] = len(self.categories); self.categories.append(str(name))
+        mapping = np.array([self._category_codes[name] for name in unique], np.int32)
+        return mapping[inverse] if len(unique) else np.empty(0, np.int32)
+
+    def _read(self, conn, after_id):
+        columns = [[] for _ in range(6)]
+        cursor = conn.execute(LEDGER_QUERY, (after_id,))
+        while True:
+            rows = cursor.fetchmany(LOAD_BATCH)
+            if not rows: break
+            for column, values in zip(columns, zip(*rows)): column.extend(values)
+        ids, income, categories, amounts, dates, creators = columns
+        return (np.array(ids, np.int64), np.array(income, bool), self._encode_categories(np.array(categories, str)),
+                np.array(amounts, np.int64), np.array(dates, "datetime64[D]").astype(np.int32), np.array(creators, np.int64))
+
+    def refresh(self):
+        """Trae los cambios desde la última carga; devuelve 'igual', 'añadidas' o 'recargada'."""
+        with self._lock, connection(self.db_path) as conn:
+            # Versión y filas en la misma transacción de lectura: ven la misma instantánea.
+            started = not conn.in_transaction
+            if started: conn.execute("BEGIN")
+            try:
+                version = conn.execute("SELECT version FROM table_versions WHERE tabla = 'finanzas'").fetchone()[0]
+                if version == self.version: return "igual"
+                last_id = int(self.ids[-1]) if len(self.ids) and self.version is not None else 0
+                if last_id:
+                    new_rows = conn.execute("SELECT COUNT(*) FROM finanzas WHERE id > ?", (last_id,)).fetchone()[0]
+                    if version - self.version == new_rows:
+                        ids, income, category, amount, day, creator = self._read(conn, last_id)
+                        self.ids = np.concatenate((self.ids, ids)); self.is_income = np.concatenate((self.is_income, income))
+                        self.category = np.concatenate((self.category, category)); self.amount = np.concatenate((self.amount, amount))
+                        self.day = np.concatenate((self.day, day)); self.creator = np.concatenate((self.creator, creator))
+                        self.version = version; self.appends += 1
+                        return "añadidas"
+                self.ids, self.is_income, self.category, self.amount, self.day, self.creator = self._read(conn, 0)
+                self.version = version; self.full_loads += 1
+                return "recargada"
+            finally:
+                if started: conn.commit()
+
+    def date_mask(self, start_date=None, end_date=None):
+        """Máscara de filas con fecha en [start_date, end_date] (YYYY-MM-DD, ambos incluidos)."""
+        mask = np.ones(len(self), bool)
+        if start_date: mask &= self.day >= np.datetime64(start_date, "D").astype(np.int32)
+        if end_date: mask &= self.day <= np.datetime64(end_date, "D").astype(np.int32)
+        return mask
+
+    def monthly_trend(self, start_date=None, end_date=None):
+        """Como queries.get_monthly_financial_trend, incluidos los meses intermedios sin movimientos."""
+        mask = self.date_mask(start_date, end_date)
+        if not mask.any(): return {"months": [], "incomes": [], "expenses": []}
+        month = self.month[mask]; first = month.min(); size = int(month.max() - first) + 1
+        keys = month - first; amount = self.amount[mask]; income = self.is_income[mask]
+        incomes = group_sum(keys, np.where(income, amount, 0), size)
+        expenses = group_sum(keys, np.where(income, 0, amount), size)
+        return {"months": [month_label(first + i) for i in range(size)], "incomes": incomes.tolist(), "expenses": expenses.tolist()}
+
+    def rolling_average(self, values, window=3):
+        """Media móvil de `window` periodos (los primeros window-1 quedan en NaN)."""
+        values = np.asarray(values, np.float64)
+        result = np.full(len(values), np.nan)
+        if len(values) >= window:
+            sums = np.cumsum(np.concatenate(([0.0], values)))
+            result[window - 1:] = (sums[window:] - sums[:-window]) / window
+        return result
+
+    def category_breakdown(self, tipo="egreso", start_date=None, end_date=None):
+        """[(categoría, centavos)] de mayor a menor."""
+        mask = self.date_mask(start_date, end_date) & (self.is_income if tipo == "ingreso" else ~self.is_income)
+        totals = group_sum(self.category[mask], self.amount[mask], len(self.categories))
+        order = np.argsort(-totals, kind="stable")
+        return [(self.categories[i] or None, int(totals[i])) for i in order if totals[i]]
+
+    def income_by_creator(self, start_date=None, end_date=None):
+        """Ingresos por id de creadora, como array indexado por id (0 = sin creadora)."""
+        mask = self.date_mask(start_date, end_date) & self.is_income
+        size = int(self.creator.max()) + 1 if len(self) else 1
+        return group_sum(self.creator[mask], self.amount[mask], size)
+
+    def creator_profitability(self, porcentaje=None, start_date=None, end_date=None):
+        """
+        [(nombre, ingresos, comisión, beneficio)] por creadora, en centavos, de
+        más a menos rentable. `porcentaje` (puntos básicos) simula otra comisión:
+        un número para todas o un dict {id_creadora: pb}; sin él se usa la de la base.
+        """
+        creators = db.get_db_data("SELECT id, nombre, IFNULL(sueldo_fijo, 0), IFNULL(porcentaje, 0), IFNULL(inversion, 0) FROM creadoras", db_path=self.db_path)
+        if not creators: return []
+        ids = np.array([row[0] for row in creators], np.int64)
+        sueldo = np.array([row[2] for row in creators], np.int64)
+        basis_points = np.array([row[3] for row in creators], np.int64)
+        inversion = np.array([row[4] for row in creators], np.int64)
+        if isinstance(porcentaje, dict):
+            basis_points = np.array([porcentaje.get(int(i), bp) for i, bp in zip(ids, basis_points)], np.int64)
+        elif porcentaje is not None:
+            basis_points = np.full(len(ids), porcentaje, np.int64)
+        by_id = self.income_by_creator(start_date, end_date)
+        income = np.where(ids < len(by_id), by_id[np.minimum(ids, len(by_id) - 1)], 0)
+        commission = percent_of_array(income, np.maximum(basis_points, 0))
+        profit = income - sueldo - commission - inversion
+        order = np.argsort(-profit, kind="stable")
+        return [(creators[i][1], int(income[i]), int(commission[i]), int(profit[i])) for i in order]
+
+
+_ledgers = {}
+_ledgers_lock = threading.Lock()
+
+
+def get_ledger(db_path=None):
+    """LedgerArrays compartido por base de datos, ya al día."""
+    path = db_path or db.DB_PATH
+    with _ledgers_lock:
+        ledger = _ledgers.get(path)
+        if ledger is None: ledger = _ledgers[path] = LedgerArrays(path)
+    ledger.refresh()
+    return ledger
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from money import format_money, format_money_many
+    parser = argparse.ArgumentParser(description="Análisis del libro de finanzas en memoria.")
+    parser.add_argument("--db", default=None, help="ruta de la base de datos SQLite")
+    parser.add_argument("--porcentaje", type=int, help="comisión de creadoras a simular, en puntos básicos")
+    parser.add_argument("--ventana", type=int, default=3, help="meses de la media móvil")
+    args = parser.parse_args()
+    started = time.perf_counter()
+    ledger = get_ledger(args.db)
+    print(f"{len(ledger):,} movimientos cargados en {(time.perf_counter() - started) * 1000:.0f} ms")
+    trend = ledger.monthly_trend()
+    net = np.array(trend["incomes"]) - np.array(trend["expenses"])
+    averages = ledger.rolling_average(net, args.ventana)
+    for month, value, text in zip(trend["months"], averages, format_money_many(net.tolist())):
+        print(f"  {month}  beneficio {text:>14}  media {'' if np.isnan(value) else format_money(int(round(value))):>14}")
+    print("Gastos por categoría:")
+    for categoria, total in ledger.category_breakdown()[:10]:
+        print(f"  {categoria or '(sin categoría)':<28} {format_money(total):>14}")
+    print("Rentabilidad por creadora" + (f" con comisión del {args.porcentaje / 100:g}%" if args.porcentaje is not None else "") + ":")
+    for nombre, ingresos, comision, beneficio in ledger.creator_profitability(args.porcentaje)[:10]:
+        print(f"  {nombre:<28} {format_money(beneficio):>14}")
@@ -1,18 +1,25 @@
 import tkinter as tk
 import customtkinter as ctk
 from tkinter import messagebox, ttk, filedialog
-import sqlite3
-from PIL import Image, ImageTk
+import atexit
 import os
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import numpy as np
-import csv
+import sys
 from datetime import datetime
 from calendar import monthrange
 
+import instrumentation
+import db
+from db import init_db, get_db_data, connection
+from query_cache import cached_query
+from money import format_money, format_money_many, format_columns, to_units
+from queries import get_dashboard_snapshot, get_partner_expenses, get_monthly_financial_trend, get_distinct_months, get_creadoras_view_page, get_empleados_view_page, get_finanzas_view_page, fts_query, search_window_start, search_finanzas_view_page, SEARCH_WINDOW
+from queries import CREADORAS_VIEW, EMPLEADOS_VIEW, FINANZAS_VIEW, FILTER_HINTS, filter_condition
+from tasks import QueryExecutor
 from forms import AddCreatorForm, EditCreatorForm, AddEmployeeForm, EditEmployeeForm, AddTransactionForm, EditTransactionForm, AddPartnerForm, EditPartnerForm
-from custom_widgets import CollapsibleMenu, CollapsibleFrame
+from custom_widgets import CollapsibleMenu, CollapsibleFrame, PagedTreeview, SortableHeadings
+
+# charts (matplotlib, numpy), export e importer se importan al usarlos: solo
+# cargarlos costaba casi un segundo antes de que apareciera la ventana.
 
 class Theme:
     BACKGROUND = "#1a1a1e"; FRAME_COLOR = "#212126"; SIDEBAR_COLOR = "#1c1c21"
@@ -20,179 +27,90 @@ class Theme:
     ACCENT_HOVER = "#5949a9"; GREEN = "#2E8B57"; RED = "#C70039"; BLUE = "#4a90e2"
 
 ctk.set_appearance_mode("dark"); ctk.set_default_color_theme("blue")
-db_name = "db_ofmkevin.db"; icon_folder = "assets"
+icon_folder = "assets"
 DASHBOARD_ICON = os.path.join(icon_folder, "dashboard.png"); CREATORS_ICON = os.path.join(icon_folder, "creators.png")
 EMPLOYEES_ICON = os.path.join(icon_folder, "employees.png"); MANAGE_ICON = os.path.join(icon_folder, "manage.png")
 FINANCES_ICON = os.path.join(icon_folder, "finances.png"); REPORTS_ICON = os.path.join(icon_folder, "reports.png")
 
-def init_db():
-    with sqlite3.connect(db_name) as conn:
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys=off;")
-        cursor.execute("BEGIN TRANSACTION;")
-        cursor.execute('''CREATE TABLE IF NOT EXISTS creadoras_new (
-            id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL, sueldo_fijo REAL DEFAULT 0,
-            porcentaje REAL DEFAULT 0, notas TEXT DEFAULT '', inversion REAL DEFAULT 0)''')
-        try:
-            cursor.execute("INSERT INTO creadoras_new (id, nombre, sueldo_fijo, porcentaje, notas, inversion) SELECT id, nombre, sueldo_fijo, porcentaje, notas, inversion FROM creadoras")
-            cursor.execute("DROP TABLE creadoras")
-            cursor.execute("ALTER TABLE creadoras_new RENAME TO creadoras")
-        except sqlite3.OperationalError:
-            cursor.execute("DROP TABLE IF EXISTS creadoras_new")
-            cursor.execute('''CREATE TABLE IF NOT EXISTS creadoras (
-                id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL, sueldo_fijo REAL DEFAULT 0,
-                porcentaje REAL DEFAULT 0, notas TEXT DEFAULT '', inversion REAL DEFAULT 0)''')
-        cursor.execute("COMMIT;")
-        cursor.execute("PRAGMA foreign_keys=on;")
-        try:
-            cursor.execute('ALTER TABLE finanzas ADD COLUMN creadora_id INTEGER REFERENCES creadoras(id) ON DELETE SET NULL')
-        except sqlite3.OperationalError: pass
-        cursor.execute('''CREATE TABLE IF NOT EXISTS empleados (
-            id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL, rol TEXT, sueldo REAL DEFAULT 0,
-            ventas REAL DEFAULT 0, comision REAL DEFAULT 0, notas TEXT DEFAULT '')''')
-        cursor.execute('''CREATE TABLE IF NOT EXISTS finanzas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT, tipo TEXT NOT NULL, categoria TEXT, monto REAL DEFAULT 0,
-            descripcion TEXT, fecha DATETIME DEFAULT CURRENT_TIMESTAMP,
-            creadora_id INTEGER, FOREIGN KEY (creadora_id) REFERENCES creadoras (id) ON DELETE SET NULL)''')
-        cursor.execute('''CREATE TABLE IF NOT EXISTS categorias_finanzas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL UNIQUE)''')
-        default_categories = ["Inversion App", "Servidor Virtual", "Marketing", "Inversion Creadora", "Ingreso General", "Comisión Retiro Cripto", "Sueldo", "Otro"]
-        for cat in default_categories:
-            cursor.execute("INSERT OR IGNORE INTO categorias_finanzas (nombre) VALUES (?)", (cat,))
-        
-        # --- NUEVAS TABLAS Y ALTERACIONES PARA SOCIOS ---
-        cursor.execute('''CREATE TABLE IF NOT EXISTS socios (
-            id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL UNIQUE, notas TEXT DEFAULT '')''')
-        try:
-            cursor.execute('ALTER TABLE creadoras ADD COLUMN socio_id INTEGER REFERENCES socios(id) ON DELETE SET NULL')
-        except sqlite3.OperationalError: pass
-        try:
-            cursor.execute('ALTER TABLE empleados ADD COLUMN socio_id INTEGER REFERENCES socios(id) ON DELETE SET NULL')
-        except sqlite3.OperationalError: pass
-
-
-def get_db_data(query, params=()):
-    with sqlite3.connect(db_name) as conn:
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        return cursor.fetchall()
-
-def get_current_month_income():
-    query = "SELECT SUM(monto) FROM finanzas WHERE tipo='ingreso' AND strftime('%Y-%m', fecha) = strftime('%Y-%m', 'now', 'localtime')"
-    result = get_db_data(query)
-    return result[0][0] or 0.0
-
-def get_expense_breakdown():
-    query_sueldos_c = "SELECT SUM(sueldo_fijo) FROM creadoras"
-    query_sueldos_e = "SELECT SUM(sueldo) FROM empleados"
-    query_comisiones_creadoras = """
-        SELECT SUM(f.monto * c.porcentaje / 100) FROM finanzas f JOIN creadoras c ON f.creadora_id = c.id
-        WHERE f.tipo = 'ingreso' AND c.porcentaje > 0"""
-    query_comisiones_retiro = "SELECT SUM(monto) FROM finanzas WHERE categoria='Comisión Retiro Cripto'"
-    query_inversiones = "SELECT SUM(inversion) FROM creadoras"
-    query_otros_egresos = "SELECT SUM(monto) FROM finanzas WHERE tipo='egreso' AND categoria NOT IN ('Comisión Retiro Cripto', 'Sueldo', 'Inversion Creadora')"
-    
-    sueldos_creadoras = (get_db_data(query_sueldos_c)[0][0] or 0)
-    sueldos_empleados = (get_db_data(query_sueldos_e)[0][0] or 0)
-    comisiones_creadoras = (get_db_data(query_comisiones_creadoras)[0][0] or 0)
-    comisiones_retiro = (get_db_data(query_comisiones_retiro)[0][0] or 0)
-    inversiones = (get_db_data(query_inversiones)[0][0] or 0)
-    otros_egresos = (get_db_data(query_otros_egresos)[0][0] or 0)
-    
-    return {"Sueldos": sueldos_creadoras + sueldos_empleados, "Comisión Creadoras": comisiones_creadoras,
-            "Comisión Retiros": comisiones_retiro, "Inversiones": inversiones, "Otros Egresos": otros_egresos}
-
-def get_top_creators_by_revenue(limit=5):
-    query = """SELECT c.nombre, SUM(f.monto) FROM creadoras c JOIN finanzas f ON c.id = f.creadora_id
-               WHERE f.tipo = 'ingreso' GROUP BY c.id ORDER BY SUM(f.monto) DESC LIMIT ?"""
-    return get_db_data(query, (limit,))
-
-def get_top_creators_by_profitability(limit=5):
-    query = """SELECT c.nombre, SUM(CASE WHEN f.tipo = 'ingreso' THEN f.monto ELSE 0 END) - c.sueldo_fijo -
-               (SUM(CASE WHEN f.tipo = 'ingreso' THEN f.monto ELSE 0 END) * c.porcentaje / 100) - c.inversion as profit
-               FROM creadoras c LEFT JOIN finanzas f ON c.id = f.creadora_id
-               GROUP BY c.id HAVING profit > 0 ORDER BY profit DESC LIMIT ?"""
-    return get_db_data(query, (limit,))
-
-def get_expense_by_category(limit=10):
-    query = """
-        SELECT categoria, SUM(monto) as total
-        FROM finanzas
-        WHERE tipo = 'egreso'
-        GROUP BY categoria
-        ORDER BY total DESC
-        LIMIT ?
+# --- EJECUCIÓN EN SEGUNDO PLANO ---
+executor = None
+
+def run_query(func, *args, on_done=None, on_error=None, persistent=False, **kwargs):
+    """Ejecuta `func` en el QueryExecutor de la app, o en línea si todavía no existe."""
+    if executor is None:
+        result = func(*args, **kwargs)
+        if on_done: on_done(result)
+        return None
+    return executor.submit(func, *args, on_done=on_done, on_error=on_error, persistent=persistent, **kwargs)
+
+def run_page_query(func, on_done):
+    run_query(func, on_done=on_done)
+
+# --- REGISTRO DE VISTAS ---
+class View:
+    """Pantalla ya construida: su frame raíz, cómo empaquetarlo y la función que recarga sus datos."""
+    def __init__(self, frame, refresh, **pack_options):
+        self.frame = frame
+        self.refresh = refresh
+        self.pack_options = pack_options
+
+class ViewRegistry:
     """
-    return get_db_data(query, (limit,))
-
-def get_monthly_financial_trend(start_date=None, end_date=None):
-    query = "SELECT strftime('%Y-%m', fecha) as mes, SUM(CASE WHEN tipo = 'ingreso' THEN monto ELSE 0 END) as ingresos, SUM(CASE WHEN tipo = 'egreso' THEN monto ELSE 0 END) as egresos FROM finanzas "
-    params = []
-    conditions = []
-    if start_date:
-        conditions.append("date(fecha) >= ?")
-        params.append(start_date)
-    if end_date:
-        conditions.append("date(fecha) <= ?")
-        params.append(end_date)
-    if conditions:
-        query += " WHERE " + " AND ".join(conditions)
-    
-    query += " GROUP BY mes ORDER BY mes ASC"
-    data = get_db_data(query, tuple(params))
-    return {"months": [row[0] for row in data], "incomes": [row[1] for row in data], "expenses": [row[2] for row in data]}
-
-def get_distinct_months():
-    """Obtiene una lista de meses únicos (YYYY-MM) de la base de datos."""
-    query = "SELECT DISTINCT strftime('%Y-%m', fecha) as mes FROM finanzas ORDER BY mes DESC"
-    data = get_db_data(query)
-    return [row[0] for row in data]
-
-def get_financial_data_by_date(start_date, end_date):
-    query = """SELECT f.id, f.tipo, f.categoria, f.monto, f.descripcion, STRFTIME('%Y-%m-%d %H:%M', f.fecha), c.nombre
-               FROM finanzas f LEFT JOIN creadoras c ON f.creadora_id = c.id
-               WHERE date(f.fecha) BETWEEN ? AND ? ORDER BY f.fecha DESC"""
-    return get_db_data(query, (start_date, end_date))
-
-# --- NUEVA FUNCIÓN PARA GASTOS DE SOCIOS ---
-def get_partner_expenses():
-    partners = get_db_data("SELECT id, nombre FROM socios")
-    partner_expenses = []
-
-    for partner_id, partner_name in partners:
-        q_creator_salaries = "SELECT IFNULL(SUM(sueldo_fijo), 0) FROM creadoras WHERE socio_id = ?"
-        creator_salaries = get_db_data(q_creator_salaries, (partner_id,))[0][0]
-        
-        q_employee_salaries = "SELECT IFNULL(SUM(sueldo), 0) FROM empleados WHERE socio_id = ?"
-        employee_salaries = get_db_data(q_employee_salaries, (partner_id,))[0][0]
-        
-        q_creator_commissions = """
-            SELECT IFNULL(SUM(f.monto * c.porcentaje / 100), 0)
-            FROM finanzas f JOIN creadoras c ON f.creadora_id = c.id
-            WHERE f.tipo = 'ingreso' AND c.porcentaje > 0 AND c.socio_id = ?"""
-        creator_commissions = get_db_data(q_creator_commissions, (partner_id,))[0][0]
-        
-        total_expense = creator_salaries + employee_salaries + creator_commissions
-        if total_expense > 0:
-            partner_expenses.append((partner_name, total_expense))
-            
-    return sorted(partner_expenses, key=lambda x: x[1], reverse=True)
+    Construye cada pantalla la primera vez que se visita y la conserva oculta
+    (pack_forget) al navegar a otra. Al volver a ella, o cuando un formulario
+    guarda cambios, solo se recargan sus datos.
+    """
+    def __init__(self, root):
+        self.root = root
+        self.views = {}
+        self.active = None
+        root.configure(fg_color=Theme.BACKGROUND)
+        configure_treeview_style()
+
+    def show(self, name, builder):
+        if executor is not None: executor.cancel_pending()
+        # Las consultas que encolen el builder y refresh() cuentan para esta vista (ver instrumentation.py).
+        with instrumentation.view(f"mostrar_{name}"):
+            view = self.views.get(name)
+            if view is None:
+                view = self.views[name] = builder(self.root)
+            if self.active is not view:
+                if self.active is not None: self.active.frame.pack_forget()
+                view.frame.pack(**view.pack_options)
+                self.active = view
+            view.refresh()
+        return view
+
+def show_view(root, name, builder):
+    registry = getattr(root, "view_registry", None)
+    if registry is None:
+        registry = root.view_registry = ViewRegistry(root)
+    return registry.show(name, builder)
+
+def configure_treeview_style():
+    style = ttk.Style(); style.theme_use("default")
+    style.configure("Treeview", background=Theme.FRAME_COLOR, foreground=Theme.TEXT_COLOR, fieldbackground=Theme.FRAME_COLOR, borderwidth=0, rowheight=35)
+    style.map("Treeview", background=[('selected', Theme.ACCENT_COLOR)])
+    style.configure("Treeview.Heading", background=Theme.WIDGET_COLOR, foreground=Theme.TEXT_COLOR, font=("Arial", 14, "bold"), borderwidth=0)
 
 def create_main_kpi_card(parent, title, value):
     frame = ctk.CTkFrame(parent, corner_radius=15, fg_color=Theme.FRAME_COLOR)
     ctk.CTkLabel(frame, text=title, font=("Arial", 20, "bold"), text_color="#a0a0a0").pack(anchor='n', padx=20, pady=(15, 5))
-    ctk.CTkLabel(frame, text=f"${value:,.2f}", font=("Arial", 48, "bold"), text_color=Theme.GREEN).pack(anchor='n', padx=20, pady=(0, 20))
+    frame.value_label = ctk.CTkLabel(frame, text=format_money(value), font=("Arial", 48, "bold"), text_color=Theme.GREEN)
+    frame.value_label.pack(anchor='n', padx=20, pady=(0, 20))
     return frame
 
 def create_kpi_card(parent, title, value, value_color=None):
     frame = ctk.CTkFrame(parent, corner_radius=10, fg_color=Theme.FRAME_COLOR)
     ctk.CTkLabel(frame, text=title, font=("Arial", 14), text_color="#a0a0a0").pack(anchor='nw', padx=15, pady=(8, 0))
-    label_value = ctk.CTkLabel(frame, text=f"${value:.2f}", font=("Arial", 22, "bold"))
+    label_value = ctk.CTkLabel(frame, text=format_money(value), font=("Arial", 22, "bold"))
     if value_color: label_value.configure(text_color=value_color)
     label_value.pack(anchor='nw', padx=15, pady=(0, 8))
+    frame.value_label = label_value
     return frame
 
-def create_horizontal_bar_chart(parent, data, title, color):
+def create_bar_chart_section(parent, charts, name, title, color):
+    from charts import BarChartSlot
     container_frame = ctk.CTkFrame(parent, fg_color="transparent")
     container_frame.pack(fill="both", expand=True)
     
@@ -201,42 +119,15 @@ def create_horizontal_bar_chart(parent, data, title, color):
 
     chart_container = ctk.CTkFrame(container_frame, fg_color=Theme.FRAME_COLOR, corner_radius=10)
     chart_container.pack(fill="both", expand=True)
-
-    if not data:
-        ctk.CTkLabel(chart_container, text="No hay datos para mostrar.", font=("Arial", 16)).pack(expand=True, pady=20)
-        return container_frame
-
-    labels = [row[0] for row in data]; values = [row[1] for row in data]
-    labels.reverse(); values.reverse()
-    
-    fig, ax = plt.subplots(figsize=(5, len(labels) * 0.6), dpi=100) # Altura dinámica
-    fig.patch.set_facecolor(Theme.FRAME_COLOR); ax.set_facecolor(Theme.FRAME_COLOR)
-    
-    bars = ax.barh(labels, values, color=color, height=0.6)
-    ax.tick_params(axis='x', colors=Theme.TEXT_COLOR); ax.tick_params(axis='y', colors=Theme.TEXT_COLOR, labelsize=12)
-    ax.spines['top'].set_visible(False); ax.spines['right'].set_visible(False)
-    ax.spines['left'].set_color(Theme.FRAME_COLOR); ax.spines['bottom'].set_color(Theme.TEXT_COLOR)
-    ax.xaxis.set_major_formatter(plt.FuncFormatter(lambda x, pos: f'${x/1000:.1f}K' if x >= 1000 else f'${x:.0f}'))
-    
-    for bar in bars:
-        width = bar.get_width()
-        label_x_pos = width + max(values) * 0.02 if values else 0
-        ax.text(label_x_pos, bar.get_y() + bar.get_height()/2, f' ${width:,.2f}', va='center', color=Theme.TEXT_COLOR, fontsize=11)
-        
-    fig.tight_layout(pad=2)
-    canvas = FigureCanvasTkAgg(fig, master=chart_container); canvas.draw()
-    canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=5)
-    
+    charts.add(name, BarChartSlot(chart_container, color, Theme.FRAME_COLOR, Theme.TEXT_COLOR))
     return container_frame
 
+def in_units(pairs):
+    """Series (etiqueta, centavos) a unidades para los gráficos."""
+    return [(label, to_units(value)) for label, value in pairs]
+
 def create_styled_view(root, title, columns):
-    for widget in root.winfo_children(): widget.destroy()
-    root.configure(fg_color=Theme.BACKGROUND)
-    style = ttk.Style(); style.theme_use("default")
-    style.configure("Treeview", background=Theme.FRAME_COLOR, foreground=Theme.TEXT_COLOR, fieldbackground=Theme.FRAME_COLOR, borderwidth=0, rowheight=35)
-    style.map("Treeview", background=[('selected', Theme.ACCENT_COLOR)])
-    style.configure("Treeview.Heading", background=Theme.WIDGET_COLOR, foreground=Theme.TEXT_COLOR, font=("Arial", 14, "bold"), borderwidth=0)
-    container = ctk.CTkFrame(root, fg_color="transparent"); container.pack(fill='both', expand=True, padx=30, pady=20)
+    container = ctk.CTkFrame(root, fg_color="transparent")
     top_frame = ctk.CTkFrame(container, fg_color="transparent"); top_frame.pack(fill='x', pady=(0, 20))
     ctk.CTkLabel(top_frame, text=title, font=("Arial", 32, "bold")).pack(side="left")
     buttons_frame = ctk.CTkFrame(top_frame, fg_color="transparent"); buttons_frame.pack(side="right")
@@ -244,36 +135,42 @@ def create_styled_view(root, title, columns):
     for col_name in columns: tree.heading(col_name, text=col_name)
     return container, buttons_frame, tree
 
+def sortable_headings(tree, view, fields, on_change):
+    """Encabezados que ordenan y filtran en SQL la pantalla `view` de queries.py; `fields` mapea encabezado -> campo."""
+    hints = {field: FILTER_HINTS[spec[1]] for field, spec in view.filters.items()}
+    return SortableHeadings(tree, fields, view.sort_keys, hints, view.default_sort, on_change,
+                            validate=lambda field, text: filter_condition(*view.filters[field][:2], text))
+
 def mostrar_dashboard(root):
-    for widget in root.winfo_children(): widget.destroy()
-    root.configure(fg_color=Theme.BACKGROUND)
+    show_view(root, "dashboard", build_dashboard_view)
 
+def build_dashboard_view(root):
+    from charts import ChartManager, PieChartSlot
     scroll_frame = ctk.CTkScrollableFrame(root, fg_color="transparent", scrollbar_button_color=Theme.WIDGET_COLOR, scrollbar_button_hover_color=Theme.ACCENT_HOVER)
-    scroll_frame.pack(fill="both", expand=True)
     scroll_frame.grid_columnconfigure(0, weight=1) 
 
     content_frame = ctk.CTkFrame(scroll_frame, fg_color="transparent")
     content_frame.pack(fill="x", expand=True, padx=20, pady=15)
     
-    ctk.CTkLabel(content_frame, text="Dashboard de Análisis", font=("Arial", 32, "bold")).pack(anchor="w", padx=10, pady=10)
+    title_label = ctk.CTkLabel(content_frame, text="Dashboard de Análisis", font=("Arial", 32, "bold"))
+    title_label.pack(anchor="w", padx=10, pady=10)
+    status_label = ctk.CTkLabel(content_frame, text="", font=("Arial", 16), text_color="#a0a0a0")
 
     main_kpi_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
     main_kpi_frame.pack(fill="x", pady=(0, 10))
     main_kpi_frame.grid_columnconfigure(0, weight=1)
-    ingresos_mes = get_current_month_income()
-    create_main_kpi_card(main_kpi_frame, "Ingresos Totales del Mes", ingresos_mes).grid(row=0, column=0, sticky="ew", padx=10)
+    main_kpi_card = create_main_kpi_card(main_kpi_frame, "Ingresos Totales del Mes", 0)
+    main_kpi_card.grid(row=0, column=0, sticky="ew", padx=10)
 
     ctk.CTkLabel(content_frame, text="Resumen de Gastos", font=("Arial", 18, "bold"), text_color="#a0a0a0").pack(anchor="w", padx=10, pady=(10,5))
 
     kpi_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
     kpi_frame.pack(fill="x", pady=5)
     kpi_frame.grid_columnconfigure((0, 1, 2, 3, 4), weight=1)
-    expense_data = get_expense_breakdown()
-    create_kpi_card(kpi_frame, "Sueldos", expense_data["Sueldos"]).grid(row=0, column=0, padx=10, sticky="ew")
-    create_kpi_card(kpi_frame, "Comisión Creadoras", expense_data["Comisión Creadoras"]).grid(row=0, column=1, padx=10, sticky="ew")
-    create_kpi_card(kpi_frame, "Comisión Retiros", expense_data["Comisión Retiros"], value_color=Theme.RED).grid(row=0, column=2, padx=10, sticky="ew")
-    create_kpi_card(kpi_frame, "Inversiones", expense_data["Inversiones"]).grid(row=0, column=3, padx=10, sticky="ew")
-    create_kpi_card(kpi_frame, "Otros Egresos", expense_data["Otros Egresos"]).grid(row=0, column=4, padx=10, sticky="ew")
+    kpi_cards = {}
+    for column, (key, color) in enumerate((("Sueldos", None), ("Comisión Creadoras", None), ("Comisión Retiros", Theme.RED), ("Inversiones", None), ("Otros Egresos", None))):
+        kpi_cards[key] = create_kpi_card(kpi_frame, key, 0, value_color=color)
+        kpi_cards[key].grid(row=0, column=column, padx=10, sticky="ew")
 
     charts_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
     charts_frame.pack(fill="x", expand=True, pady=10)
@@ -288,32 +185,31 @@ def mostrar_dashboard(root):
     pie_chart_frame = ctk.CTkFrame(left_column_frame, corner_radius=10, fg_color=Theme.FRAME_COLOR)
     pie_chart_frame.grid(row=0, column=0, sticky="new", pady=(0, 10))
     ctk.CTkLabel(pie_chart_frame, text="Desglose General de Gastos", font=("Arial", 18, "bold")).pack(anchor="w", padx=15, pady=(10,5))
-    pie_labels = [label for label, value in expense_data.items() if value > 0]
-    pie_values = [value for value in expense_data.values() if value > 0]
-    if not pie_values: ctk.CTkLabel(pie_chart_frame, text="No hay datos de gastos.", font=("Arial", 16)).pack(expand=True)
-    else:
-        fig, ax = plt.subplots(figsize=(5, 5), dpi=100); fig.patch.set_facecolor(Theme.FRAME_COLOR)
-        wedge_properties = {'width': 0.4, 'edgecolor': Theme.FRAME_COLOR, 'linewidth': 2}
-        colors = plt.cm.viridis(np.linspace(0, 1, len(pie_labels)))
-        wedges, texts, autotexts = ax.pie(pie_values, labels=pie_labels, autopct='%1.1f%%', startangle=140, pctdistance=0.8, colors=colors, wedgeprops=wedge_properties, textprops={'color': Theme.TEXT_COLOR, 'fontsize': 12})
-        for autotext in autotexts: autotext.set_color("white"); autotext.set_fontweight('bold')
-        canvas = FigureCanvasTkAgg(fig, master=pie_chart_frame); canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True, padx=5, pady=5)
+    pie_body = ctk.CTkFrame(pie_chart_frame, fg_color="transparent")
+    pie_body.pack(fill="both", expand=True)
     
-    collapsible_expenses = CollapsibleFrame(left_column_frame, title="Ver Desglose de Gastos")
+    # Las figuras se crean una vez; cada refresco solo actualiza las series que cambiaron.
+    charts = ChartManager()
+
+    # Los desgloses empiezan cerrados: su gráfico (y la consulta de socios) se hace al abrirlos,
+    # y se repite solo si el dashboard cargó datos nuevos desde la última vez.
+    state = {'snapshot': None, 'version': 0}
+    def data_version(): return state['version']
+    def build_category_chart(frame):
+        create_bar_chart_section(frame, charts, "categorias", "Gastos por Categoría", Theme.RED)
+        def load():
+            if state['snapshot'] is not None: charts.update("categorias", in_units(state['snapshot'].expense_by_category))
+        return load
+    def build_partner_chart(frame):
+        create_bar_chart_section(frame, charts, "socios", "Gastos Totales por Socio", Theme.BLUE)
+        return lambda: run_query(get_partner_expenses, on_done=lambda data: charts.update("socios", in_units(data)))
+
+    collapsible_expenses = CollapsibleFrame(left_column_frame, title="Ver Desglose de Gastos", content_factory=build_category_chart, data_version=data_version)
     collapsible_expenses.grid(row=1, column=0, sticky="new", pady=(10,0))
-    expense_category_data = get_expense_by_category()
-    create_horizontal_bar_chart(
-        parent=collapsible_expenses.content_frame, data=expense_category_data,
-        title="Gastos por Categoría", color=Theme.RED)
     
     # --- NUEVO GRÁFICO DE GASTOS POR SOCIO ---
-    collapsible_partners = CollapsibleFrame(left_column_frame, title="Ver Gastos por Socio")
+    collapsible_partners = CollapsibleFrame(left_column_frame, title="Ver Gastos por Socio", content_factory=build_partner_chart, data_version=data_version)
     collapsible_partners.grid(row=2, column=0, sticky="new", pady=(10,0))
-    partner_expense_data = get_partner_expenses()
-    create_horizontal_bar_chart(
-        parent=collapsible_partners.content_frame, data=partner_expense_data,
-        title="Gastos Totales por Socio", color=Theme.BLUE)
 
     # --- Columna Derecha ---
     right_column_frame = ctk.CTkFrame(charts_frame, fg_color="transparent")
@@ -323,16 +219,40 @@ def mostrar_dashboard(root):
     
     revenue_chart_parent = ctk.CTkFrame(right_column_frame, fg_color="transparent")
     revenue_chart_parent.grid(row=0, column=0, sticky="nsew", pady=(0, 10))
-    create_horizontal_bar_chart(revenue_chart_parent, get_top_creators_by_revenue(), "Top Creadoras por Ingresos", Theme.GREEN)
     
     profit_chart_parent = ctk.CTkFrame(right_column_frame, fg_color="transparent")
     profit_chart_parent.grid(row=1, column=0, sticky="nsew", pady=(10, 0))
-    create_horizontal_bar_chart(profit_chart_parent, get_top_creators_by_profitability(), "Top Creadoras por Rentabilidad", Theme.ACCENT_COLOR)
+
+    charts.add("gastos", PieChartSlot(pie_body, Theme.FRAME_COLOR, Theme.TEXT_COLOR))
+    create_bar_chart_section(revenue_chart_parent, charts, "ingresos", "Top Creadoras por Ingresos", Theme.GREEN)
+    create_bar_chart_section(profit_chart_parent, charts, "rentabilidad", "Top Creadoras por Rentabilidad", Theme.ACCENT_COLOR)
+    scroll_frame.bind("<Destroy>", lambda event: charts.close() if event.widget is scroll_frame else None, add="+")
+
+    def render(snapshot):
+        status_label.pack_forget()
+        state['snapshot'] = snapshot; state['version'] += 1
+        main_kpi_card.value_label.configure(text=format_money(snapshot.ingresos_mes))
+        expense_data = snapshot.expense_breakdown
+        for card, text in zip(kpi_cards.values(), format_money_many(expense_data[key] for key in kpi_cards)): card.value_label.configure(text=text)
+        charts.update("gastos", in_units((label, value) for label, value in expense_data.items() if value > 0))
+        charts.update("ingresos", in_units(snapshot.top_revenue))
+        charts.update("rentabilidad", in_units(snapshot.top_profitability))
+        collapsible_expenses.refresh_content(); collapsible_partners.refresh_content()
+
+    def refresh():
+        status_label.configure(text="Cargando datos...")
+        status_label.pack(anchor="w", padx=10, after=title_label)
+        run_query(get_dashboard_snapshot, on_done=render)
+
+    return View(scroll_frame, refresh, fill="both", expand=True)
 
 def mostrar_creadoras(root):
+    show_view(root, "creadoras", build_creadoras_view)
+
+def build_creadoras_view(root):
     container, buttons_frame, tree = create_styled_view(root, "Manage Creators", ("ID", "Nombre", "Ingresos Totales", "Sueldo Fijo", "%", "Inversión", "Socio"))
     tree.column("ID", width=40, anchor='center'); tree.column("Ingresos Totales", width=120, anchor='e'); tree.column("Sueldo Fijo", width=120, anchor='e'); tree.column("%", width=60, anchor='e'); tree.column("Inversión", width=120, anchor='e'); tree.column("Socio", width=120, anchor='center')
-    add_button = ctk.CTkButton(buttons_frame, text="Add Creator", fg_color=Theme.ACCENT_COLOR, hover_color=Theme.ACCENT_HOVER, command=lambda: AddCreatorForm(root, db_name, lambda: mostrar_creadoras(root))); add_button.pack(side="left", padx=5)
+    add_button = ctk.CTkButton(buttons_frame, text="Add Creator", fg_color=Theme.ACCENT_COLOR, hover_color=Theme.ACCENT_HOVER, command=lambda: AddCreatorForm(root, db.DB_PATH, lambda: mostrar_creadoras(root))); add_button.pack(side="left", padx=5)
     edit_button = ctk.CTkButton(buttons_frame, text="Edit", state="disabled"); edit_button.pack(side="left", padx=5)
     delete_button = ctk.CTkButton(buttons_frame, text="Delete", state="disabled", fg_color="#D2691E"); delete_button.pack(side="left", padx=5)
     def on_select(event): edit_button.configure(state="normal"); delete_button.configure(state="normal")
@@ -346,30 +266,33 @@ def mostrar_creadoras(root):
         return {'id': data[0], 'nombre': data[1], 'sueldo_fijo': data[2], 'porcentaje': data[3], 'notas': data[4], 'inversion': data[5], 'socio_id': data[6]}
     def open_edit_form():
         creator_data = get_selected_creator()
-        if creator_data: EditCreatorForm(root, db_name, lambda: mostrar_creadoras(root), creator_data)
+        if creator_data: EditCreatorForm(root, db.DB_PATH, lambda: mostrar_creadoras(root), creator_data)
     def delete_item():
         creator_data = get_selected_creator()
         if creator_data and messagebox.askyesno("Confirmar", f"¿Eliminar a {creator_data['nombre']}?\n¡Todas sus transacciones financieras asociadas serán desvinculadas, pero no eliminadas!", icon=messagebox.WARNING):
-            with sqlite3.connect(db_name) as conn: conn.execute("DELETE FROM creadoras WHERE id=?", (creator_data['id'],))
+            with connection() as conn: conn.execute("DELETE FROM creadoras WHERE id=?", (creator_data['id'],))
             mostrar_creadoras(root)
     edit_button.configure(command=open_edit_form); delete_button.configure(command=delete_item)
-    query = """
-        SELECT c.id, c.nombre, IFNULL(SUM(f.monto), 0) as total_ingresos, c.sueldo_fijo, c.porcentaje, c.inversion, s.nombre
-        FROM creadoras c 
-        LEFT JOIN finanzas f ON c.id = f.creadora_id AND f.tipo = 'ingreso'
-        LEFT JOIN socios s ON c.socio_id = s.id
-        GROUP BY c.id, c.nombre ORDER BY c.nombre"""
-    for row in tree.get_children(): tree.delete(row)
-    for row in get_db_data(query):
-        formatted_row = list(row); formatted_row[2] = f"${row[2]:.2f}"; formatted_row[3] = f"${row[3]:.2f}"
-        formatted_row[4] = f"{row[4]:.1f}%"; formatted_row[5] = f"${row[5]:.2f}"
-        if formatted_row[6] is None: formatted_row[6] = "N/A"
-        tree.insert("", tk.END, values=formatted_row)
+    def format_row(row):
+        row = row[:7]  # detrás va la clave keyset
+        if row[6] is None: row[6] = "N/A"
+        return row, ()
+    headings = sortable_headings(tree, CREADORAS_VIEW, {"ID": "id", "Nombre": "nombre", "Ingresos Totales": "ingresos", "Sueldo Fijo": "sueldo_fijo", "%": "porcentaje", "Inversión": "inversion", "Socio": "socio"}, lambda: refresh())
+    # Importes y porcentajes se formatean por página, en el worker, y no celda a celda en el hilo de Tk.
+    pager = PagedTreeview(tree, lambda cursor, direction, limit: format_columns(get_creadoras_view_page(cursor, direction, limit, **headings.query()), money=(2, 3, 5), percent=(4,)),
+                          key_of=lambda row: tuple(row[7:]), format_row=format_row, run=run_page_query)
+    def refresh():
+        edit_button.configure(state="disabled"); delete_button.configure(state="disabled")
+        pager.reload()
+    return View(container, refresh, fill='both', expand=True, padx=30, pady=20)
 
 def mostrar_empleados(root):
+    show_view(root, "empleados", build_empleados_view)
+
+def build_empleados_view(root):
     container, buttons_frame, tree = create_styled_view(root, "Manage Employees", ("ID", "Nombre", "Rol", "Sueldo", "Ventas", "Comisión", "Socio"))
     tree.column("ID", width=40, anchor='center'); tree.column("Sueldo", width=100, anchor='e'); tree.column("Ventas", width=100, anchor='e'); tree.column("Comisión", width=100, anchor='e'); tree.column("Socio", width=120, anchor='center')
-    add_button = ctk.CTkButton(buttons_frame, text="Add Employee", fg_color=Theme.ACCENT_COLOR, hover_color=Theme.ACCENT_HOVER, command=lambda: AddEmployeeForm(root, db_name, lambda: mostrar_empleados(root))); add_button.pack(side="left", padx=5)
+    add_button = ctk.CTkButton(buttons_frame, text="Add Employee", fg_color=Theme.ACCENT_COLOR, hover_color=Theme.ACCENT_HOVER, command=lambda: AddEmployeeForm(root, db.DB_PATH, lambda: mostrar_empleados(root))); add_button.pack(side="left", padx=5)
     edit_button = ctk.CTkButton(buttons_frame, text="Edit", state="disabled"); edit_button.pack(side="left", padx=5)
     delete_button = ctk.CTkButton(buttons_frame, text="Delete", state="disabled", fg_color="#D2691E"); delete_button.pack(side="left", padx=5)
     def on_select(event): edit_button.configure(state="normal"); delete_button.configure(state="normal")
@@ -384,30 +307,34 @@ def mostrar_empleados(root):
     def open_edit_form():
         employee_data = get_selected_employee()
         if employee_data:
-            EditEmployeeForm(root, db_name, lambda: mostrar_empleados(root), employee_data)
+            EditEmployeeForm(root, db.DB_PATH, lambda: mostrar_empleados(root), employee_data)
     def delete_item():
         employee_data = get_selected_employee()
         if employee_data and messagebox.askyesno("Confirmar", f"¿Eliminar empleado '{employee_data['nombre']}'?"):
-            with sqlite3.connect(db_name) as conn: conn.execute("DELETE FROM empleados WHERE id=?", (employee_data['id'],))
+            with connection() as conn: conn.execute("DELETE FROM empleados WHERE id=?", (employee_data['id'],))
             mostrar_empleados(root)
     edit_button.configure(command=open_edit_form); delete_button.configure(command=delete_item)
-    for row in tree.get_children(): tree.delete(row)
-    query = """
-        SELECT e.id, e.nombre, e.rol, e.sueldo, e.ventas, e.comision, s.nombre
-        FROM empleados e
-        LEFT JOIN socios s ON e.socio_id = s.id
-        ORDER BY e.nombre"""
-    for row in get_db_data(query):
-        formatted_row = list(row); formatted_row[3] = f"${row[3]:.2f}"; formatted_row[4] = f"${row[4]:.2f}"; formatted_row[5] = f"{row[5]:.1f}%"
-        if formatted_row[6] is None: formatted_row[6] = "N/A"
-        tree.insert("", tk.END, values=formatted_row)
+    def format_row(row):
+        row = row[:7]
+        if row[6] is None: row[6] = "N/A"
+        return row, ()
+    headings = sortable_headings(tree, EMPLEADOS_VIEW, {"ID": "id", "Nombre": "nombre", "Rol": "rol", "Sueldo": "sueldo", "Ventas": "ventas", "Comisión": "comision", "Socio": "socio"}, lambda: refresh())
+    pager = PagedTreeview(tree, lambda cursor, direction, limit: format_columns(get_empleados_view_page(cursor, direction, limit, **headings.query()), money=(3, 4), percent=(5,)),
+                          key_of=lambda row: tuple(row[7:]), format_row=format_row, run=run_page_query)
+    def refresh():
+        edit_button.configure(state="disabled"); delete_button.configure(state="disabled")
+        pager.reload()
+    return View(container, refresh, fill='both', expand=True, padx=30, pady=20)
 
 # --- NUEVA VISTA PARA SOCIOS ---
 def mostrar_socios(root):
+    show_view(root, "socios", build_socios_view)
+
+def build_socios_view(root):
     container, buttons_frame, tree = create_styled_view(root, "Manage Partners", ("ID", "Nombre", "Creadoras", "Empleados", "Notas"))
     tree.column("ID", width=40, anchor='center'); tree.column("Creadoras", width=120, anchor='center'); tree.column("Empleados", width=120, anchor='center')
     
-    add_button = ctk.CTkButton(buttons_frame, text="Add Partner", fg_color=Theme.ACCENT_COLOR, hover_color=Theme.ACCENT_HOVER, command=lambda: AddPartnerForm(root, db_name, lambda: mostrar_socios(root)))
+    add_button = ctk.CTkButton(buttons_frame, text="Add Partner", fg_color=Theme.ACCENT_COLOR, hover_color=Theme.ACCENT_HOVER, command=lambda: AddPartnerForm(root, db.DB_PATH, lambda: mostrar_socios(root)))
     add_button.pack(side="left", padx=5)
     edit_button = ctk.CTkButton(buttons_frame, text="Edit", state="disabled")
     edit_button.pack(side="left", padx=5)
@@ -426,31 +353,39 @@ def mostrar_socios(root):
 
     def open_edit_form():
         partner_data = get_selected_partner()
-        if partner_data: EditPartnerForm(root, db_name, lambda: mostrar_socios(root), partner_data)
+        if partner_data: EditPartnerForm(root, db.DB_PATH, lambda: mostrar_socios(root), partner_data)
 
     def delete_item():
         partner_data = get_selected_partner()
         if partner_data and messagebox.askyesno("Confirmar", f"¿Eliminar al socio '{partner_data['nombre']}'?\n\nEsto desasignará a todas las creadoras y empleados asociados, pero no los eliminará a ellos.", icon=messagebox.WARNING):
-            with sqlite3.connect(db_name) as conn: conn.execute("DELETE FROM socios WHERE id=?", (partner_data['id'],))
+            with connection() as conn: conn.execute("DELETE FROM socios WHERE id=?", (partner_data['id'],))
             mostrar_socios(root)
 
     edit_button.configure(command=open_edit_form)
     delete_button.configure(command=delete_item)
 
-    for row in tree.get_children(): tree.delete(row)
     query = """
         SELECT s.id, s.nombre,
                (SELECT COUNT(c.id) FROM creadoras c WHERE c.socio_id = s.id),
                (SELECT COUNT(e.id) FROM empleados e WHERE e.socio_id = s.id),
                s.notas
         FROM socios s ORDER BY s.nombre"""
-    for row in get_db_data(query): tree.insert("", tk.END, values=row)
+    def fill(rows):
+        for row in rows: tree.insert("", tk.END, values=row)
+    def refresh():
+        edit_button.configure(state="disabled"); delete_button.configure(state="disabled")
+        tree.delete(*tree.get_children())
+        run_query(cached_query, query, on_done=fill)
+    return View(container, refresh, fill='both', expand=True, padx=30, pady=20)
 
 def mostrar_finanzas(root):
+    show_view(root, "finanzas", build_finanzas_view)
+
+def build_finanzas_view(root):
     container, buttons_frame, tree = create_styled_view(root, "Manage Finances", ("ID", "Tipo", "Categoría", "Monto", "Asociado a", "Descripción", "Fecha"))
     tree.column("Asociado a", width=120, anchor='center')
     tree.tag_configure('ingreso', foreground=Theme.GREEN); tree.tag_configure('egreso', foreground=Theme.RED)
-    add_button = ctk.CTkButton(buttons_frame, text="Add Transaction", fg_color=Theme.ACCENT_COLOR, hover_color=Theme.ACCENT_HOVER, command=lambda: AddTransactionForm(root, db_name, lambda: mostrar_finanzas(root)))
+    add_button = ctk.CTkButton(buttons_frame, text="Add Transaction", fg_color=Theme.ACCENT_COLOR, hover_color=Theme.ACCENT_HOVER, command=lambda: AddTransactionForm(root, db.DB_PATH, lambda: mostrar_finanzas(root)))
     add_button.pack(side="left", padx=5)
     edit_button = ctk.CTkButton(buttons_frame, text="Edit", state="disabled"); edit_button.pack(side="left", padx=5)
     delete_button = ctk.CTkButton(buttons_frame, text="Delete", state="disabled", fg_color="#D2691E"); delete_button.pack(side="left", padx=5)
@@ -465,46 +400,103 @@ def mostrar_finanzas(root):
         return {'id': data_row[0], 'tipo': data_row[1], 'categoria': data_row[2], 'monto': data_row[3], 'descripcion': data_row[4], 'fecha': data_row[5], 'creadora_id': data_row[6]}
     def open_edit_form():
         transaction_data = get_selected_transaction()
-        if transaction_data: EditTransactionForm(root, db_name, lambda: mostrar_finanzas(root), transaction_data)
+        if transaction_data: EditTransactionForm(root, db.DB_PATH, lambda: mostrar_finanzas(root), transaction_data)
     def delete_item():
         transaction_data = get_selected_transaction()
         if transaction_data and messagebox.askyesno("Confirmar", f"¿Eliminar transacción con ID {transaction_data['id']}?", icon=messagebox.WARNING):
-            with sqlite3.connect(db_name) as conn: conn.execute("DELETE FROM finanzas WHERE id=?", (transaction_data['id'],))
+            with connection() as conn: conn.execute("DELETE FROM finanzas WHERE id=?", (transaction_data['id'],))
             mostrar_finanzas(root)
     edit_button.configure(command=open_edit_form); delete_button.configure(command=delete_item)
-    query = """SELECT f.id, f.tipo, f.categoria, f.monto, c.nombre, f.descripcion, STRFTIME('%Y-%m-%d %H:%M', f.fecha)
-               FROM finanzas f LEFT JOIN creadoras c ON f.creadora_id = c.id ORDER BY f.fecha DESC"""
-    for row in tree.get_children(): tree.delete(row)
-    for row in get_db_data(query):
-        tags = (row[1],); formatted_row = list(row); formatted_row[3] = f"${row[3]:.2f}"
+
+    # Importación masiva desde CSV en segundo plano; las filas rechazadas se vuelcan junto al archivo.
+    import_button = ctk.CTkButton(buttons_frame, text="Import CSV", fg_color=Theme.WIDGET_COLOR); import_button.pack(side="left", padx=5)
+    import_state = {"task": None, "read": 0}
+    def update_import_progress():
+        if import_state["task"] is None: return
+        import_button.configure(text=f"Importando... {import_state['read']:,}")
+        container.after(200, update_import_progress)
+    def on_import_done(rejects_path, result):
+        import_state["task"] = None; import_button.configure(text="Import CSV", state="normal")
+        message = result.summary()
+        if result.rechazadas:
+            message += "\n\n" + "\n".join(f"Línea {line}: {reason}" for line, reason in result.rechazos[:10])
+            message += f"\n\nTodas las filas rechazadas están en:\n{rejects_path}"
+        elif os.path.exists(rejects_path): os.remove(rejects_path)
+        messagebox.showinfo("Importación Finalizada", message, parent=root)
+        mostrar_finanzas(root)
+    def on_import_error(error):
+        import_state["task"] = None; import_button.configure(text="Import CSV", state="normal")
+        messagebox.showerror("Error al Importar", f"No se pudo importar el archivo:\n{error}", parent=root)
+    def import_csv():
+        from importer import import_file
+        filepath = filedialog.askopenfilename(title="Importar Movimientos", filetypes=[("CSV", "*.csv"), ("All files", "*.*")])
+        if not filepath: return
+        rejects_path = os.path.splitext(filepath)[0] + "_rechazos.csv"
+        import_state["read"] = 0; import_button.configure(state="disabled")
+        import_state["task"] = run_query(import_file, filepath, rejects_path, lambda read: import_state.update(read=read), persistent=True,
+                                         on_done=lambda result: on_import_done(rejects_path, result), on_error=on_import_error)
+        update_import_progress()
+    import_button.configure(command=import_csv)
+
+    def format_row(row):
+        formatted_row = row[:7]
         if formatted_row[4] is None: formatted_row[4] = "N/A"
-        tree.insert("", tk.END, values=formatted_row, tags=tags)
+        return formatted_row, (row[1],)
+    headings = sortable_headings(tree, FINANZAS_VIEW, {"ID": "id", "Tipo": "tipo", "Categoría": "categoria", "Monto": "monto", "Asociado a": "creadora", "Fecha": "fecha"}, lambda: refresh())
+    list_page = lambda cursor, direction, limit: format_columns(get_finanzas_view_page(cursor, direction, limit, **headings.query()), money=(3,))
+    pager = PagedTreeview(tree, list_page, key_of=lambda row: tuple(row[7:]), format_row=format_row, run=run_page_query)
+    def refresh():
+        edit_button.configure(state="disabled"); delete_button.configure(state="disabled")
+        pager.reload()
+
+    # Búsqueda de texto (FTS5) en descripción y categoría, por relevancia; se lanza 300 ms después de la última tecla.
+    search_entry = ctk.CTkEntry(buttons_frame, placeholder_text="Buscar descripción o categoría...", width=260); search_entry.pack(side="right", padx=5)
+    search_notice = ctk.CTkLabel(buttons_frame, text="", text_color="#a0a0a0"); search_notice.pack(side="right", padx=5)
+    search_state = {"after": None, "match": None}
+    def search_pages(match, since):
+        # La ventana de relevancia se fija al lanzar la búsqueda y se mantiene al hacer scroll.
+        # Los filtros de los encabezados se aplican; el orden es siempre por relevancia.
+        return lambda cursor, direction, limit: format_columns(search_finanzas_view_page(match, since, cursor, direction, limit, headings.query()["filters"]), money=(3,))
+    def start_search(match, since):
+        if match != search_state["match"]: return  # llegó tarde: ya se escribió otra búsqueda
+        search_notice.configure(text=f"Mostrando las {SEARCH_WINDOW:,} coincidencias más recientes" if since else "")
+        pager.fetch_page = search_pages(match, since)
+        refresh()
+    def apply_search():
+        search_state["after"] = None
+        match = fts_query(search_entry.get())
+        if match == search_state["match"]: return
+        search_state["match"] = match
+        if match: run_query(search_window_start, match, on_done=lambda since: start_search(match, since))
+        else:
+            search_notice.configure(text=""); pager.fetch_page = list_page
+            refresh()
+    def on_search_key(event):
+        if search_state["after"]: container.after_cancel(search_state["after"])
+        search_state["after"] = container.after(300, apply_search)
+    search_entry.bind("<KeyRelease>", on_search_key)
+    return View(container, refresh, fill='both', expand=True, padx=30, pady=20)
 
 def mostrar_reportes(root):
-    for widget in root.winfo_children(): widget.destroy()
-    root.configure(fg_color=Theme.BACKGROUND)
+    show_view(root, "reportes", build_reportes_view)
 
-    style = ttk.Style(); style.theme_use("default")
-    style.configure("Treeview", background=Theme.FRAME_COLOR, foreground=Theme.TEXT_COLOR, fieldbackground=Theme.FRAME_COLOR, borderwidth=0, rowheight=35)
-    style.map("Treeview", background=[('selected', Theme.ACCENT_COLOR)])
-    style.configure("Treeview.Heading", background=Theme.WIDGET_COLOR, foreground=Theme.TEXT_COLOR, font=("Arial", 14, "bold"), borderwidth=0)
-    
+def build_reportes_view(root):
     container = ctk.CTkFrame(root, fg_color="transparent")
-    container.pack(fill='both', expand=True, padx=30, pady=20)
     
     top_frame = ctk.CTkFrame(container, fg_color="transparent")
     top_frame.pack(fill='x', pady=(0, 10))
     ctk.CTkLabel(top_frame, text="Reporte Financiero Mensual", font=("Arial", 32, "bold")).pack(side="left")
-    export_button = ctk.CTkButton(top_frame, text="Exportar a CSV", fg_color=Theme.ACCENT_COLOR, hover_color=Theme.ACCENT_HOVER)
+    export_button = ctk.CTkButton(top_frame, text="Exportar Movimientos", fg_color=Theme.ACCENT_COLOR, hover_color=Theme.ACCENT_HOVER)
     export_button.pack(side="right", padx=5)
 
     filter_frame = ctk.CTkFrame(container, fg_color=Theme.FRAME_COLOR, corner_radius=10)
     filter_frame.pack(fill='x', pady=10)
     
     ctk.CTkLabel(filter_frame, text="Seleccionar Mes:", font=("Arial", 14, "bold")).pack(side="left", padx=(15, 5), pady=10)
-    months = ["Todos los Meses"] + get_distinct_months()
-    month_combo = ctk.CTkComboBox(filter_frame, values=months, width=150)
+    month_combo = ctk.CTkComboBox(filter_frame, values=["Todos los Meses"], width=150)
     month_combo.pack(side="left", padx=5, pady=10)
+    def fill_months(months):
+        month_combo.configure(values=["Todos los Meses"] + months)
     
     ctk.CTkLabel(filter_frame, text="o Rango Manual:", font=("Arial", 14)).pack(side="left", padx=(15, 5), pady=10)
     start_date_entry = ctk.CTkEntry(filter_frame, placeholder_text="YYYY-MM-DD")
@@ -528,18 +520,25 @@ def mostrar_reportes(root):
     tree.tag_configure('ganancia', foreground=Theme.GREEN)
     tree.tag_configure('perdida', foreground=Theme.RED)
 
+    report_task = {"task": None}
+    current_range = {"start": None, "end": None}
+
     def populate_report(start_date=None, end_date=None):
+        current_range.update(start=start_date, end=end_date)
+        for row in tree.get_children():
+            tree.delete(row)
+        tree.insert("", tk.END, values=("Cargando...", "", "", ""))
+        if report_task["task"] is not None: report_task["task"].cancel()
+        report_task["task"] = run_query(get_monthly_financial_trend, start_date, end_date, on_done=fill_report)
+
+    def fill_report(financial_data):
         for row in tree.get_children():
             tree.delete(row)
         
-        financial_data = get_monthly_financial_trend(start_date, end_date)
-        
-        for i, month in enumerate(financial_data["months"]):
-            income = financial_data["incomes"][i]
-            expense = financial_data["expenses"][i]
-            profit = income - expense
-            tag = 'ganancia' if profit >= 0 else 'perdida'
-            formatted_row = (month, f"${income:,.2f}", f"${expense:,.2f}", f"${profit:,.2f}")
+        rows = [(month, income, expense, income - expense)
+                for month, income, expense in zip(financial_data["months"], financial_data["incomes"], financial_data["expenses"])]
+        for row, formatted_row in zip(rows, format_columns(rows, money=(1, 2, 3))):
+            tag = 'ganancia' if row[3] >= 0 else 'perdida'
             tree.insert("", tk.END, values=formatted_row, tags=(tag,))
 
     def apply_filter():
@@ -577,51 +576,127 @@ def mostrar_reportes(root):
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo procesar el mes seleccionado: {e}", parent=root)
 
-    def export_to_csv():
-        if not tree.get_children():
-            messagebox.showwarning("Sin Datos", "No hay datos para exportar.", parent=root)
-            return
-        
-        filepath = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv"), ("All files", "*.*")], title="Guardar Reporte Como...")
+    # Exportación de los movimientos del rango actual, en streaming y en segundo plano.
+    export_state = {"task": None, "done": 0, "total": 0}
+    progress_frame = ctk.CTkFrame(top_frame, fg_color="transparent")
+    progress_label = ctk.CTkLabel(progress_frame, text="", font=("Arial", 12), text_color="#a0a0a0"); progress_label.pack(side="left", padx=5)
+    progress_bar = ctk.CTkProgressBar(progress_frame, width=200); progress_bar.pack(side="left", padx=5)
+    cancel_export_button = ctk.CTkButton(progress_frame, text="Cancelar", width=80, fg_color=Theme.WIDGET_COLOR); cancel_export_button.pack(side="left", padx=5)
+
+    def run_export(filepath, start_date, end_date):
+        from export import export_to_file, count_rows
+        export_state["total"] = count_rows(start_date=start_date, end_date=end_date)
+        return export_to_file(filepath, progress=lambda done: export_state.update(done=done), start_date=start_date, end_date=end_date)
+
+    def update_progress():
+        if export_state["task"] is None: return
+        total = export_state["total"]
+        progress_bar.set(export_state["done"] / total if total else 0)
+        progress_label.configure(text=f"Exportando {export_state['done']:,} / {total:,}")
+        container.after(100, update_progress)
+
+    def finish_export():
+        export_state["task"] = None
+        progress_frame.pack_forget(); export_button.configure(state="normal")
+
+    def on_export_done(filepath, rows):
+        finish_export()
+        messagebox.showinfo("Éxito", f"Se exportaron {rows:,} movimientos a:\n{filepath}", parent=root)
+
+    def on_export_error(error):
+        finish_export()
+        messagebox.showerror("Error al Exportar", f"No se pudo exportar:\n{error}", parent=root)
+
+    def cancel_export():
+        if export_state["task"] is not None: export_state["task"].cancel()
+        finish_export()
+
+    def export_ledger():
+        filepath = filedialog.asksaveasfilename(defaultextension=".csv", title="Exportar Movimientos Como...",
+            filetypes=[("CSV", "*.csv"), ("CSV comprimido", "*.csv.gz"), ("NDJSON", "*.ndjson"), ("NDJSON comprimido", "*.ndjson.gz"), ("All files", "*.*")])
         if not filepath: return
-            
-        try:
-            with open(filepath, "w", newline="", encoding="utf-8") as f:
-                writer = csv.writer(f)
-                writer.writerow(columns)
-                for child in tree.get_children():
-                    writer.writerow(tree.item(child)['values'])
-            messagebox.showinfo("Éxito", f"Reporte guardado exitosamente en:\n{filepath}", parent=root)
-        except IOError as e:
-            messagebox.showerror("Error al Guardar", f"No se pudo guardar el archivo:\n{e}", parent=root)
+        export_state.update(done=0, total=0)
+        progress_bar.set(0); progress_label.configure(text="Preparando exportación...")
+        progress_frame.pack(side="right", padx=5, before=export_button)
+        export_button.configure(state="disabled")
+        export_state["task"] = run_query(run_export, filepath, current_range["start"], current_range["end"], persistent=True,
+                                         on_done=lambda rows: on_export_done(filepath, rows), on_error=on_export_error)
+        update_progress()
 
     filter_button.configure(command=apply_filter)
     reset_button.configure(command=clear_filter)
-    export_button.configure(command=export_to_csv)
+    export_button.configure(command=export_ledger); cancel_export_button.configure(command=cancel_export)
     month_combo.configure(command=on_month_select)
 
-    populate_report()
+    def refresh():
+        run_query(get_distinct_months, on_done=fill_months)
+        populate_report(current_range["start"], current_range["end"])
+
+    return View(container, refresh, fill='both', expand=True, padx=30, pady=20)
 
-def main():
+def print_sql_report():
+    print(instrumentation.metrics.summary(), file=sys.stderr)
+
+def prepare_startup():
+    """Trabajo de arranque que no necesita la ventana: el esquema y la importación de matplotlib."""
     init_db()
+    import charts  # noqa: F401  (el dashboard lo usará enseguida)
+
+def main(on_first_frame=None):
+    """
+    La ventana y la barra lateral se pintan antes de tocar la base de datos:
+    init_db y la carga de charts corren en un worker después del primer frame,
+    y al terminar se muestra el dashboard (o la vista que se haya pedido
+    mientras tanto). `on_first_frame(app)` lo usa benchmarks/startup.py.
+    """
+    global executor
+    instrumentation.install()
+    # FINANZAS_SQL_REPORT=1: al cerrar, resumen de sentencias por vista en stderr.
+    if os.environ.get("FINANZAS_SQL_REPORT") == "1": atexit.register(print_sql_report)
     app = ctk.CTk(); app.title("OFM KEVIN - Agency Manager"); app.geometry("1600x900")
+    executor = QueryExecutor(app)
     app.grid_columnconfigure(1, weight=1); app.grid_rowconfigure(0, weight=1)
     frame_sidebar = ctk.CTkFrame(app, width=280, fg_color=Theme.SIDEBAR_COLOR, corner_radius=0); frame_sidebar.grid(row=0, column=0, sticky="nsw")
     frame_main = ctk.CTkFrame(app, fg_color=Theme.BACKGROUND, corner_radius=0); frame_main.grid(row=0, column=1, sticky="nsew")
     ctk.CTkLabel(frame_sidebar, text="OFM KEVIN", font=("Arial", 24, "bold")).pack(pady=25, padx=20)
-    
-    dashboard_button = ctk.CTkButton(frame_sidebar, text="  Dashboard", anchor="w", fg_color="transparent", font=("Arial", 16, "bold"), command=lambda: mostrar_dashboard(frame_main))
+
+    # Hasta que el esquema esté listo solo se recuerda la última vista pedida.
+    startup = {"ready": False, "view": lambda: mostrar_dashboard(frame_main)}
+    def navigate(show):
+        if startup["ready"]: show()
+        else: startup["view"] = show
+
+    dashboard_button = ctk.CTkButton(frame_sidebar, text="  Dashboard", anchor="w", fg_color="transparent", font=("Arial", 16, "bold"), command=lambda: navigate(lambda: mostrar_dashboard(frame_main)))
     dashboard_button.pack(fill="x", padx=20, pady=5)
-    reports_button = ctk.CTkButton(frame_sidebar, text="  Reportes", anchor="w", fg_color="transparent", font=("Arial", 16, "bold"), command=lambda: mostrar_reportes(frame_main))
+    reports_button = ctk.CTkButton(frame_sidebar, text="  Reportes", anchor="w", fg_color="transparent", font=("Arial", 16, "bold"), command=lambda: navigate(lambda: mostrar_reportes(frame_main)))
     reports_button.pack(fill="x", padx=20, pady=5)
 
     ctk.CTkLabel(frame_sidebar, text="GESTIÓN", font=("Arial", 12, "bold"), text_color="#a0a0a0").pack(pady=(20, 5), padx=20, anchor="w")
-    CollapsibleMenu(frame_sidebar, "Creators", CREATORS_ICON, [("Manage creators", MANAGE_ICON, lambda: mostrar_creadoras(frame_main))]).pack(fill="x", padx=10, pady=5)
-    CollapsibleMenu(frame_sidebar, "Employees", EMPLOYEES_ICON, [("Manage employees", MANAGE_ICON, lambda: mostrar_empleados(frame_main))]).pack(fill="x", padx=10, pady=5)
-    CollapsibleMenu(frame_sidebar, "Partners", EMPLOYEES_ICON, [("Manage partners", MANAGE_ICON, lambda: mostrar_socios(frame_main))]).pack(fill="x", padx=10, pady=5)
-    CollapsibleMenu(frame_sidebar, "Finances", FINANCES_ICON, [("Transactions", MANAGE_ICON, lambda: mostrar_finanzas(frame_main))]).pack(fill="x", padx=10, pady=5)
-    
-    mostrar_dashboard(frame_main)
+    CollapsibleMenu(frame_sidebar, "Creators", CREATORS_ICON, [("Manage creators", MANAGE_ICON, lambda: navigate(lambda: mostrar_creadoras(frame_main)))]).pack(fill="x", padx=10, pady=5)
+    CollapsibleMenu(frame_sidebar, "Employees", EMPLOYEES_ICON, [("Manage employees", MANAGE_ICON, lambda: navigate(lambda: mostrar_empleados(frame_main)))]).pack(fill="x", padx=10, pady=5)
+    CollapsibleMenu(frame_sidebar, "Partners", EMPLOYEES_ICON, [("Manage partners", MANAGE_ICON, lambda: navigate(lambda: mostrar_socios(frame_main)))]).pack(fill="x", padx=10, pady=5)
+    CollapsibleMenu(frame_sidebar, "Finances", FINANCES_ICON, [("Transactions", MANAGE_ICON, lambda: navigate(lambda: mostrar_finanzas(frame_main)))]).pack(fill="x", padx=10, pady=5)
+
+    loading_label = ctk.CTkLabel(frame_main, text="Cargando...", font=("Arial", 16), text_color="#a0a0a0")
+    loading_label.pack(expand=True)
+
+    def on_ready(_):
+        startup["ready"] = True
+        loading_label.destroy()
+        startup["view"]()
+
+    def on_startup_error(error):
+        loading_label.configure(text="No se pudo abrir la base de datos.")
+        messagebox.showerror("Error al Iniciar", f"No se pudo preparar la base de datos:\n{error}", parent=app)
+
+    def start():
+        run_query(prepare_startup, persistent=True, on_done=on_ready, on_error=on_startup_error)
+        if on_first_frame:
+            app.update_idletasks()  # vacía los redibujados pendientes: la ventana ya está pintada
+            on_first_frame(app)
+
+    # start() solo encola trabajo en un worker: no retrasa el primer frame.
+    app.after_idle(start)
     app.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,172 @@
+"""
+Generador reproducible de libros de finanzas sintéticos.
+
+Crea una base con el esquema actual (db.init_db) y la llena con socios,
+creadoras, empleados y `rows` movimientos con distribuciones verosímiles:
+
+* Fechas: el volumen crece a lo largo de los `years` años que terminan en
+  `end_date` (más movimientos recientes que antiguos), con hora aleatoria.
+* Ingresos (60 %): casi todos 'Ingreso General' de una creadora, repartidos
+  según una ley de Zipf (pocas creadoras concentran la mayor parte).
+* Egresos: categorías con pesos e importes log-normales propios.
+* Importes en centavos y porcentajes en puntos básicos (ver money.py).
+
+Con la misma semilla y los mismos parámetros la base es idéntica. Los
+movimientos se cargan sin los triggers ni los índices de `finanzas`, que se
+recrean al final junto con el resumen mensual y los índices de búsqueda; la
+tabla `cambios` no recibe la carga.
+
+    python benchmarks/generate.py /tmp/ledger.db --rows 1000000 --creators 200
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+
+CHUNK = 200_000
+INCOME_SHARE = 0.6
+
+# (categoría, peso, mediana en unidades, dispersión log-normal, lleva creadora)
+EXPENSES = (
+    ("Comisión Retiro Cripto", 0.25, 20, 0.8, False),
+    ("Marketing", 0.22, 150, 1.0, False),
+    ("Sueldo", 0.15, 600, 0.4, True),
+    ("Servidor Virtual", 0.08, 40, 0.3, False),
+    ("Inversion Creadora", 0.10, 300, 0.9, True),
+    ("Inversion App", 0.05, 800, 0.7, False),
+    ("Otro", 0.15, 60, 1.2, False),
+)
+INCOME_CATEGORIES = (("Ingreso General", 0.95), ("Otro", 0.05))
+INCOME_MEDIAN = 80
+INCOME_SIGMA = 1.1
+
+DESCRIPTIONS = {
+    "Ingreso General": ("Pago OnlyFans", "Suscripciones Telegram", "Propinas OnlyFans", "Venta de contenido", "Pago Fansly"),
+    "Comisión Retiro Cripto": ("Comisión 2% por retiro", "Retiro Binance"),
+    "Marketing": ("Campaña Instagram", "Promoción Threads", "Shoutout Telegram", "Anuncios Reddit"),
+    "Sueldo": ("Sueldo mensual", "Pago chatter", "Sueldo creadora"),
+    "Servidor Virtual": ("VPS mensual", "Proxy residencial", "Dominio y hosting"),
+    "Inversion Creadora": ("Sesión de fotos", "Vestuario", "Equipo de grabación"),
+    "Inversion App": ("Desarrollo app", "Licencias", "Diseño"),
+    "Otro": ("Varios", "Gastos bancarios", "Material de oficina", "Devolución"),
+}
+ROLES = ("Chatter", "Chatter", "Chatter", "Editor", "Manager", "Marketing")
+
+FINANZAS_INSERT = "INSERT INTO finanzas (tipo, categoria, monto, descripcion, fecha, creadora_id) VALUES (?, ?, ?, ?, ?, ?)"
+
+
+def lognormal_cents(rng, median, sigma, size):
+    return np.maximum(np.rint(rng.lognormal(np.log(median * 100), sigma, size)), 1).astype(np.int64)
+
+
+def zipf_weights(size, exponent=1.1):
+    weights = 1.0 / np.arange(1, size + 1) ** exponent
+    return weights / weights.sum()
+
+
+def generate_people(rng, creators, employees, partners):
+    """Filas de socios, creadoras y empleados."""
+    socios = [(f"Socio {i + 1}", "") for i in range(partners)]
+    socio = lambda: int(rng.integers(1, partners + 1)) if partners and rng.random() < 0.7 else None
+    creadoras = [(f"Creadora {i + 1:05d}", int(rng.choice((0, 0, 20000, 50000, 100000))), int(rng.choice((0, 1000, 1500, 2000, 3000))),
+                  "", int(rng.choice((0, 0, 50000, 200000))), socio()) for i in range(creators)]
+    empleados = [(f"Empleado {i + 1:05d}", str(rng.choice(ROLES)), int(rng.choice((40000, 60000, 80000, 150000))),
+                  int(rng.integers(0, 5000000)), int(rng.choice((0, 500, 1000))), "", socio()) for i in range(employees)]
+    return socios, creadoras, empleados
+
+
+def generate_chunk(rng, size, creators, start_day, span_days):
+    """Tuplas (tipo, categoria, monto, descripcion, fecha, creadora_id) de un bloque de movimientos."""
+    # Densidad creciente: un 30 % uniforme y el resto proporcional al tiempo transcurrido.
+    position = np.where(rng.random(size) < 0.3, rng.random(size), np.sqrt(rng.random(size)))
+    seconds = (start_day + np.minimum((position * span_days).astype(np.int64), span_days - 1)) * 86400 + rng.integers(0, 86400, size)
+    fechas = np.datetime_as_string(seconds.astype("datetime64[s]"))
+
+    income = rng.random(size) < INCOME_SHARE
+    names = np.array([name for name, *_ in EXPENSES] + [name for name, _ in INCOME_CATEGORIES], dtype=object)
+    expense_codes = rng.choice(len(EXPENSES), size, p=[weight for _, weight, *_ in EXPENSES])
+    income_codes = len(EXPENSES) + rng.choice(len(INCOME_CATEGORIES), size, p=[weight for _, weight in INCOME_CATEGORIES])
+    codes = np.where(income, income_codes, expense_codes)
+
+    amounts = np.empty(size, np.int64)
+    amounts[income] = lognormal_cents(rng, INCOME_MEDIAN, INCOME_SIGMA, int(income.sum()))
+    with_creator = income & (rng.random(size) < 0.9)
+    for code, (_, _, median, sigma, linked) in enumerate(EXPENSES):
+        rows = ~income & (codes == code)
+        amounts[rows] = lognormal_cents(rng, median, sigma, int(rows.sum()))
+        if linked: with_creator |= rows
+    creator_ids = rng.choice(creators, size, p=zipf_weights(creators)) + 1 if creators else np.zeros(size, np.int64)
+
+    choices = rng.random(size)
+    descriptions = [DESCRIPTIONS[name][int(choice * len(DESCRIPTIONS[name]))] for name, choice in zip(names[codes], choices)]
+    return list(zip(np.where(income, "ingreso", "egreso").tolist(), names[codes].tolist(), amounts.tolist(), descriptions,
+                    np.char.replace(fechas, "T", " ").tolist(), np.where(with_creator & (creators > 0), creator_ids, None).tolist()))
+
+
+def drop_finanzas_dependents(conn):
+    """Borra los triggers e índices de `finanzas` y devuelve su SQL para recrearlos."""
+    dependents = conn.execute("""SELECT type, name, sql FROM sqlite_master
+                                 WHERE tbl_name = 'finanzas' AND type IN ('trigger', 'index') AND sql IS NOT NULL""").fetchall()
+    for kind, name, _ in dependents:
+        conn.execute(f"DROP {kind.upper()} {name}")
+    return [sql for _, _, sql in dependents]
+
+
+def generate(path, rows, creators=200, employees=50, partners=10, years=3, end_date="2025-12-31", seed=1, progress=None):
+    """Crea (o sobrescribe) la base `path` y devuelve los segundos empleados."""
+    started = time.perf_counter()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix): os.remove(path + suffix)
+    db.init_db(path)
+    rng = np.random.default_rng(seed)
+    socios, creadoras, empleados = generate_people(rng, creators, employees, partners)
+    end_day = int(np.datetime64(end_date, "D").astype(np.int64)) + 1
+    span_days = 365 * years
+    with db.connection(path) as conn:
+        conn.executemany("INSERT INTO socios (nombre, notas) VALUES (?, ?)", socios)
+        conn.executemany("INSERT INTO creadoras (nombre, sueldo_fijo, porcentaje, notas, inversion, socio_id) VALUES (?, ?, ?, ?, ?, ?)", creadoras)
+        conn.executemany("INSERT INTO empleados (nombre, rol, sueldo, ventas, comision, notas, socio_id) VALUES (?, ?, ?, ?, ?, ?, ?)", empleados)
+        # Carga masiva sin triggers ni índices sobre `finanzas`; se rehacen al final.
+        dependents = drop_finanzas_dependents(conn)
+    done = 0
+    while done < rows:
+        size = min(CHUNK, rows - done)
+        batch = generate_chunk(rng, size, creators, end_day - span_days, span_days)
+        with db.connection(path) as conn:
+            conn.executemany(FINANZAS_INSERT, batch)
+        done += size
+        if progress: progress(done)
+    with db.connection(path) as conn:
+        for statement in dependents + list(db.ROLLUP_REBUILD + db.SEARCH_REBUILD):
+            conn.execute(statement)
+        db.bump_table_versions(conn, *db.VERSIONED_TABLES)
+        conn.execute("ANALYZE")
+    db.get_pool(path).close()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="base de datos a crear (se sobrescribe)")
+    parser.add_argument("--rows", type=int, default=100_000, help="movimientos de `finanzas`")
+    parser.add_argument("--creators", type=int, default=200)
+    parser.add_argument("--employees", type=int, default=50)
+    parser.add_argument("--partners", type=int, default=10)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--end-date", default="2025-12-31", help="último día del periodo (YYYY-MM-DD)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    report = lambda done: print(f"\r{done:,}/{args.rows:,} movimientos", end="", file=sys.stderr, flush=True)
+    seconds = generate(args.path, args.rows, args.creators, args.employees, args.partners, args.years, args.end_date, args.seed, progress=report)
+    print(f"\n{args.path}: {args.rows:,} movimientos en {seconds:.1f} s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Benchmark de regresión del arranque de la aplicación de escritorio.
+
+Mide dos cosas en procesos nuevos (arranque en frío del intérprete):
+
+* `python -X importtime -c "import app"`: tiempo total de importar app.py y
+  los módulos más caros. Falla si se cargan módulos que deben importarse al
+  usarlos (matplotlib, numpy...).
+* Tiempo hasta el primer frame: desde que se lanza el proceso hasta que
+  `app.main(on_first_frame=...)` avisa de que la ventana y la barra lateral
+  están pintadas. Necesita un display; sin él se omite.
+
+Termina con código 1 si algún tiempo supera su presupuesto.
+
+    python benchmarks/startup.py --runs 5 --max-import-ms 400 --max-first-frame-ms 1500
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que app.py solo debe cargar al abrir el dashboard, exportar o importar.
+LAZY_MODULES = ("matplotlib", "numpy", "charts", "export", "importer")
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+FIRST_FRAME_SCRIPT = """
+import time
+import app
+def first_frame(window):
+    print(time.time(), flush=True)
+    window.quit()
+app.main(on_first_frame=first_frame)
+"""
+
+
+def run_python(args, env):
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True)
+
+
+def measure_imports(env):
+    """(ms de `import app`, {módulo: ms acumulados} de sus importaciones directas, módulos perezosos cargados)."""
+    result = run_python(["-X", "importtime", "-c", "import app"], env)
+    if result.returncode != 0: raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    total = 0.0; direct = {}; loaded = set()
+    for match in IMPORTTIME_LINE.finditer(result.stderr):
+        cumulative, indent, name = int(match.group(2)) / 1000, len(match.group(3)), match.group(4)
+        loaded.add(name.split(".")[0])
+        if indent == 1 and name == "app": total = cumulative
+        elif indent == 3: direct[name] = cumulative
+    return total, direct, sorted(loaded.intersection(LAZY_MODULES))
+
+
+def measure_first_frame(env):
+    started = time.time()
+    result = run_python(["-c", FIRST_FRAME_SCRIPT], env)
+    if result.returncode != 0: return None
+    return (float(result.stdout.split()[0]) - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=400)
+    parser.add_argument("--max-first-frame-ms", type=float, default=1500)
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, FINANZAS_DB=os.path.join(tmp, "startup.db"))
+        run_python(["-c", "import app"], env)  # calienta los .pyc y la caché de disco
+
+        samples = [measure_imports(env) for _ in range(args.runs)]
+        import_ms = statistics.median(total for total, _, _ in samples)
+        print(f"import app: {import_ms:8.1f} ms (mediana de {args.runs})")
+        for name, ms in sorted(samples[-1][1].items(), key=lambda item: -item[1])[:8]:
+            print(f"  {name:<20} {ms:8.1f} ms")
+        eager = samples[-1][2]
+        if eager: failures.append(f"módulos que deberían importarse al usarlos: {', '.join(eager)}")
+        if import_ms > args.max_import_ms: failures.append(f"import app tarda {import_ms:.1f} ms (máximo {args.max_import_ms:.0f})")
+
+        frames = [measure_first_frame(env) for _ in range(args.runs)]
+        if None in frames:
+            print("primer frame: omitido (sin display)")
+        else:
+            frame_ms = statistics.median(frames)
+            print(f"primer frame: {frame_ms:8.1f} ms (mediana de {args.runs})")
+            if frame_ms > args.max_first_frame_ms: failures.append(f"el primer frame tarda {frame_ms:.1f} ms (máximo {args.max_first_frame_ms:.0f})")
+
+    for failure in failures:
+        print(f"REGRESIÓN: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
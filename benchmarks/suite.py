@@ -0,0 +1,209 @@
+"""
+Suite de benchmarks de consultas, pantallas y rutas a varias escalas.
+
+Para cada escala genera (o reutiliza) un libro sintético con generate.py y
+mide, con la caché de consultas desactivada, la latencia (mediana, mínimo y
+máximo de `--repeat` ejecuciones tras un calentamiento) y el pico de memoria
+Python (tracemalloc, en una ejecución aparte) de cada caso: funciones de
+queries.py, las consultas paginadas de las pantallas de gestión, analytics.py
+y las rutas de server.py a través del cliente de pruebas de Flask. La memoria
+de SQLite (caché de páginas, acotada por `cache_size`) no entra en el pico.
+
+El resultado se guarda en JSON (por defecto benchmarks/results/<commit>.json)
+para comparar commits; con `--compare` se compara con un resultado anterior y
+se termina con código 1 si algún caso empeora más de `--threshold`.
+
+    python benchmarks/suite.py --scales 10000 100000 1000000
+    python benchmarks/suite.py --compare benchmarks/results/abc1234.json
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import db
+import query_cache
+import queries
+from generate import generate
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+DATA_DIR = os.path.join(ROOT, "benchmarks", "data")
+# Una diferencia menor que esta no cuenta como regresión, sea cual sea el porcentaje.
+MIN_REGRESSION_MS = 1.0
+
+
+def query_cases(end_date):
+    """(nombre, función) de queries.py y de las pantallas de gestión."""
+    year = end_date[:4]
+    return (
+        ("queries.get_expense_breakdown", queries.get_expense_breakdown),
+        ("queries.get_monthly_financial_trend", queries.get_monthly_financial_trend),
+        ("queries.get_monthly_financial_trend (trimestre)", lambda: queries.get_monthly_financial_trend(f"{year}-02-15", f"{year}-05-10")),
+        ("queries.get_partner_expenses", queries.get_partner_expenses),
+        ("queries.get_dashboard_snapshot", queries.get_dashboard_snapshot),
+        ("queries.get_expense_by_category", queries.get_expense_by_category),
+        ("queries.get_top_creators_by_revenue", queries.get_top_creators_by_revenue),
+        ("queries.get_top_creators_by_profitability", queries.get_top_creators_by_profitability),
+        ("queries.get_distinct_months", queries.get_distinct_months),
+        ("queries.get_financial_data_by_date (mes)", lambda: queries.get_financial_data_by_date(f"{year}-06-01", f"{year}-06-30")),
+        ("mostrar_creadoras (primera página)", queries.get_creadoras_view_page),
+        ("mostrar_creadoras (página intermedia)", lambda: queries.get_creadoras_view_page(("Creadora 00100", 100))),
+        ("mostrar_empleados (primera página)", queries.get_empleados_view_page),
+        ("mostrar_finanzas (primera página)", queries.get_finanzas_view_page),
+        ("mostrar_finanzas (página intermedia)", lambda: queries.get_finanzas_view_page((f"{year}-06-15 12:00:00", 0))),
+        ("mostrar_finanzas (por monto)", lambda: queries.get_finanzas_view_page(sort="monto", descending=True)),
+        ("mostrar_finanzas (por monto, egresos de un mes)", lambda: queries.get_finanzas_view_page(sort="monto", descending=True, filters={"tipo": "egreso", "fecha": f"{year}-06"})),
+        ("mostrar_finanzas (por categoría)", lambda: queries.get_finanzas_view_page(sort="categoria")),
+        ("mostrar_finanzas (filtro por creadora)", lambda: queries.get_finanzas_view_page(filters={"creadora": "00150"})),
+        ("mostrar_creadoras (por ingresos)", lambda: queries.get_creadoras_view_page(sort="ingresos", descending=True)),
+        ("queries.search_finanzas (palabra frecuente)", lambda: queries.search_finanzas("onlyfans")),
+        ("queries.search_finanzas (palabra rara)", lambda: queries.search_finanzas("vestuario")),
+        ("queries.search_notes", lambda: queries.search_notes("creadora")),
+    )
+
+
+def analytics_cases(path):
+    import analytics
+    ledger = analytics.LedgerArrays(path); ledger.refresh()
+    return (
+        ("analytics.LedgerArrays.refresh (carga)", lambda: analytics.LedgerArrays(path).refresh()),
+        ("analytics.monthly_trend", ledger.monthly_trend),
+        ("analytics.creator_profitability", ledger.creator_profitability),
+    )
+
+
+def route_cases(path, end_date):
+    import server
+    client = server.create_app(path).test_client()
+    month = end_date[:7]
+
+    def get(url):
+        def request():
+            response = client.get(url)
+            if response.status_code != 200: raise RuntimeError(f"{url}: HTTP {response.status_code}")
+            response.get_data()  # consume también las respuestas en streaming
+        return request
+    urls = ("/api/dashboard", "/api/trend", f"/api/trend?desde={end_date[:4]}-01&hasta={month}", "/api/months",
+            "/api/top-creators?by=revenue", "/api/top-creators?by=profitability", "/api/expenses/categories",
+            "/api/partner-expenses", "/api/finanzas?limit=100", "/api/finanzas?limit=100&tipo=ingreso&creadora=1",
+            f"/api/finanzas/export?desde={month}&formato=csv")
+    return tuple((f"GET {url}", get(url)) for url in urls)
+
+
+def measure(func, repeat):
+    """(tiempos en ms, pico de memoria en KiB). La ejecución con tracemalloc sirve de calentamiento."""
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - started) * 1000)
+    return times, peak / 1024
+
+
+def database_for(rows, args):
+    path = os.path.join(args.data_dir, f"ledger_{rows}_c{args.creators}_s{args.seed}.db")
+    if args.regenerate or not os.path.exists(path):
+        os.makedirs(args.data_dir, exist_ok=True)
+        print(f"Generando {rows:,} movimientos en {path}...", file=sys.stderr)
+        generate(path, rows, creators=args.creators, employees=args.employees, partners=args.partners, end_date=args.end_date, seed=args.seed)
+    return path
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(args):
+    results = []
+    for rows in args.scales:
+        path = database_for(rows, args)
+        db.DB_PATH = path
+        db.init_db(path)
+        cases = query_cases(args.end_date) + analytics_cases(path) + route_cases(path, args.end_date)
+        for name, func in cases:
+            if args.only and not any(pattern in name for pattern in args.only): continue
+            times, peak_kib = measure(func, args.repeat)
+            results.append({"caso": name, "filas": rows, "mediana_ms": round(statistics.median(times), 3),
+                            "min_ms": round(min(times), 3), "max_ms": round(max(times), 3), "pico_kib": round(peak_kib, 1)})
+            print(f"{rows:>10,}  {name:<55} {statistics.median(times):10.2f} ms  {peak_kib:10.1f} KiB")
+        db.close_all()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Imprime la comparación con `baseline` y devuelve los casos que empeoraron."""
+    previous = {(item["caso"], item["filas"]): item for item in baseline["resultados"]}
+    regressions = []
+    print(f"\nComparación con {baseline.get('commit') or 'la referencia'} (umbral {threshold:.0%}):")
+    for item in results:
+        old = previous.get((item["caso"], item["filas"]))
+        if old is None: continue
+        ratio = item["mediana_ms"] / old["mediana_ms"] if old["mediana_ms"] else float("inf")
+        worse = ratio > 1 + threshold and item["mediana_ms"] - old["mediana_ms"] > MIN_REGRESSION_MS
+        if worse: regressions.append(item)
+        print(f"{'REGRESIÓN' if worse else '':<10}{item['filas']:>10,}  {item['caso']:<55} {old['mediana_ms']:10.2f} -> {item['mediana_ms']:10.2f} ms ({ratio:6.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[10_000, 100_000, 1_000_000], help="movimientos de cada base (hasta 10M)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="solo los casos cuyo nombre contenga alguno de estos textos")
+    parser.add_argument("--creators", type=int, default=200)
+    parser.add_argument("--employees", type=int, default=50)
+    parser.add_argument("--partners", type=int, default=10)
+    parser.add_argument("--end-date", default="2025-12-31")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--data-dir", default=DATA_DIR, help="dónde se guardan (y reutilizan) las bases generadas")
+    parser.add_argument("--regenerate", action="store_true", help="vuelve a generar las bases aunque existan")
+    parser.add_argument("--output", help="JSON de resultados (por defecto benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="JSON de un resultado anterior con el que comparar")
+    parser.add_argument("--threshold", type=float, default=0.25, help="empeoramiento relativo que cuenta como regresión")
+    args = parser.parse_args()
+
+    query_cache.ENABLED = False
+    results = run_suite(args)
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "entorno": {"python": platform.python_version(), "sqlite": sqlite3.sqlite_version, "plataforma": platform.platform(), "procesador": platform.processor()},
+        "parametros": {"repeat": args.repeat, "creators": args.creators, "employees": args.employees, "partners": args.partners,
+                       "end_date": args.end_date, "seed": args.seed, "cache_consultas": False},
+        "resultados": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados en {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions: return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+Feed de cambios del libro para los dashboards web.
+
+Los triggers de db.py (`CHANGE_FEED_SCHEMA`) dejan en la tabla `cambios` una fila
+compacta por cada fila insertada, modificada o borrada en `finanzas`, `creadoras`
+y `empleados`, venga de los formularios de escritorio, la CLI, el importador o el
+servidor. Esa tabla hace de cola de mensajes local: cada worker de Gunicorn la
+sondea por su cuenta (solo la relee cuando `PRAGMA data_version` avisa de un
+commit) y reparte lo nuevo entre sus propios clientes Socket.IO, sin Redis ni
+mensajes entre workers.
+
+Cada evento lleva la fila antes y después del cambio, con los importes en
+unidades, para que el cliente reste lo viejo y sume lo nuevo en sus KPIs.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import db
+from db import connection
+from money import to_units
+
+POLL_INTERVAL = 0.5
+PRUNE_INTERVAL = 600
+# Por encima de esto (una importación masiva, por ejemplo) no se mandan los eventos
+# uno a uno: se pide a los clientes que recarguen.
+MAX_EVENTS = 500
+
+# Campos en centavos o puntos básicos; ambos pasan a unidades dividiendo entre 100.
+UNIT_FIELDS = {"monto", "sueldo_fijo", "porcentaje", "inversion", "sueldo", "ventas", "comision"}
+
+EVENTS_QUERY = "SELECT id, tabla, operacion, fila_id, antes, despues FROM cambios WHERE id > ? ORDER BY id LIMIT ?"
+
+
+def decode_row(text):
+    if text is None: return None
+    row = json.loads(text)
+    for field in UNIT_FIELDS.intersection(row):
+        row[field] = to_units(row[field])
+    return row
+
+
+def to_event(row):
+    change_id, tabla, operacion, fila_id, antes, despues = row
+    return {"id": change_id, "tabla": tabla, "op": operacion, "fila": fila_id, "antes": decode_row(antes), "despues": decode_row(despues)}
+
+
+def latest_change_id(conn):
+    """Id del último cambio registrado, aunque ya se haya purgado."""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'cambios'").fetchone()
+    return row[0] if row else 0
+
+
+def changes_since(after_id, limit=MAX_EVENTS, db_path=None):
+    """
+    (eventos, último id, completo) con los cambios posteriores a `after_id`.
+    `completo` es False si hay más de `limit` o si algunos ya se purgaron: el
+    cliente debe recargar sus datos y seguir desde el último id.
+    """
+    with connection(db_path) as conn:
+        latest = latest_change_id(conn)
+        if after_id >= latest: return [], latest, True
+        rows = conn.execute(EVENTS_QUERY, (after_id, limit + 1)).fetchall()
+    # Los ids son consecutivos: si el primero no es after_id + 1, el hueco se purgó.
+    complete = len(rows) <= limit and bool(rows) and rows[0][0] == after_id + 1
+    if not complete: return [], latest, False
+    return [to_event(row) for row in rows], rows[-1][0], True
+
+
+class ChangeFeed:
+    """Sigue la tabla `cambios` desde el último id visto por este proceso."""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self.last_id = None
+        self._watch = None
+        self._data_version = None
+
+    def _committed(self):
+        # data_version solo cambia cuando otra conexión hace commit: sondear cuesta una lectura de PRAGMA.
+        if self._watch is None:
+            self._watch = sqlite3.connect(self.db_path or db.DB_PATH, check_same_thread=False)
+        data_version = self._watch.execute("PRAGMA data_version").fetchone()[0]
+        changed = data_version != self._data_version
+        self._data_version = data_version
+        return changed
+
+    def poll(self):
+        """
+        Devuelve (eventos, tablas a recargar). La primera llamada solo fija el
+        punto de partida; después, cada cambio se entrega una sola vez.
+        """
+        if not self._committed(): return [], ()
+        if self.last_id is None:
+            with connection(self.db_path) as conn:
+                self.last_id = latest_change_id(conn)
+            return [], ()
+        events, last_id, complete = changes_since(self.last_id, db_path=self.db_path)
+        if complete:
+            self.last_id = last_id
+            return events, ()
+        with connection(self.db_path) as conn:
+            tables = [row[0] for row in conn.execute("SELECT DISTINCT tabla FROM cambios WHERE id > ? AND id <= ?", (self.last_id, last_id))]
+        self.last_id = last_id
+        return [], tuple(tables or db.CHANGE_FEED_COLUMNS)
+
+    def close(self):
+        if self._watch is not None: self._watch.close()
+        self._watch = None; self._data_version = None
+
+
+_started = False
+_started_lock = threading.Lock()
+
+
+def start(socketio, db_path=None, interval=POLL_INTERVAL):
+    """
+    Arranca (una vez por proceso) la tarea que emite los cambios nuevos a las
+    salas de Socket.IO de cada tabla: 'cambios' con la lista de eventos, o
+    'recargar' si hubo demasiados para mandarlos sueltos.
+    """
+    global _started
+    with _started_lock:
+        if _started: return
+        _started = True
+
+    def run():
+        feed = ChangeFeed(db_path)
+        next_prune = time.monotonic() + PRUNE_INTERVAL
+        while True:
+            try:
+                if time.monotonic() >= next_prune:
+                    db.prune_changes(db_path=db_path); next_prune = time.monotonic() + PRUNE_INTERVAL
+                events, reload_tables = feed.poll()
+                by_table = {}
+                for event in events: by_table.setdefault(event["tabla"], []).append(event)
+                for tabla, table_events in by_table.items():
+                    socketio.emit("cambios", table_events, to=tabla)
+                for tabla in reload_tables:
+                    socketio.emit("recargar", {"tabla": tabla, "cambio": feed.last_id}, to=tabla)
+            except sqlite3.Error:
+                # Base bloqueada o en migración: se reintenta en la próxima vuelta.
+                feed.close()
+            socketio.sleep(interval)
+
+    socketio.start_background_task(run)
+
+
+def _forget_feed_after_fork():
+    # El hilo del padre no existe en el hijo: cada worker arranca el suyo.
+    global _started, _started_lock
+    _started = False
+    _started_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_feed_after_fork)
@@ -0,0 +1,138 @@
+"""
+Gráficos persistentes del dashboard.
+
+Cada gráfico ocupa un slot con su propia `Figure` y canvas, creados una sola vez.
+No se usa pyplot, así que las figuras no quedan registradas en su estado global:
+al refrescar se actualizan los artistas existentes, si la serie no cambió no se
+redibuja nada, y `close()` libera la figura explícitamente.
+"""
+from abc import ABC, abstractmethod
+
+import customtkinter as ctk
+import numpy as np
+from matplotlib import cm
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+
+def format_currency_tick(x, pos):
+    return f'${x/1000:.1f}K' if x >= 1000 else f'${x:.0f}'
+
+
+class ChartSlot(ABC):
+    """Base de los slots: cada subclase dibuja la serie en `draw`."""
+    def __init__(self, parent, figsize, facecolor, text_color, empty_text="No hay datos para mostrar.", padx=10, pady=5):
+        self.parent = parent
+        self.facecolor = facecolor; self.text_color = text_color
+        self.pack_options = {'fill': "both", 'expand': True, 'padx': padx, 'pady': pady}
+        self.figure = Figure(figsize=figsize, dpi=100)
+        self.figure.patch.set_facecolor(facecolor)
+        self.ax = self.figure.add_subplot()
+        self.canvas = FigureCanvasTkAgg(self.figure, master=parent)
+        self.widget = self.canvas.get_tk_widget()
+        self.empty_label = ctk.CTkLabel(parent, text=empty_text, font=("Arial", 16))
+        self.series_hash = None
+        self.draws = 0; self.skips = 0
+
+    def update(self, labels, values):
+        """Redibuja solo si la serie cambió. Devuelve True si hubo que redibujar."""
+        labels = tuple(labels); values = tuple(values)
+        series_hash = hash((labels, values))
+        if series_hash == self.series_hash:
+            self.skips += 1
+            return False
+        self.series_hash = series_hash
+        self.draws += 1
+        if not values:
+            self.widget.pack_forget()
+            self.empty_label.pack(expand=True, pady=20)
+            return True
+        self.empty_label.pack_forget()
+        self.draw(labels, values)
+        self.canvas.draw_idle()
+        if not self.widget.winfo_manager(): self.widget.pack(**self.pack_options)
+        return True
+
+    @abstractmethod
+    def draw(self, labels, values):
+        """Dibuja una serie no vacía en `self.ax`."""
+
+    def close(self):
+        self.figure.clear()
+        self.widget.destroy()
+        self.series_hash = None
+
+
+class BarChartSlot(ChartSlot):
+    """Barras horizontales; si el número de barras no cambia se modifican en sitio."""
+    def __init__(self, parent, color, facecolor, text_color, bar_height=0.6):
+        super().__init__(parent, (5, 3), facecolor, text_color)
+        self.color = color; self.bar_height = bar_height
+        self.bars = []; self.value_texts = []
+
+    def draw(self, labels, values):
+        # Mismo orden que antes: el primer elemento queda arriba.
+        labels = labels[::-1]; values = values[::-1]
+        if len(values) == len(self.bars):
+            for bar, text, value in zip(self.bars, self.value_texts, values):
+                bar.set_width(value)
+                text.set_text(f' ${value:,.2f}')
+            self.ax.set_yticklabels(labels)
+            self.ax.relim(); self.ax.autoscale_view()
+        else:
+            self.rebuild(labels, values)
+        offset = max(values) * 0.02
+        for bar, text in zip(self.bars, self.value_texts):
+            text.set_position((bar.get_width() + offset, bar.get_y() + bar.get_height()/2))
+        self.figure.tight_layout(pad=2)
+
+    def rebuild(self, labels, values):
+        ax = self.ax; ax.clear()
+        ax.set_facecolor(self.facecolor)
+        positions = range(len(values))
+        self.bars = list(ax.barh(positions, values, color=self.color, height=self.bar_height))
+        ax.set_yticks(positions); ax.set_yticklabels(labels)
+        ax.tick_params(axis='x', colors=self.text_color); ax.tick_params(axis='y', colors=self.text_color, labelsize=12)
+        ax.spines['top'].set_visible(False); ax.spines['right'].set_visible(False)
+        ax.spines['left'].set_color(self.facecolor); ax.spines['bottom'].set_color(self.text_color)
+        ax.xaxis.set_major_formatter(FuncFormatter(format_currency_tick))
+        self.value_texts = [ax.text(0, 0, f' ${value:,.2f}', va='center', color=self.text_color, fontsize=11) for value in values]
+        # Altura dinámica según el número de barras
+        height = len(values) * 0.6
+        self.figure.set_size_inches(5, height)
+        self.widget.configure(height=int(height * self.figure.dpi))
+
+
+class PieChartSlot(ChartSlot):
+    """Dona de gastos; los sectores se regeneran sobre la misma figura."""
+    def __init__(self, parent, facecolor, text_color):
+        super().__init__(parent, (5, 5), facecolor, text_color, empty_text="No hay datos de gastos.", padx=5)
+
+    def draw(self, labels, values):
+        ax = self.ax; ax.clear()
+        wedge_properties = {'width': 0.4, 'edgecolor': self.facecolor, 'linewidth': 2}
+        colors = cm.viridis(np.linspace(0, 1, len(labels)))
+        wedges, texts, autotexts = ax.pie(values, labels=labels, autopct='%1.1f%%', startangle=140, pctdistance=0.8, colors=colors, wedgeprops=wedge_properties, textprops={'color': self.text_color, 'fontsize': 12})
+        for autotext in autotexts: autotext.set_color("white"); autotext.set_fontweight('bold')
+
+
+class ChartManager:
+    """Agrupa los slots de una vista para actualizarlos y liberarlos juntos."""
+    def __init__(self):
+        self.slots = {}
+
+    def add(self, name, slot):
+        self.slots[name] = slot
+        return slot
+
+    def update(self, name, data):
+        """`data` es una lista de pares (etiqueta, valor), como la devuelven las consultas."""
+        return self.slots[name].update([row[0] for row in data], [row[1] for row in data])
+
+    def stats(self):
+        return {name: {'draws': slot.draws, 'skips': slot.skips} for name, slot in self.slots.items()}
+
+    def close(self):
+        for slot in self.slots.values(): slot.close()
+        self.slots.clear()
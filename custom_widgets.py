@@ -1,4 +1,6 @@
+import tkinter as tk
 import customtkinter as ctk
+from tkinter import messagebox
 from PIL import Image
 
 class CollapsibleMenu(ctk.CTkFrame):
@@ -52,14 +54,26 @@ class CollapsibleMenu(ctk.CTkFrame):
             self.sub_menu_frame.pack(fill="x", after=self.header_button)
             self.is_open = True
 
+_NOT_LOADED = object()
+
 class CollapsibleFrame(ctk.CTkFrame):
     """
     Un frame colapsable que contiene un header para hacer clic
     y un frame de contenido que se muestra/oculta.
+
+    Si se pasa `content_factory(content_frame)`, el contenido no se construye
+    hasta la primera vez que se abre. La fábrica puede devolver una función
+    que carga los datos; se llama al abrir y, después, solo cuando
+    `data_version()` devuelve una versión distinta de la ya cargada.
     """
-    def __init__(self, master, title, **kwargs):
+    def __init__(self, master, title, content_factory=None, data_version=None, **kwargs):
         super().__init__(master, fg_color="transparent", **kwargs)
         self.is_open = False
+        self.content_factory = content_factory
+        self.data_version = data_version
+        self.content_built = False
+        self.content_loader = None
+        self.loaded_version = _NOT_LOADED
         
         # --- Cabecera ---
         self.header = ctk.CTkFrame(self, fg_color="#333333", corner_radius=6, height=30)
@@ -87,4 +101,174 @@ class CollapsibleFrame(ctk.CTkFrame):
         else:
             self.content_frame.pack(fill="both", expand=True, pady=(5,0))
             self.arrow_label.configure(text="▲")
-            self.is_open = True
\ No newline at end of file
+            self.is_open = True
+            self.load_content()
+
+    def load_content(self):
+        if self.content_factory is None: return
+        if not self.content_built:
+            self.content_loader = self.content_factory(self.content_frame)
+            self.content_built = True
+        version = self.data_version() if self.data_version else None
+        if self.content_loader is not None and version != self.loaded_version:
+            self.loaded_version = version
+            self.content_loader()
+
+    def refresh_content(self):
+        """Recarga el contenido si está abierto y sus datos cambiaron; si está cerrado espera a la próxima apertura."""
+        if self.is_open: self.load_content()
+
+class PagedTreeview:
+    """
+    Carga las filas de un ttk.Treeview por páginas con paginación keyset.
+
+    `fetch_page(cursor, direction, limit)` devuelve las filas en orden de
+    visualización que van después (direction="next") o antes ("prev") de la
+    clave `cursor`; con cursor None devuelve la primera página. `key_of(row)`
+    extrae la clave keyset de una fila y `format_row(row)` devuelve
+    (values, tags) para insertarla. Solo se mantienen en el widget
+    `max_pages` páginas: al hacer scroll hacia un extremo se pide la página
+    siguiente y se descarta la del extremo opuesto.
+
+    Si se pasa `run(func, on_done)`, las páginas se piden con él (p. ej. en un
+    hilo de fondo) y mientras llegan se muestra una fila "Cargando...".
+    """
+    def __init__(self, tree, fetch_page, key_of, format_row, page_size=200, max_pages=3, threshold=0.1, run=None):
+        self.tree = tree
+        self.fetch_page = fetch_page
+        self.key_of = key_of
+        self.format_row = format_row
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.threshold = threshold
+        self.run = run
+        self.pages = []
+        self.at_start = True
+        self.at_end = False
+        self._loading = False
+        self._placeholder = None
+        self.tree.configure(yscrollcommand=self._on_scroll)
+
+    def reload(self):
+        self.tree.delete(*self.tree.get_children())
+        self.pages = []
+        self.at_start = True
+        self.at_end = False
+        self._loading = False
+        self._placeholder = None
+        self._load("next")
+        self.tree.yview_moveto(0)
+
+    def _on_scroll(self, first, last):
+        if self._loading: return
+        if float(last) >= 1 - self.threshold and not self.at_end:
+            self.tree.after_idle(self._load, "next")
+        elif float(first) <= self.threshold and not self.at_start:
+            self.tree.after_idle(self._load, "prev")
+
+    def _load(self, direction):
+        if self._loading or (direction == "next" and self.at_end) or (direction == "prev" and self.at_start): return
+        self._loading = True
+        if not self.pages: cursor = None
+        elif direction == "next": cursor = self.pages[-1]["last"]
+        else: cursor = self.pages[0]["first"]
+        if self.run is None:
+            try: self._apply(direction, self.fetch_page(cursor, direction, self.page_size))
+            finally: self._loading = False
+            return
+        columns = self.tree["columns"]
+        placeholder = ["Cargando..."] + [""] * (len(columns) - 1)
+        self._placeholder = self.tree.insert("", tk.END if direction == "next" else 0, values=placeholder)
+        pages = self.pages
+        def on_done(rows):
+            if pages is not self.pages or not self.tree.winfo_exists(): return
+            try: self._apply(direction, rows)
+            finally: self._loading = False
+        self.run(lambda: self.fetch_page(cursor, direction, self.page_size), on_done)
+
+    def _apply(self, direction, rows):
+        if self._placeholder is not None:
+            self.tree.delete(self._placeholder); self._placeholder = None
+        if len(rows) < self.page_size:
+            if direction == "next": self.at_end = True
+            else: self.at_start = True
+        if not rows: return
+        total_before = len(self.tree.get_children())
+        top = round(self.tree.yview()[0] * total_before)
+        index = tk.END if direction == "next" else 0
+        items = []
+        for row in (rows if direction == "next" else reversed(rows)):
+            values, tags = self.format_row(row)
+            items.append(self.tree.insert("", index, values=values, tags=tags))
+        page = {"items": items if direction == "next" else items[::-1], "first": self.key_of(rows[0]), "last": self.key_of(rows[-1])}
+        if direction == "next":
+            self.pages.append(page)
+            if len(self.pages) > self.max_pages:
+                dropped = self.pages.pop(0); self.tree.delete(*dropped["items"])
+                self.at_start = False; top -= len(dropped["items"])
+        else:
+            self.pages.insert(0, page); top += len(items)
+            if len(self.pages) > self.max_pages:
+                dropped = self.pages.pop(); self.tree.delete(*dropped["items"])
+                self.at_end = False
+        total = len(self.tree.get_children())
+        if total_before and total: self.tree.yview_moveto(max(top, 0) / total)
+
+class SortableHeadings:
+    """
+    Ordena y filtra un ttk.Treeview desde sus encabezados sin tocar sus filas:
+    quien lo usa pasa `query()` (sort, descending, filters) a su consulta SQL y
+    recarga en `on_change()`.
+
+    `fields` mapea cada encabezado a su campo; `sortable` son los campos que se
+    pueden ordenar y `filter_hints` ({campo: ayuda}) los que se pueden filtrar.
+    Un clic en el encabezado ordena por él y otro invierte el sentido; el clic
+    derecho pide un filtro (vacío lo quita). `validate(field, text)` lanza
+    ValueError si el filtro no es válido.
+    """
+    def __init__(self, tree, fields, sortable, filter_hints, default_sort, on_change, validate=None):
+        self.tree = tree
+        self.fields = fields
+        self.filter_hints = filter_hints
+        self.sort, self.descending = default_sort
+        self.filters = {}
+        self.on_change = on_change
+        self.validate = validate
+        for heading, field in fields.items():
+            if field in sortable: tree.heading(heading, command=lambda field=field: self.toggle_sort(field))
+        for button in ("<Button-3>", "<Button-2>"): tree.bind(button, self._on_right_click, add="+")
+        self._update_headings()
+
+    def query(self):
+        return {"sort": self.sort, "descending": self.descending, "filters": dict(self.filters)}
+
+    def toggle_sort(self, field):
+        self.descending = not self.descending if field == self.sort else False
+        self.sort = field
+        self._update_headings(); self.on_change()
+
+    def set_filter(self, field, text):
+        text = (text or "").strip()
+        if text:
+            if self.validate: self.validate(field, text)
+            self.filters[field] = text
+        else: self.filters.pop(field, None)
+        self._update_headings(); self.on_change()
+
+    def _on_right_click(self, event):
+        if self.tree.identify_region(event.x, event.y) != "heading": return
+        heading = self.tree["columns"][int(self.tree.identify_column(event.x)[1:]) - 1]
+        field = self.fields.get(heading)
+        if field not in self.filter_hints: return
+        current = self.filters.get(field)
+        prompt = self.filter_hints[field] + (f"\nActual: {current} (vacío para quitarlo)" if current else "")
+        text = ctk.CTkInputDialog(title=f"Filtrar {heading}", text=prompt).get_input()
+        if text is None: return
+        try: self.set_filter(field, text)
+        except ValueError as e: messagebox.showerror("Filtro no válido", str(e), parent=self.tree)
+
+    def _update_headings(self):
+        for heading, field in self.fields.items():
+            text = heading + ((" ▼" if self.descending else " ▲") if field == self.sort else "")
+            if field in self.filters: text += f" [{self.filters[field]}]"
+            self.tree.heading(heading, text=text)
@@ -0,0 +1,687 @@
+"""
+Capa de acceso a datos compartida por la app de escritorio y el servidor Flask.
+
+Mantiene un pool acotado de conexiones SQLite por base de datos. Cada conexión
+se abre una sola vez con WAL y PRAGMAs ajustados, y conserva su propia caché de
+sentencias preparadas, así que abrir una pantalla o atender una petición ya no
+paga el coste de conectar en cada consulta.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+DB_PATH = os.environ.get("FINANZAS_DB", "db_ofmkevin.db")
+
+POOL_SIZE = 8
+POOL_TIMEOUT = 10.0
+STATEMENT_CACHE_SIZE = 256
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA foreign_keys=ON",
+)
+
+# Resumen mensual de `finanzas` por (mes, tipo, categoría, creadora). Las claves
+# NULL se guardan como '' / 0 para que formen parte de la clave primaria.
+ROLLUP_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS finanzas_mensual (
+        mes TEXT NOT NULL, tipo TEXT NOT NULL, categoria TEXT NOT NULL DEFAULT '', creadora_id INTEGER NOT NULL DEFAULT 0,
+        total INTEGER NOT NULL DEFAULT 0, cantidad INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (mes, tipo, categoria, creadora_id)) WITHOUT ROWID""",
+    """CREATE TRIGGER IF NOT EXISTS trg_finanzas_mensual_insert AFTER INSERT ON finanzas BEGIN
+        INSERT INTO finanzas_mensual (mes, tipo, categoria, creadora_id, total, cantidad)
+        VALUES (IFNULL(substr(NEW.fecha, 1, 7), ''), NEW.tipo, IFNULL(NEW.categoria, ''), IFNULL(NEW.creadora_id, 0), IFNULL(NEW.monto, 0), 1)
+        ON CONFLICT (mes, tipo, categoria, creadora_id) DO UPDATE SET total = total + excluded.total, cantidad = cantidad + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_finanzas_mensual_delete AFTER DELETE ON finanzas BEGIN
+        UPDATE finanzas_mensual SET total = total - IFNULL(OLD.monto, 0), cantidad = cantidad - 1
+        WHERE mes = IFNULL(substr(OLD.fecha, 1, 7), '') AND tipo = OLD.tipo AND categoria = IFNULL(OLD.categoria, '') AND creadora_id = IFNULL(OLD.creadora_id, 0);
+        DELETE FROM finanzas_mensual
+        WHERE mes = IFNULL(substr(OLD.fecha, 1, 7), '') AND tipo = OLD.tipo AND categoria = IFNULL(OLD.categoria, '') AND creadora_id = IFNULL(OLD.creadora_id, 0) AND cantidad <= 0;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_finanzas_mensual_update AFTER UPDATE OF tipo, categoria, monto, fecha, creadora_id ON finanzas BEGIN
+        UPDATE finanzas_mensual SET total = total - IFNULL(OLD.monto, 0), cantidad = cantidad - 1
+        WHERE mes = IFNULL(substr(OLD.fecha, 1, 7), '') AND tipo = OLD.tipo AND categoria = IFNULL(OLD.categoria, '') AND creadora_id = IFNULL(OLD.creadora_id, 0);
+        DELETE FROM finanzas_mensual
+        WHERE mes = IFNULL(substr(OLD.fecha, 1, 7), '') AND tipo = OLD.tipo AND categoria = IFNULL(OLD.categoria, '') AND creadora_id = IFNULL(OLD.creadora_id, 0) AND cantidad <= 0;
+        INSERT INTO finanzas_mensual (mes, tipo, categoria, creadora_id, total, cantidad)
+        VALUES (IFNULL(substr(NEW.fecha, 1, 7), ''), NEW.tipo, IFNULL(NEW.categoria, ''), IFNULL(NEW.creadora_id, 0), IFNULL(NEW.monto, 0), 1)
+        ON CONFLICT (mes, tipo, categoria, creadora_id) DO UPDATE SET total = total + excluded.total, cantidad = cantidad + 1;
+    END""",
+)
+
+ROLLUP_REBUILD = (
+    "DELETE FROM finanzas_mensual",
+    """INSERT INTO finanzas_mensual (mes, tipo, categoria, creadora_id, total, cantidad)
+       SELECT IFNULL(substr(fecha, 1, 7), ''), tipo, IFNULL(categoria, ''), IFNULL(creadora_id, 0), SUM(IFNULL(monto, 0)), COUNT(*)
+       FROM finanzas GROUP BY 1, 2, 3, 4""",
+)
+
+
+# Contador de escrituras por tabla, mantenido por triggers para que cuente también
+# los cambios hechos desde otros procesos (servidor, CLI). La caché de consultas
+# lo usa como versión de los datos y la API como ETag / Last-Modified.
+VERSIONED_TABLES = ("finanzas", "creadoras", "empleados", "socios", "categorias_finanzas")
+
+VERSION_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS table_versions (
+        tabla TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0, modificado TEXT) WITHOUT ROWID""",
+) + tuple(
+    statement
+    for table in VERSIONED_TABLES for event in ("INSERT", "UPDATE", "DELETE")
+    for statement in (
+        f"DROP TRIGGER IF EXISTS trg_{table}_version_{event.lower()}",
+        f"""CREATE TRIGGER trg_{table}_version_{event.lower()} AFTER {event} ON {table} BEGIN
+        UPDATE table_versions SET version = version + 1, modificado = CURRENT_TIMESTAMP WHERE tabla = '{table}';
+    END""")
+)
+
+
+# Bandeja de salida de cambios para los dashboards web (ver changefeed.py): una fila
+# compacta por cada fila escrita en estas tablas, con los campos que el cliente
+# necesita para parchear sus KPIs y tablas ('antes' y 'despues' en JSON). Los importes
+# quedan en centavos y los porcentajes en puntos básicos, como en la base.
+CHANGE_FEED_COLUMNS = {
+    "finanzas": ("tipo", "categoria", "monto", "descripcion", "fecha", "creadora_id"),
+    "creadoras": ("nombre", "sueldo_fijo", "porcentaje", "inversion", "socio_id"),
+    "empleados": ("nombre", "rol", "sueldo", "ventas", "comision", "socio_id"),
+}
+
+
+def _change_json(row, columns):
+    return "json_object(" + ", ".join(f"'{column}', {row}.{column}" for column in ("id",) + columns) + ")"
+
+
+CHANGE_FEED_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS cambios (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, tabla TEXT NOT NULL, operacion TEXT NOT NULL,
+        fila_id INTEGER NOT NULL, antes TEXT, despues TEXT, creado TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP)""",
+) + tuple(
+    statement
+    for table, columns in CHANGE_FEED_COLUMNS.items()
+    for event, target, antes, despues in (
+        ("INSERT", "NEW", "NULL", _change_json("NEW", columns)),
+        ("UPDATE", "NEW", _change_json("OLD", columns), _change_json("NEW", columns)),
+        ("DELETE", "OLD", _change_json("OLD", columns), "NULL"))
+    for statement in (
+        f"DROP TRIGGER IF EXISTS trg_{table}_cambios_{event.lower()}",
+        # Las ediciones de columnas que no se publican (notas...) no generan cambio.
+        f"""CREATE TRIGGER trg_{table}_cambios_{event.lower()} AFTER {event}{' OF ' + ', '.join(columns) if event == 'UPDATE' else ''} ON {table} BEGIN
+        INSERT INTO cambios (tabla, operacion, fila_id, antes, despues) VALUES ('{table}', '{event.lower()}', {target}.id, {antes}, {despues});
+    END""")
+)
+
+CHANGE_RETENTION_SECONDS = 3600
+
+
+# Búsqueda de texto completo. `finanzas_fts` indexa descripción y categoría de
+# `finanzas` sin duplicar el texto (content='finanzas'); `notas_fts` guarda nombre
+# y notas de creadoras, empleados y socios con rowid = id * 4 + código de tabla,
+# para que los triggers actualicen su fila sin buscarla.
+SEARCH_TOKENIZER = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'"
+NOTES_TABLES = {"creadoras": 1, "empleados": 2, "socios": 3}
+
+SEARCH_SCHEMA = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS finanzas_fts USING fts5(descripcion, categoria, content = 'finanzas', content_rowid = 'id', {SEARCH_TOKENIZER})",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS notas_fts USING fts5(nombre, notas, {SEARCH_TOKENIZER})",
+    "DROP TRIGGER IF EXISTS trg_finanzas_fts_insert",
+    """CREATE TRIGGER trg_finanzas_fts_insert AFTER INSERT ON finanzas BEGIN
+        INSERT INTO finanzas_fts (rowid, descripcion, categoria) VALUES (NEW.id, NEW.descripcion, NEW.categoria);
+    END""",
+    # Con contenido externo, borrar exige pasar los valores viejos exactos.
+    "DROP TRIGGER IF EXISTS trg_finanzas_fts_delete",
+    """CREATE TRIGGER trg_finanzas_fts_delete AFTER DELETE ON finanzas BEGIN
+        INSERT INTO finanzas_fts (finanzas_fts, rowid, descripcion, categoria) VALUES ('delete', OLD.id, OLD.descripcion, OLD.categoria);
+    END""",
+    "DROP TRIGGER IF EXISTS trg_finanzas_fts_update",
+    """CREATE TRIGGER trg_finanzas_fts_update AFTER UPDATE OF descripcion, categoria ON finanzas BEGIN
+        INSERT INTO finanzas_fts (finanzas_fts, rowid, descripcion, categoria) VALUES ('delete', OLD.id, OLD.descripcion, OLD.categoria);
+        INSERT INTO finanzas_fts (rowid, descripcion, categoria) VALUES (NEW.id, NEW.descripcion, NEW.categoria);
+    END""",
+) + tuple(
+    statement
+    for table, code in NOTES_TABLES.items()
+    for event, body in (
+        ("INSERT", f"INSERT INTO notas_fts (rowid, nombre, notas) VALUES (NEW.id * 4 + {code}, NEW.nombre, NEW.notas);"),
+        ("DELETE", f"DELETE FROM notas_fts WHERE rowid = OLD.id * 4 + {code};"),
+        ("UPDATE OF nombre, notas", f"""DELETE FROM notas_fts WHERE rowid = OLD.id * 4 + {code};
+        INSERT INTO notas_fts (rowid, nombre, notas) VALUES (NEW.id * 4 + {code}, NEW.nombre, NEW.notas);"""))
+    for statement in (
+        f"DROP TRIGGER IF EXISTS trg_{table}_fts_{event.split()[0].lower()}",
+        f"""CREATE TRIGGER trg_{table}_fts_{event.split()[0].lower()} AFTER {event} ON {table} BEGIN
+        {body}
+    END""")
+)
+
+SEARCH_REBUILD = (
+    "INSERT INTO finanzas_fts (finanzas_fts) VALUES ('rebuild')",
+    "DELETE FROM notas_fts",
+) + tuple(
+    f"INSERT INTO notas_fts (rowid, nombre, notas) SELECT id * 4 + {code}, nombre, notas FROM {table}"
+    for table, code in NOTES_TABLES.items()
+)
+
+
+# Funciones `listener(conn, sql, params, segundos, filas)` a las que se informa de
+# cada sentencia ejecutada en las conexiones del pool (ver instrumentation.py).
+# Sin listeners, los cursores no miden nada.
+QUERY_LISTENERS = []
+
+
+def add_query_listener(listener):
+    if listener not in QUERY_LISTENERS: QUERY_LISTENERS.append(listener)
+
+
+def remove_query_listener(listener):
+    if listener in QUERY_LISTENERS: QUERY_LISTENERS.remove(listener)
+
+
+def _notify(conn, sql, params, seconds, rows):
+    for listener in QUERY_LISTENERS:
+        listener(conn, sql, params, seconds, rows)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Cursor que mide cada sentencia. Una escritura se informa al ejecutarla; una
+    consulta suma también el tiempo y las filas de sus fetch*, y se informa al
+    agotarla, al cerrar el cursor, al reutilizarlo o al liberarlo. Las filas
+    recorridas con `for` no se cuentan (el bucle va directo a C).
+    """
+    _pending = None  # [sql, params, segundos, filas] de la consulta en curso
+
+    def execute(self, sql, parameters=()):
+        if not QUERY_LISTENERS: return super().execute(sql, parameters)
+        self._finish()
+        started = perf_counter()
+        super().execute(sql, parameters)
+        elapsed = perf_counter() - started
+        if self.description is None: _notify(self.connection, sql, parameters, elapsed, self.rowcount)
+        else: self._pending = [sql, parameters, elapsed, 0]
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        if not QUERY_LISTENERS: return super().executemany(sql, seq_of_parameters)
+        self._finish()
+        started = perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        _notify(self.connection, sql, None, perf_counter() - started, self.rowcount)
+        return self
+
+    def fetchone(self):
+        if self._pending is None: return super().fetchone()
+        started = perf_counter()
+        row = super().fetchone()
+        self._pending[2] += perf_counter() - started
+        if row is None: self._finish()
+        else: self._pending[3] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        if self._pending is None: return super().fetchmany(self.arraysize if size is None else size)
+        size = self.arraysize if size is None else size
+        started = perf_counter()
+        rows = super().fetchmany(size)
+        self._pending[2] += perf_counter() - started; self._pending[3] += len(rows)
+        if len(rows) < size: self._finish()
+        return rows
+
+    def fetchall(self):
+        if self._pending is None: return super().fetchall()
+        started = perf_counter()
+        rows = super().fetchall()
+        self._pending[2] += perf_counter() - started; self._pending[3] += len(rows)
+        self._finish()
+        return rows
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending is not None: _notify(self.connection, *pending)
+
+    def __del__(self):
+        self._finish()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Conexión del pool: `execute` y `cursor()` pasan por InstrumentedCursor."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+class ConnectionPool:
+    """
+    Pool acotado de conexiones a una base de datos.
+
+    Un hilo que ya tiene una conexión prestada la reutiliza en llamadas
+    anidadas; las conexiones libres se entregan en orden LIFO para que el
+    mismo hilo recupere casi siempre la conexión "caliente" que acaba de soltar.
+    """
+    def __init__(self, path, max_size=POOL_SIZE, timeout=POOL_TIMEOUT):
+        self.path = path
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = []
+        self._size = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE, factory=InstrumentedConnection)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self):
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            self._local.depth += 1
+            return held
+        with self._cond:
+            while not self._idle and self._size >= self.max_size:
+                if not self._cond.wait(self.timeout):
+                    raise sqlite3.OperationalError(f"Pool de conexiones agotado ({self.max_size}) para {self.path}")
+            if self._idle:
+                conn = self._idle.pop()
+            else:
+                self._size += 1
+                conn = None
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+        self._local.conn = conn
+        self._local.depth = 1
+        return conn
+
+    def release(self, conn):
+        self._local.depth -= 1
+        if self._local.depth > 0:
+            return
+        self._local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            for conn in self._idle:
+                conn.close()
+            self._size -= len(self._idle)
+            self._idle.clear()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path=None):
+    path = db_path or DB_PATH
+    pool = _pools.get(path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(path, ConnectionPool(path))
+    return pool
+
+
+@contextmanager
+def connection(db_path=None):
+    """
+    Presta una conexión del pool. Al salir del bloque más externo se hace
+    commit de lo pendiente, o rollback si hubo una excepción, igual que
+    `with sqlite3.connect(...)`.
+    """
+    pool = get_pool(db_path)
+    conn = pool.acquire()
+    outermost = pool._local.depth == 1
+    try:
+        yield conn
+        if outermost and conn.in_transaction:
+            conn.commit()
+    except BaseException:
+        if outermost and conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        pool.release(conn)
+
+
+def get_db_data(query, params=(), db_path=None):
+    with connection(db_path) as conn:
+        return conn.execute(query, params).fetchall()
+
+
+def execute(query, params=(), db_path=None):
+    """Ejecuta una sentencia de escritura y devuelve el id de la última fila insertada."""
+    with connection(db_path) as conn:
+        return conn.execute(query, params).lastrowid
+
+
+def explain_query_plan(query, params=(), db_path=None):
+    """Devuelve el detalle de `EXPLAIN QUERY PLAN` para una consulta."""
+    return [row[3] for row in get_db_data("EXPLAIN QUERY PLAN " + query, params, db_path)]
+
+
+def bump_table_versions(conn, *tables):
+    """Marca como modificadas tablas cuyos datos cambiaron sin pasar por sus triggers."""
+    conn.executemany("UPDATE table_versions SET version = version + 1, modificado = CURRENT_TIMESTAMP WHERE tabla = ?", [(table,) for table in tables])
+
+
+def rebuild_rollup(db_path=None):
+    """Reconstruye `finanzas_mensual` desde cero a partir de `finanzas`."""
+    with connection(db_path) as conn:
+        for statement in ROLLUP_REBUILD:
+            conn.execute(statement)
+        bump_table_versions(conn, "finanzas")
+
+
+def prune_changes(retention=CHANGE_RETENTION_SECONDS, db_path=None):
+    """
+    Borra de `cambios` lo anterior a `retention` segundos y devuelve cuántas filas
+    borró. Solo toma el bloqueo de escritura si la fila más vieja ya caducó.
+    """
+    cutoff = f"-{int(retention)} seconds"
+    with connection(db_path) as conn:
+        oldest = conn.execute("SELECT creado < datetime('now', ?) FROM cambios ORDER BY id LIMIT 1", (cutoff,)).fetchone()
+        if not oldest or not oldest[0]: return 0
+        # Los ids crecen con `creado`: se borra hasta el primero que sigue vigente, sin recorrer el resto.
+        return conn.execute("""DELETE FROM cambios WHERE id < IFNULL(
+            (SELECT id FROM cambios WHERE creado >= datetime('now', ?) ORDER BY id LIMIT 1), (SELECT MAX(id) + 1 FROM cambios))""", (cutoff,)).rowcount
+
+
+def rebuild_search(db_path=None):
+    """Reconstruye los índices de búsqueda a partir de las tablas."""
+    with connection(db_path) as conn:
+        for statement in SEARCH_REBUILD:
+            conn.execute(statement)
+
+
+def close_all():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+def _forget_pools_after_fork():
+    # En el hijo las conexiones heredadas no se pueden usar ni cerrar sin riesgo: solo se descartan.
+    global _pools_lock
+    _pools.clear()
+    _pools_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_pools_after_fork)
+
+
+# --- MIGRACIONES ---
+# Cada paso lleva el esquema de la versión i a la i+1 (`PRAGMA user_version`) y
+# se aplica una sola vez, en su propia transacción junto con el cambio de versión.
+# Los pasos ya publicados no se editan ni se reordenan: un cambio nuevo es un paso
+# nuevo al final de MIGRATIONS. Las bases creadas antes de este sistema están en la
+# versión 0, así que el paso 1 también debe dejar bien cualquier esquema antiguo.
+
+CREADORAS_COLUMNS = ("id", "nombre", "sueldo_fijo", "porcentaje", "notas", "inversion", "socio_id")
+
+INDEXES = (
+    # Compuestos (y cubrientes, al llevar `monto`) para los filtros por tipo, fecha, mes, creadora y categoría.
+    "CREATE INDEX IF NOT EXISTS idx_finanzas_tipo_fecha ON finanzas (tipo, fecha, monto)",
+    "CREATE INDEX IF NOT EXISTS idx_finanzas_creadora_tipo ON finanzas (creadora_id, tipo, monto)",
+    "CREATE INDEX IF NOT EXISTS idx_finanzas_categoria_tipo ON finanzas (categoria, tipo, monto)",
+    "CREATE INDEX IF NOT EXISTS idx_finanzas_mes ON finanzas (mes, fecha, tipo, monto)",
+    "CREATE INDEX IF NOT EXISTS idx_finanzas_fecha ON finanzas (fecha, id)",
+    # Para la paginación keyset de las pantallas de gestión.
+    "CREATE INDEX IF NOT EXISTS idx_creadoras_nombre ON creadoras (nombre, id)",
+    "CREATE INDEX IF NOT EXISTS idx_empleados_nombre ON empleados (nombre, id)",
+)
+
+# Ordenar `finanzas` por tipo o categoría usa idx_finanzas_tipo_fecha e
+# idx_finanzas_categoria_tipo; por fecha, idx_finanzas_fecha.
+SORT_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_finanzas_monto ON finanzas (monto)",
+)
+
+DEFAULT_CATEGORIES = ("Inversion App", "Servidor Virtual", "Marketing", "Inversion Creadora", "Ingreso General", "Comisión Retiro Cripto", "Sueldo", "Otro")
+
+
+def table_columns(cursor, table):
+    # table_xinfo (y no table_info) para ver también las columnas generadas.
+    return {row[1] for row in cursor.execute(f"PRAGMA table_xinfo({table})")}
+
+
+def add_column(cursor, table, column, definition):
+    if column not in table_columns(cursor, table):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def migrate_base_schema(cursor):
+    """Tablas, columnas e índices de la app; normaliza `creadoras` de bases antiguas."""
+    creadoras_sql = '''CREATE TABLE {} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL, sueldo_fijo REAL DEFAULT 0,
+        porcentaje REAL DEFAULT 0, notas TEXT DEFAULT '', inversion REAL DEFAULT 0,
+        socio_id INTEGER REFERENCES socios(id) ON DELETE SET NULL)'''
+    cursor.execute('''CREATE TABLE IF NOT EXISTS socios (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL UNIQUE, notas TEXT DEFAULT '')''')
+    existing = table_columns(cursor, "creadoras")
+    if not existing:
+        cursor.execute(creadoras_sql.format("creadoras"))
+    elif not existing.issubset(CREADORAS_COLUMNS):
+        # Versiones muy antiguas tenían columnas que ya no se usan: se reconstruye
+        # la tabla una única vez, conservando todo lo que sí existe (socio_id incluido).
+        kept = ", ".join(column for column in CREADORAS_COLUMNS if column in existing)
+        cursor.execute(creadoras_sql.format("creadoras_new"))
+        cursor.execute(f"INSERT INTO creadoras_new ({kept}) SELECT {kept} FROM creadoras")
+        cursor.execute("DROP TABLE creadoras")
+        cursor.execute("ALTER TABLE creadoras_new RENAME TO creadoras")
+    else:
+        add_column(cursor, "creadoras", "socio_id", "INTEGER REFERENCES socios(id) ON DELETE SET NULL")
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS empleados (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL, rol TEXT, sueldo REAL DEFAULT 0,
+        ventas REAL DEFAULT 0, comision REAL DEFAULT 0, notas TEXT DEFAULT '',
+        socio_id INTEGER REFERENCES socios(id) ON DELETE SET NULL)''')
+    add_column(cursor, "empleados", "socio_id", "INTEGER REFERENCES socios(id) ON DELETE SET NULL")
+    cursor.execute('''CREATE TABLE IF NOT EXISTS finanzas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, tipo TEXT NOT NULL, categoria TEXT, monto REAL DEFAULT 0,
+        descripcion TEXT, fecha DATETIME DEFAULT CURRENT_TIMESTAMP,
+        creadora_id INTEGER, FOREIGN KEY (creadora_id) REFERENCES creadoras (id) ON DELETE SET NULL)''')
+    add_column(cursor, "finanzas", "creadora_id", "INTEGER REFERENCES creadoras(id) ON DELETE SET NULL")
+    add_column(cursor, "finanzas", "mes", "TEXT GENERATED ALWAYS AS (substr(fecha, 1, 7)) VIRTUAL")
+    cursor.execute('''CREATE TABLE IF NOT EXISTS categorias_finanzas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL UNIQUE)''')
+    cursor.executemany("INSERT OR IGNORE INTO categorias_finanzas (nombre) VALUES (?)", [(cat,) for cat in DEFAULT_CATEGORIES])
+
+    for statement in INDEXES:
+        cursor.execute(statement)
+
+
+def migrate_rollup(cursor):
+    """Resumen mensual mantenido por triggers, reconstruido una vez desde `finanzas`."""
+    for statement in ROLLUP_SCHEMA + ROLLUP_REBUILD:
+        cursor.execute(statement)
+
+
+def migrate_table_versions(cursor):
+    """Contadores de versión por tabla para la caché de consultas y los ETag de la API."""
+    cursor.execute(VERSION_SCHEMA[0])
+    add_column(cursor, "table_versions", "modificado", "TEXT")
+    for statement in VERSION_SCHEMA[1:]:
+        cursor.execute(statement)
+    cursor.executemany("INSERT OR IGNORE INTO table_versions (tabla) VALUES (?)", [(table,) for table in VERSIONED_TABLES])
+
+
+def rebuild_table(cursor, table, create_sql, columns, expressions):
+    """
+    Recrea `table` con `create_sql` (con {} en el lugar del nombre) copiando en
+    `columns` el resultado de `expressions` sobre la tabla vieja. Se pierden sus
+    índices y triggers: quien llama debe volver a crearlos.
+    """
+    seq = cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+    cursor.execute(create_sql.format(f"{table}_new"))
+    cursor.execute(f"INSERT INTO {table}_new ({', '.join(columns)}) SELECT {', '.join(expressions)} FROM {table}")
+    cursor.execute(f"DROP TABLE {table}")
+    cursor.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+    # AUTOINCREMENT no debe reutilizar ids de filas ya borradas.
+    if seq: cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (seq[0], table))
+
+
+def migrate_integer_money(cursor):
+    """Importes REAL a centavos INTEGER y porcentajes a puntos básicos (ver money.py)."""
+    from money import to_cents
+    # Conversión en Python con Decimal: ROUND(monto * 100) fallaría en casos como 0.285.
+    cursor.connection.create_function("centavos", 1, lambda value: None if value in (None, "") else to_cents(value), deterministic=True)
+    rebuild_table(cursor, "creadoras", '''CREATE TABLE {} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL, sueldo_fijo INTEGER DEFAULT 0,
+        porcentaje INTEGER DEFAULT 0, notas TEXT DEFAULT '', inversion INTEGER DEFAULT 0,
+        socio_id INTEGER REFERENCES socios(id) ON DELETE SET NULL)''',
+        ("id", "nombre", "sueldo_fijo", "porcentaje", "notas", "inversion", "socio_id"),
+        ("id", "nombre", "centavos(sueldo_fijo)", "centavos(porcentaje)", "notas", "centavos(inversion)", "socio_id"))
+    rebuild_table(cursor, "empleados", '''CREATE TABLE {} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL, rol TEXT, sueldo INTEGER DEFAULT 0,
+        ventas INTEGER DEFAULT 0, comision INTEGER DEFAULT 0, notas TEXT DEFAULT '',
+        socio_id INTEGER REFERENCES socios(id) ON DELETE SET NULL)''',
+        ("id", "nombre", "rol", "sueldo", "ventas", "comision", "notas", "socio_id"),
+        ("id", "nombre", "rol", "centavos(sueldo)", "centavos(ventas)", "centavos(comision)", "notas", "socio_id"))
+    rebuild_table(cursor, "finanzas", '''CREATE TABLE {} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, tipo TEXT NOT NULL, categoria TEXT, monto INTEGER DEFAULT 0,
+        descripcion TEXT, fecha DATETIME DEFAULT CURRENT_TIMESTAMP,
+        creadora_id INTEGER REFERENCES creadoras(id) ON DELETE SET NULL,
+        mes TEXT GENERATED ALWAYS AS (substr(fecha, 1, 7)) VIRTUAL)''',
+        ("id", "tipo", "categoria", "monto", "descripcion", "fecha", "creadora_id"),
+        ("id", "tipo", "categoria", "centavos(monto)", "descripcion", "fecha", "creadora_id"))
+    cursor.execute("DROP TABLE finanzas_mensual")
+    for statement in INDEXES + ROLLUP_SCHEMA + ROLLUP_REBUILD + VERSION_SCHEMA[1:]:
+        cursor.execute(statement)
+    # Los resultados en caché de otros procesos tienen los importes viejos.
+    bump_table_versions(cursor, "finanzas", "creadoras", "empleados")
+
+
+def migrate_change_feed(cursor):
+    """Tabla `cambios` y sus triggers. Un paso que reconstruya estas tablas debe volver a crearlos."""
+    for statement in CHANGE_FEED_SCHEMA:
+        cursor.execute(statement)
+
+
+def migrate_search(cursor):
+    """Índices FTS5 de `finanzas` y de las notas, con sus triggers, llenados una vez."""
+    for statement in SEARCH_SCHEMA + SEARCH_REBUILD:
+        cursor.execute(statement)
+
+
+def migrate_sort_indexes(cursor):
+    """
+    Índices para ordenar las pantallas de gestión (ver queries.FINANZAS_VIEW).
+    La paginación keyset compara row values, que no admiten NULL: `monto` y
+    `categoria` pasan a NOT NULL, con los NULL de bases antiguas como 0 y ''
+    (lo mismo que ya cuenta el resumen mensual; las consultas leen '' como "sin
+    categoría" con NULLIF). La copia no pasa por triggers, así que no llena
+    `cambios` ni toca el resumen ni el índice FTS, que no cambian.
+    """
+    rebuild_table(cursor, "finanzas", '''CREATE TABLE {} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, tipo TEXT NOT NULL, categoria TEXT NOT NULL DEFAULT '', monto INTEGER NOT NULL DEFAULT 0,
+        descripcion TEXT, fecha DATETIME DEFAULT CURRENT_TIMESTAMP,
+        creadora_id INTEGER REFERENCES creadoras(id) ON DELETE SET NULL,
+        mes TEXT GENERATED ALWAYS AS (substr(fecha, 1, 7)) VIRTUAL)''',
+        ("id", "tipo", "categoria", "monto", "descripcion", "fecha", "creadora_id"),
+        ("id", "tipo", "IFNULL(categoria, '')", "IFNULL(monto, 0)", "descripcion", "fecha", "creadora_id"))
+    for statement in INDEXES + SORT_INDEXES + ROLLUP_SCHEMA + VERSION_SCHEMA[1:] + CHANGE_FEED_SCHEMA + SEARCH_SCHEMA:
+        cursor.execute(statement)
+    bump_table_versions(cursor, "finanzas")
+
+
+MIGRATIONS = (
+    migrate_base_schema,
+    migrate_rollup,
+    migrate_table_versions,
+    migrate_integer_money,
+    migrate_change_feed,
+    migrate_search,
+    migrate_sort_indexes,
+)
+
+SCHEMA_VERSION = len(MIGRATIONS)
+# Desde esta versión los importes son centavos INTEGER; antes, unidades REAL.
+INTEGER_MONEY_VERSION = MIGRATIONS.index(migrate_integer_money) + 1
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(db_path=None):
+    """
+    Aplica las migraciones pendientes y devuelve cuántas aplicó. Con el esquema al
+    día solo lee `PRAGMA user_version`: no escribe ni toma el bloqueo de escritura.
+    """
+    with connection(db_path) as conn:
+        if schema_version(conn) >= SCHEMA_VERSION: return 0
+        if conn.in_transaction: conn.commit()
+        applied = 0
+        # foreign_keys no se puede cambiar dentro de una transacción, y reconstruir
+        # una tabla con las claves foráneas activas dejaría en NULL sus referencias.
+        conn.execute("PRAGMA foreign_keys=OFF")
+        try:
+            while True:
+                # BEGIN IMMEDIATE y releer la versión: si otro proceso migra a la vez, espera y no repite pasos.
+                conn.execute("BEGIN IMMEDIATE")
+                version = schema_version(conn)
+                if version >= SCHEMA_VERSION:
+                    conn.rollback()
+                    break
+                try:
+                    cursor = conn.cursor()
+                    MIGRATIONS[version](cursor)
+                    cursor.execute(f"PRAGMA user_version = {version + 1}")
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    raise
+                applied += 1
+        finally:
+            conn.execute("PRAGMA foreign_keys=ON")
+        if applied: conn.execute("PRAGMA optimize")
+        return applied
+
+
+def init_db(db_path=None):
+    """Deja el esquema de la base al día (ver `migrate`) y purga los cambios ya caducados."""
+    migrate(db_path)
+    prune_changes(db_path=db_path)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Mantenimiento de la base de datos de finanzas.")
+    parser.add_argument("command", choices=["init", "rebuild-rollup", "rebuild-search"])
+    parser.add_argument("--db", default=DB_PATH, help="ruta de la base de datos SQLite")
+    args = parser.parse_args()
+    applied = migrate(args.db)
+    print(f"Esquema en la versión {SCHEMA_VERSION} ({applied} migraciones aplicadas).")
+    if args.command == "rebuild-rollup":
+        rebuild_rollup(args.db)
+    elif args.command == "rebuild-search":
+        rebuild_search(args.db)
@@ -0,0 +1,131 @@
+"""
+Exportación en streaming de movimientos del libro de finanzas.
+
+Las filas se leen del cursor de SQLite por lotes (`fetchmany`) y se codifican
+a CSV o NDJSON en trozos de tamaño acotado, opcionalmente comprimidos con
+gzip. La memoria no depende del número de filas, así que sirve igual para un
+mes que para toda la historia. Lo usan la pantalla de Reportes de app.py (a un
+archivo, en segundo plano) y el servidor Flask (respuesta chunked).
+"""
+import csv
+import io
+import json
+import os
+import zlib
+
+from db import connection, get_db_data
+from money import decimal_text, to_units
+from queries import FINANZAS_FIELDS, finanzas_filters, finanzas_select
+
+FORMATS = ("csv", "ndjson")
+BATCH_SIZE = 1000
+CHUNK_SIZE = 64 * 1024
+
+MIMETYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def export_query(fields, start_date=None, end_date=None, tipo=None, categoria=None, creadora_id=None):
+    conditions, params = finanzas_filters(start_date, end_date, tipo, categoria, creadora_id)
+    where = (" WHERE " + " AND ".join(conditions)) if conditions else ""
+    # Mismo orden que el índice (fecha, id): SQLite lo recorre sin ordenar en memoria.
+    return f"{finanzas_select(fields)}{where} ORDER BY f.fecha DESC, f.id DESC", params
+
+
+def count_rows(start_date=None, end_date=None, tipo=None, categoria=None, creadora_id=None, db_path=None):
+    conditions, params = finanzas_filters(start_date, end_date, tipo, categoria, creadora_id)
+    where = (" WHERE " + " AND ".join(conditions)) if conditions else ""
+    return get_db_data(f"SELECT COUNT(*) FROM finanzas f{where}", tuple(params), db_path)[0][0]
+
+
+def iter_rows(fields, batch_size=BATCH_SIZE, db_path=None, **filters):
+    """Genera las filas en lotes directamente desde el cursor, sin materializar el resultado."""
+    query, params = export_query(fields, **filters)
+    with connection(db_path) as conn:
+        cursor = conn.execute(query, params)
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch: break
+            yield batch
+
+
+def encode_csv(batches, fields):
+    buffer = io.StringIO(); writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for batch in batches:
+        writer.writerows(batch)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0); buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def encode_ndjson(batches, fields):
+    chunk = []; size = 0
+    for batch in batches:
+        for row in batch:
+            line = json.dumps(dict(zip(fields, row)), ensure_ascii=False) + "\n"
+            chunk.append(line); size += len(line)
+        if size >= CHUNK_SIZE:
+            yield "".join(chunk).encode("utf-8")
+            chunk = []; size = 0
+    yield "".join(chunk).encode("utf-8")
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: cabecera y cola gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data: yield data
+    yield compressor.flush()
+
+
+def export_chunks(fmt="csv", fields=tuple(FINANZAS_FIELDS), compress=False, progress=None, batch_size=BATCH_SIZE, db_path=None, **filters):
+    """
+    Genera el archivo exportado como trozos de bytes. `progress(filas)` se
+    llama tras cada lote con el total de filas leídas hasta el momento.
+    """
+    if fmt not in FORMATS: raise ValueError(f"Formato de exportación desconocido: {fmt}")
+    # `monto` está en centavos: '1234.50' exacto en CSV, número en unidades en NDJSON.
+    money_index = fields.index("monto") if "monto" in fields else None
+    to_output = decimal_text if fmt == "csv" else to_units
+    def batches():
+        done = 0
+        for batch in iter_rows(fields, batch_size, db_path, **filters):
+            done += len(batch)
+            if money_index is not None:
+                batch = [row[:money_index] + (to_output(row[money_index]),) + row[money_index + 1:] for row in batch]
+            yield batch
+            if progress: progress(done)
+    chunks = (encode_csv if fmt == "csv" else encode_ndjson)(batches(), fields)
+    return gzip_chunks(chunks) if compress else chunks
+
+
+def format_from_path(path):
+    """('csv' | 'ndjson', comprimido) según la extensión: .csv, .ndjson, .jsonl y sus variantes .gz."""
+    name = path.lower()
+    compress = name.endswith(".gz")
+    if compress: name = name[:-3]
+    return ("ndjson" if name.endswith((".ndjson", ".jsonl")) else "csv"), compress
+
+
+def export_to_file(path, fields=tuple(FINANZAS_FIELDS), progress=None, db_path=None, **filters):
+    """
+    Escribe la exportación en `path` (formato según la extensión) y devuelve el
+    número de filas. Se escribe a un archivo temporal que solo reemplaza al
+    destino si termina bien.
+    """
+    fmt, compress = format_from_path(path)
+    written = [0]
+    def track(done):
+        written[0] = done
+        if progress: progress(done)
+    tmp_path = path + ".part"
+    try:
+        with open(tmp_path, "wb") as f:
+            for chunk in export_chunks(fmt, fields, compress, track, db_path=db_path, **filters):
+                f.write(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+        raise
+    return written[0]
@@ -0,0 +1,181 @@
+"""
+Línea de comandos sin interfaz gráfica para reportes, exportación e importación.
+
+    python -m finanzas report monthly --from 2025-01 --to 2025-06 --format json
+    python -m finanzas report breakdown --format table
+    python -m finanzas report top --by profitability --limit 10 --format csv
+    python -m finanzas export movimientos.csv.gz --from 2025-01-01
+    python -m finanzas import pagos.csv --rechazos rechazos.csv
+    python -m finanzas --db nueva.db init
+
+Solo importa queries.py y db.py (sqlite3 y la biblioteca estándar); cada
+subcomando carga lo demás al ejecutarse, para que el arranque desde cron sea
+de pocos milisegundos.
+"""
+import argparse
+import os
+import sys
+from calendar import monthrange
+from datetime import datetime
+
+REPORTS = ("monthly", "breakdown", "top", "categories", "partners", "dashboard", "months")
+FORMATS = ("json", "csv", "table")
+# Columnas con importes en centavos.
+MONEY_COLUMNS = {"ingresos", "egresos", "beneficio", "total", "rentabilidad", "valor"}
+
+
+def parse_date(value, end=False):
+    """YYYY-MM-DD, o YYYY-MM como primer (o último, si `end`) día del mes."""
+    for fmt in ('%Y-%m-%d', '%Y-%m'):
+        try:
+            parsed = datetime.strptime(value, fmt).date()
+            break
+        except ValueError:
+            continue
+    else:
+        raise argparse.ArgumentTypeError(f"fecha inválida: {value!r} (usa YYYY-MM-DD o YYYY-MM)")
+    if fmt == '%Y-%m' and end: parsed = parsed.replace(day=monthrange(parsed.year, parsed.month)[1])
+    return parsed.isoformat()
+
+
+def build_report(args):
+    """Devuelve (columnas, filas) del reporte pedido."""
+    import queries
+    if args.report == "monthly":
+        data = queries.get_monthly_financial_trend(args.desde, args.hasta)
+        return ("mes", "ingresos", "egresos", "beneficio"), [
+            (mes, ingresos, egresos, ingresos - egresos) for mes, ingresos, egresos in zip(data["months"], data["incomes"], data["expenses"])]
+    if args.report == "breakdown":
+        return ("concepto", "total"), list(queries.get_expense_breakdown().items())
+    if args.report == "top":
+        if args.by == "revenue": return ("nombre", "ingresos"), queries.get_top_creators_by_revenue(args.limit)
+        return ("nombre", "rentabilidad"), queries.get_top_creators_by_profitability(args.limit)
+    if args.report == "categories":
+        return ("categoria", "total"), queries.get_expense_by_category(args.limit)
+    if args.report == "partners":
+        return ("socio", "total"), queries.get_partner_expenses()
+    if args.report == "months":
+        return ("mes",), [(mes,) for mes in queries.get_distinct_months()]
+    snapshot = queries.get_dashboard_snapshot(top_limit=args.limit)
+    rows = [("ingresos_mes", "", snapshot.ingresos_mes)]
+    rows += [("gastos", concepto, total) for concepto, total in snapshot.expense_breakdown.items()]
+    rows += [("gastos_por_categoria", categoria, total) for categoria, total in snapshot.expense_by_category]
+    rows += [("top_ingresos", nombre, total) for nombre, total in snapshot.top_revenue]
+    rows += [("top_rentabilidad", nombre, total) for nombre, total in snapshot.top_profitability]
+    return ("seccion", "nombre", "valor"), rows
+
+
+def write_rows(columns, rows, fmt, out):
+    from money import decimal_text, format_money_many, to_units
+    money = [i for i, column in enumerate(columns) if column in MONEY_COLUMNS]
+    if money:
+        # Por columnas: unidades en JSON, decimal exacto en CSV y con separadores en la tabla.
+        rows = [list(row) for row in rows]
+        for i in money:
+            values = [row[i] for row in rows]
+            texts = ([to_units(value) for value in values] if fmt == "json" else
+                     [decimal_text(value) for value in values] if fmt == "csv" else format_money_many(values, symbol=""))
+            for row, text in zip(rows, texts): row[i] = text
+    if fmt == "json":
+        import json
+        json.dump([dict(zip(columns, row)) for row in rows], out, ensure_ascii=False, indent=2)
+        out.write("\n")
+    elif fmt == "csv":
+        import csv
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(columns); writer.writerows(rows)
+    else:
+        cells = [["" if value is None else str(value) for value in row] for row in rows]
+        widths = [max([len(column)] + [len(row[i]) for row in cells]) for i, column in enumerate(columns)]
+        out.write("  ".join(column.ljust(width) for column, width in zip(columns, widths)).rstrip() + "\n")
+        for row in cells:
+            out.write("  ".join(cell.rjust(width) if i else cell.ljust(width) for i, (cell, width) in enumerate(zip(row, widths))).rstrip() + "\n")
+
+
+def cmd_report(args):
+    columns, rows = build_report(args)
+    write_rows(columns, rows, args.format, sys.stdout)
+    return 0
+
+
+def cmd_export(args):
+    from export import export_to_file
+    rows = export_to_file(args.archivo, start_date=args.desde, end_date=args.hasta, tipo=args.tipo, categoria=args.categoria)
+    print(f"{rows:,} movimientos exportados a {args.archivo}", file=sys.stderr)
+    return 0
+
+
+def cmd_import(args):
+    from importer import import_file
+    result = import_file(args.archivo, args.rechazos, apply_commission=not args.sin_comision,
+                         create_categories=args.crear_categorias, dry_run=args.dry_run)
+    print(result.summary(), file=sys.stderr)
+    return 1 if result.rechazadas else 0
+
+
+def cmd_init(args):
+    # La migración ya la hizo main(); solo falta purgar los cambios caducados.
+    import db
+    db.init_db(db.DB_PATH)
+    print(f"Base {db.DB_PATH} en la versión {db.SCHEMA_VERSION} del esquema.", file=sys.stderr)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m finanzas", description="Reportes y mantenimiento del libro de finanzas sin interfaz gráfica.")
+    parser.add_argument("--db", help="ruta de la base de datos SQLite (por defecto FINANZAS_DB o db_ofmkevin.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    report = commands.add_parser("report", help="imprime un reporte")
+    report.add_argument("report", choices=REPORTS)
+    report.add_argument("--from", dest="desde", type=parse_date, help="inicio del rango (monthly)")
+    report.add_argument("--to", dest="hasta", type=lambda value: parse_date(value, end=True), help="fin del rango, incluido (monthly)")
+    report.add_argument("--by", choices=("revenue", "profitability"), default="revenue", help="criterio del ranking (top)")
+    report.add_argument("--limit", type=int, default=5, help="número de filas (top, categories, dashboard)")
+    report.add_argument("--format", choices=FORMATS, default="json")
+    report.set_defaults(func=cmd_report)
+
+    export = commands.add_parser("export", help="exporta movimientos (.csv, .ndjson, .gz)")
+    export.add_argument("archivo")
+    export.add_argument("--from", dest="desde", type=parse_date)
+    export.add_argument("--to", dest="hasta", type=lambda value: parse_date(value, end=True))
+    export.add_argument("--tipo", choices=("ingreso", "egreso"))
+    export.add_argument("--categoria")
+    export.set_defaults(func=cmd_export)
+
+    importer = commands.add_parser("import", help="importa movimientos desde un CSV (ver importer.py para más opciones)")
+    importer.add_argument("archivo")
+    importer.add_argument("--rechazos", help="CSV donde volcar las filas rechazadas")
+    importer.add_argument("--sin-comision", action="store_true")
+    importer.add_argument("--crear-categorias", action="store_true")
+    importer.add_argument("--dry-run", action="store_true")
+    importer.set_defaults(func=cmd_import)
+
+    init = commands.add_parser("init", help="crea la base si no existe y la deja en la última versión del esquema")
+    init.set_defaults(func=cmd_init, creates_db=True)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    import db
+    import query_cache
+    if args.db: db.DB_PATH = args.db
+    query_cache.ENABLED = False
+    # Una ruta mal escrita crearía una base vacía y los reportes saldrían vacíos: solo `init` crea la base.
+    if not getattr(args, "creates_db", False) and not os.path.exists(db.DB_PATH):
+        print(f"error: no existe la base de datos {db.DB_PATH} (créala con `python -m finanzas --db {db.DB_PATH} init`)", file=sys.stderr)
+        return 2
+    try:
+        # Una base antigua o sin migrar tiene otro esquema (importes REAL, sin resumen
+        # mensual): se pone al día antes de leerla o de escribir importes en centavos.
+        db.migrate(db.DB_PATH)
+        return args.func(args)
+    except Exception as e:
+        # sqlite3.Error, OSError...: mensaje corto y código de salida para cron.
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
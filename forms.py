@@ -1,5 +1,8 @@
 import customtkinter as ctk
 import sqlite3
+from db import connection
+from query_cache import cached_query
+from money import Money, decimal_text, to_basis_points
 from tkinter import messagebox
 
 class AddCreatorForm(ctk.CTkToplevel):
@@ -43,10 +46,7 @@ class AddCreatorForm(ctk.CTkToplevel):
 
     def load_partners(self):
         try:
-            with sqlite3.connect(self.db_name) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id, nombre FROM socios ORDER BY nombre ASC")
-                partners = cursor.fetchall()
+            partners = cached_query("SELECT id, nombre FROM socios ORDER BY nombre ASC", db_path=self.db_name)
             partners_map = {name: id for id, name in partners}
             partner_names = list(partners_map.keys())
             partner_names.insert(0, "Ninguno")
@@ -69,12 +69,12 @@ class AddCreatorForm(ctk.CTkToplevel):
 
         if not nombre: messagebox.showerror("Error de Validación", "El campo 'Nombre' no puede estar vacío.", parent=self); return
         try:
-            sueldo = float(sueldo_str) if sueldo_str else 0.0
-            porcentaje = float(porcentaje_str) if porcentaje_str else 0.0
-            inversion = float(inversion_str) if inversion_str else 0.0
+            sueldo = Money.parse(sueldo_str) if sueldo_str else 0
+            porcentaje = to_basis_points(porcentaje_str) if porcentaje_str else 0
+            inversion = Money.parse(inversion_str) if inversion_str else 0
         except ValueError: messagebox.showerror("Error de Validación", "Los campos numéricos deben ser números válidos.", parent=self); return
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connection(self.db_name) as conn:
                 cursor = conn.cursor()
                 cursor.execute('INSERT INTO creadoras (nombre, sueldo_fijo, porcentaje, inversion, notas, socio_id) VALUES (?, ?, ?, ?, ?, ?)', 
                                (nombre, sueldo, porcentaje, inversion, notas, partner_id))
@@ -86,9 +86,9 @@ class EditCreatorForm(AddCreatorForm):
         super().__init__(master, db_name, on_close_callback)
         self.title("Editar Creadora"); self.creator_id = creator_data['id']
         self.nombre_entry.insert(0, creator_data['nombre'])
-        self.sueldo_entry.insert(0, str(creator_data['sueldo_fijo']))
-        self.porcentaje_entry.insert(0, str(creator_data['porcentaje']))
-        self.inversion_entry.insert(0, str(creator_data['inversion']))
+        self.sueldo_entry.insert(0, decimal_text(creator_data['sueldo_fijo']))
+        self.porcentaje_entry.insert(0, decimal_text(creator_data['porcentaje']))
+        self.inversion_entry.insert(0, decimal_text(creator_data['inversion']))
         self.notas_textbox.insert("1.0", creator_data['notas'])
         
         if creator_data.get('socio_id') is not None:
@@ -105,12 +105,12 @@ class EditCreatorForm(AddCreatorForm):
 
         if not nombre: messagebox.showerror("Error de Validación", "El campo 'Nombre' no puede estar vacío.", parent=self); return
         try:
-            sueldo = float(sueldo_str) if sueldo_str else 0.0
-            porcentaje = float(porcentaje_str) if porcentaje_str else 0.0
-            inversion = float(inversion_str) if inversion_str else 0.0
+            sueldo = Money.parse(sueldo_str) if sueldo_str else 0
+            porcentaje = to_basis_points(porcentaje_str) if porcentaje_str else 0
+            inversion = Money.parse(inversion_str) if inversion_str else 0
         except ValueError: messagebox.showerror("Error de Validación", "Los campos numéricos deben ser números válidos.", parent=self); return
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connection(self.db_name) as conn:
                 cursor = conn.cursor()
                 cursor.execute('UPDATE creadoras SET nombre=?, sueldo_fijo=?, porcentaje=?, inversion=?, notas=?, socio_id=? WHERE id=?', 
                                (nombre, sueldo, porcentaje, inversion, notas, partner_id, self.creator_id))
@@ -148,10 +148,7 @@ class AddEmployeeForm(ctk.CTkToplevel):
 
     def load_partners(self):
         try:
-            with sqlite3.connect(self.db_name) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id, nombre FROM socios ORDER BY nombre ASC")
-                partners = cursor.fetchall()
+            partners = cached_query("SELECT id, nombre FROM socios ORDER BY nombre ASC", db_path=self.db_name)
             partners_map = {name: id for id, name in partners}
             partner_names = list(partners_map.keys())
             partner_names.insert(0, "Ninguno")
@@ -174,11 +171,11 @@ class AddEmployeeForm(ctk.CTkToplevel):
 
         if not nombre: messagebox.showerror("Error de Validación", "El campo 'Nombre' no puede estar vacío.", parent=self); return
         try:
-            sueldo = float(sueldo_str) if sueldo_str else 0.0; ventas = float(ventas_str) if ventas_str else 0.0
-            comision = float(comision_str) if comision_str else 0.0
+            sueldo = Money.parse(sueldo_str) if sueldo_str else 0; ventas = Money.parse(ventas_str) if ventas_str else 0
+            comision = to_basis_points(comision_str) if comision_str else 0
         except ValueError: messagebox.showerror("Error de Validación", "Campos numéricos deben ser números.", parent=self); return
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connection(self.db_name) as conn:
                 cursor = conn.cursor()
                 cursor.execute('INSERT INTO empleados (nombre, rol, sueldo, ventas, comision, notas, socio_id) VALUES (?, ?, ?, ?, ?, ?, ?)', 
                                (nombre, rol, sueldo, ventas, comision, notas, partner_id))
@@ -191,8 +188,8 @@ class EditEmployeeForm(AddEmployeeForm):
         super().__init__(master, db_name, on_close_callback)
         self.title("Editar Empleado"); self.employee_id = employee_data['id']
         self.nombre_entry.insert(0, employee_data['nombre']); self.rol_combo.set(employee_data['rol'])
-        self.sueldo_entry.insert(0, str(employee_data['sueldo'])); self.ventas_entry.insert(0, str(employee_data['ventas']))
-        self.comision_entry.insert(0, str(employee_data['comision'])); self.notas_textbox.insert("1.0", employee_data['notas'])
+        self.sueldo_entry.insert(0, decimal_text(employee_data['sueldo'])); self.ventas_entry.insert(0, decimal_text(employee_data['ventas']))
+        self.comision_entry.insert(0, decimal_text(employee_data['comision'])); self.notas_textbox.insert("1.0", employee_data['notas'])
 
         if employee_data.get('socio_id') is not None:
             partner_name = [name for name, id in self.partners_map.items() if id == employee_data.get('socio_id')]
@@ -208,11 +205,11 @@ class EditEmployeeForm(AddEmployeeForm):
 
         if not nombre: messagebox.showerror("Error de Validación", "El campo 'Nombre' no puede estar vacío.", parent=self); return
         try:
-            sueldo = float(sueldo_str) if sueldo_str else 0.0; ventas = float(ventas_str) if ventas_str else 0.0
-            comision = float(comision_str) if comision_str else 0.0
+            sueldo = Money.parse(sueldo_str) if sueldo_str else 0; ventas = Money.parse(ventas_str) if ventas_str else 0
+            comision = to_basis_points(comision_str) if comision_str else 0
         except ValueError: messagebox.showerror("Error de Validación", "Campos numéricos deben ser números.", parent=self); return
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connection(self.db_name) as conn:
                 cursor = conn.cursor()
                 cursor.execute('UPDATE empleados SET nombre=?, rol=?, sueldo=?, ventas=?, comision=?, notas=?, socio_id=? WHERE id=?', 
                                (nombre, rol, sueldo, ventas, comision, notas, partner_id, self.employee_id))
@@ -250,7 +247,7 @@ class AddPartnerForm(ctk.CTkToplevel):
         if not nombre:
             messagebox.showerror("Error de Validación", "El campo 'Nombre' no puede estar vacío.", parent=self); return
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connection(self.db_name) as conn:
                 conn.execute('INSERT INTO socios (nombre, notas) VALUES (?, ?)', (nombre, notas))
             messagebox.showinfo("Éxito", f"Socio '{nombre}' guardado correctamente.", parent=self); self.on_window_close()
         except sqlite3.IntegrityError:
@@ -271,7 +268,7 @@ class EditPartnerForm(AddPartnerForm):
         if not nombre:
             messagebox.showerror("Error de Validación", "El campo 'Nombre' no puede estar vacío.", parent=self); return
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connection(self.db_name) as conn:
                 conn.execute('UPDATE socios SET nombre=?, notas=? WHERE id=?', (nombre, notas, self.partner_id))
             messagebox.showinfo("Éxito", f"Socio '{nombre}' actualizado correctamente.", parent=self); self.on_window_close()
         except sqlite3.IntegrityError:
@@ -319,10 +316,7 @@ class AddTransactionForm(ctk.CTkToplevel):
 
     def load_creators(self):
         try:
-            with sqlite3.connect(self.db_name) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id, nombre FROM creadoras ORDER BY nombre ASC")
-                creators = cursor.fetchall()
+            creators = cached_query("SELECT id, nombre FROM creadoras ORDER BY nombre ASC", db_path=self.db_name)
             creators_map = {name: id for id, name in creators}
             creator_names = list(creators_map.keys())
             creator_names.insert(0, "Ninguna")
@@ -347,10 +341,7 @@ class AddTransactionForm(ctk.CTkToplevel):
 
     def load_categories(self):
         try:
-            with sqlite3.connect(self.db_name) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT nombre FROM categorias_finanzas ORDER BY nombre ASC")
-                categories = [row[0] for row in cursor.fetchall()]
+            categories = [row[0] for row in cached_query("SELECT nombre FROM categorias_finanzas ORDER BY nombre ASC", db_path=self.db_name)]
             self.categoria_combo.configure(values=categories)
             if categories: self.categoria_combo.set(categories[0])
         except sqlite3.Error as e: messagebox.showerror("Error en DB", f"No se pudieron cargar las categorías: {e}", parent=self)
@@ -360,7 +351,7 @@ class AddTransactionForm(ctk.CTkToplevel):
         new_category = dialog.get_input()
         if new_category and new_category.strip():
             try:
-                with sqlite3.connect(self.db_name) as conn:
+                with connection(self.db_name) as conn:
                     cursor = conn.cursor()
                     cursor.execute("INSERT OR IGNORE INTO categorias_finanzas (nombre) VALUES (?)", (new_category.strip(),))
                 self.load_categories()
@@ -378,18 +369,18 @@ class AddTransactionForm(ctk.CTkToplevel):
         apply_commission = self.commission_checkbox.get() == 1 and tipo == 'ingreso'
         if not all([monto_str, descripcion, categoria]): messagebox.showerror("Error de Validación", "Todos los campos son requeridos.", parent=self); return
         try:
-            monto = float(monto_str)
+            monto = Money.parse(monto_str)
         except ValueError: messagebox.showerror("Error de Validación", "'Monto' debe ser un número.", parent=self); return
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connection(self.db_name) as conn:
                 cursor = conn.cursor()
                 cursor.execute('INSERT INTO finanzas (tipo, categoria, monto, descripcion, creadora_id) VALUES (?, ?, ?, ?, ?)',
                                (tipo, categoria, monto, descripcion, creator_id))
                 if apply_commission:
-                    commission_amount = monto * 0.02
-                    desc_egreso = f"Comisión 2% por retiro de ${monto:.2f}"
+                    from importer import commission_for  # importer arrastra csv y dataclasses: solo al guardar
+                    tipo_egreso, categoria_egreso, commission_amount, desc_egreso, _, _ = commission_for(monto)
                     cursor.execute('INSERT INTO finanzas (tipo, categoria, monto, descripcion) VALUES (?, ?, ?, ?)',
-                                   ('egreso', 'Comisión Retiro Cripto', commission_amount, desc_egreso))
+                                   (tipo_egreso, categoria_egreso, commission_amount, desc_egreso))
             messagebox.showinfo("Éxito", "Transacción guardada.", parent=self)
             self.on_window_close()
         except sqlite3.Error as e: messagebox.showerror("Error en DB", f"No se pudo guardar la transacción: {e}", parent=self)
@@ -400,7 +391,7 @@ class EditTransactionForm(AddTransactionForm):
         super().__init__(master, db_name, on_close_callback)
         self.title("Editar Transacción"); self.transaction_id = transaction_data['id']
         self.tipo_combo.set(transaction_data['tipo']); self.categoria_combo.set(transaction_data['categoria'])
-        self.monto_entry.insert(0, str(transaction_data['monto'])); self.descripcion_textbox.insert("1.0", transaction_data['descripcion'])
+        self.monto_entry.insert(0, decimal_text(transaction_data['monto'])); self.descripcion_textbox.insert("1.0", transaction_data['descripcion'])
         self.toggle_income_fields()
         if transaction_data['creadora_id'] is not None:
             creator_name = [name for name, id in self.creators_map.items() if id == transaction_data['creadora_id']]
@@ -413,7 +404,7 @@ class EditTransactionForm(AddTransactionForm):
         new_categoria = self.categoria_combo.get()
         new_descripcion = self.descripcion_textbox.get("1.0", "end-1c").strip()
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connection(self.db_name) as conn:
                 cursor = conn.cursor()
                 cursor.execute('UPDATE finanzas SET categoria=?, descripcion=? WHERE id=?', (new_categoria, new_descripcion, self.transaction_id))
             messagebox.showinfo("Éxito", "Transacción actualizada.", parent=self)
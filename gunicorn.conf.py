@@ -0,0 +1,25 @@
+"""
+Configuración de Gunicorn para server.py.
+
+`preload_app` importa el código y ejecuta `create_app()` (esquema incluido) una
+sola vez en el maestro; los workers heredan la app ya construida y cada uno abre
+su propio pool de conexiones al arrancar.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 8)))
+# Cada websocket de Socket.IO (ver server.py) ocupa un hilo mientras está abierto.
+threads = int(os.environ.get("GUNICORN_THREADS", "16"))
+preload_app = True
+timeout = 30
+keepalive = 5
+max_requests = 1000
+max_requests_jitter = 100
+accesslog = "-"
+
+
+def post_worker_init(worker):
+    import server
+    server.init_worker()
@@ -0,0 +1,241 @@
+"""
+Importación masiva de movimientos desde CSV (exportaciones de plataformas o de
+exchanges como Binance).
+
+El archivo se lee en streaming, fila a fila. Cada fila se valida contra
+`categorias_finanzas` y `creadoras`, se le aplica la misma comisión de retiro
+que en AddTransactionForm, y las filas válidas se insertan con `executemany`
+en transacciones de `chunk_size` filas. Las rechazadas se cuentan (y se pueden
+volcar a un CSV) sin detener la importación.
+
+    python importer.py pagos.csv --categoria "Ingreso General" --tipo ingreso
+    python importer.py binance.csv --map monto=Amount --map fecha="Date(UTC)" --tipo egreso --categoria Otro
+"""
+import csv
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from db import INTEGER_MONEY_VERSION, connection, get_db_data, migrate, schema_version
+from money import Money, format_money, percent_of
+from queries import COMISION_RETIRO
+
+COMISION_RETIRO_PB = 200  # 2 %, en puntos básicos
+CHUNK_SIZE = 10000
+MAX_REJECTS_KEPT = 100
+
+COLUMNS = ("tipo", "categoria", "monto", "descripcion", "fecha", "creadora", "comision")
+TIPOS = ("ingreso", "egreso")
+DATE_FORMATS = ('%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y', '%Y/%m/%d %H:%M:%S', '%Y/%m/%d')
+FALSE_VALUES = ("0", "no", "false", "n", "f")
+
+INSERT_SQL = """INSERT INTO finanzas (tipo, categoria, monto, descripcion, fecha, creadora_id)
+                VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?)"""
+
+
+def commission_for(monto, fecha=None):
+    """Fila de egreso con la comisión del 2% por retiro de un ingreso de `monto` centavos."""
+    return ('egreso', COMISION_RETIRO, percent_of(monto, COMISION_RETIRO_PB), f"Comisión 2% por retiro de {format_money(monto)}", fecha, None)
+
+
+def parse_date(text):
+    text = text.strip()
+    if not text: return None
+    try:
+        # Vía rápida (en C) para ISO 8601, el formato habitual de las exportaciones.
+        return datetime.fromisoformat(text).strftime('%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            continue
+    raise ValueError(f"fecha no reconocida: {text!r}")
+
+
+class RowError(ValueError):
+    pass
+
+
+class SchemaError(RuntimeError):
+    pass
+
+
+@dataclass
+class ImportResult:
+    leidas: int = 0
+    importadas: int = 0
+    comisiones: int = 0
+    rechazadas: int = 0
+    segundos: float = 0.0
+    rechazos: list = field(default_factory=list)  # (línea, motivo), solo los primeros MAX_REJECTS_KEPT
+
+    @property
+    def filas_por_segundo(self):
+        return self.leidas / self.segundos if self.segundos else 0.0
+
+    def summary(self):
+        return (f"{self.leidas:,} filas leídas, {self.importadas:,} importadas, {self.comisiones:,} comisiones, "
+                f"{self.rechazadas:,} rechazadas en {self.segundos:.2f} s ({self.filas_por_segundo:,.0f} filas/s)")
+
+
+class TransactionImporter:
+    """
+    `column_map` traduce nombres de columna del archivo a los de COLUMNS
+    ({'monto': 'Amount'}); `defaults` da valores para columnas que el archivo no
+    trae ({'tipo': 'egreso', 'categoria': 'Otro'}). Si `create_categories` es
+    True, las categorías desconocidas se crean en vez de rechazar la fila.
+    """
+    def __init__(self, db_path=None, column_map=None, defaults=None, apply_commission=True,
+                 create_categories=False, chunk_size=CHUNK_SIZE, dry_run=False):
+        self.db_path = db_path
+        self.column_map = column_map or {}
+        self.defaults = defaults or {}
+        self.apply_commission = apply_commission
+        self.create_categories = create_categories
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        with connection(db_path) as conn:
+            # Con importes REAL, los centavos se volverían a multiplicar por 100 al migrar.
+            if schema_version(conn) < INTEGER_MONEY_VERSION:
+                raise SchemaError("la base no está migrada a importes en centavos: ejecuta `python db.py init` antes de importar")
+        self.categories = {row[0] for row in get_db_data("SELECT nombre FROM categorias_finanzas", db_path=db_path)}
+        self.creators_by_id = {}; self.creators_by_name = {}
+        for creator_id, nombre in get_db_data("SELECT id, nombre FROM creadoras", db_path=db_path):
+            self.creators_by_id[creator_id] = creator_id
+            self.creators_by_name.setdefault(nombre.strip().lower(), creator_id)
+        self.new_categories = set()
+
+    def value(self, row, column):
+        value = row.get(self.column_map.get(column, column))
+        if value is None or not value.strip(): value = self.defaults.get(column, "")
+        return value.strip()
+
+    def resolve_creator(self, text):
+        if not text: return None
+        if text.isdigit() and int(text) in self.creators_by_id: return int(text)
+        creator_id = self.creators_by_name.get(text.lower())
+        if creator_id is None: raise RowError(f"creadora desconocida: {text!r}")
+        return creator_id
+
+    def parse_row(self, row):
+        """Devuelve las filas a insertar (el movimiento y, si corresponde, su comisión)."""
+        tipo = self.value(row, "tipo").lower()
+        if tipo not in TIPOS: raise RowError(f"tipo inválido: {tipo!r}")
+        categoria = self.value(row, "categoria")
+        if not categoria: raise RowError("falta la categoría")
+        if categoria not in self.categories:
+            if not self.create_categories: raise RowError(f"categoría desconocida: {categoria!r}")
+            self.new_categories.add(categoria); self.categories.add(categoria)
+        try:
+            monto = Money.parse(self.value(row, "monto"))
+        except ValueError:
+            raise RowError(f"monto inválido: {self.value(row, 'monto')!r}")
+        if monto <= 0: raise RowError("el monto debe ser positivo")
+        descripcion = self.value(row, "descripcion")
+        if not descripcion: raise RowError("falta la descripción")
+        try:
+            fecha = parse_date(self.value(row, "fecha"))
+        except ValueError as e:
+            raise RowError(str(e))
+        creadora = self.value(row, "creadora")
+        if creadora and tipo != "ingreso": raise RowError("solo los ingresos se asocian a una creadora")
+        creator_id = self.resolve_creator(creadora)
+        rows = [(tipo, categoria, monto, descripcion, fecha, creator_id)]
+        commission = self.value(row, "comision").lower()
+        if tipo == "ingreso" and self.apply_commission and commission not in FALSE_VALUES:
+            rows.append(commission_for(monto, fecha))
+        return rows
+
+    def run(self, lines, progress=None, rejects_writer=None):
+        """Importa desde un iterable de líneas CSV (p. ej. un archivo abierto)."""
+        result = ImportResult(); started = time.perf_counter()
+        reader = csv.DictReader(lines, dialect=sniff_dialect(lines) if hasattr(lines, "seek") else "excel")
+        if rejects_writer: rejects_writer.writerow(["linea", "motivo"] + list(reader.fieldnames or ()))
+        batch = []; pending_rows = 0
+        for row in reader:
+            result.leidas += 1
+            try:
+                rows = self.parse_row(row)
+            except RowError as e:
+                result.rechazadas += 1
+                if len(result.rechazos) < MAX_REJECTS_KEPT: result.rechazos.append((reader.line_num, str(e)))
+                if rejects_writer: rejects_writer.writerow([reader.line_num, str(e)] + list(row.values()))
+                continue
+            batch.extend(rows); pending_rows += 1
+            result.comisiones += len(rows) - 1
+            if pending_rows >= self.chunk_size:
+                self.commit(batch, result, pending_rows); pending_rows = 0
+                if progress: progress(result.leidas)
+        self.commit(batch, result, pending_rows)
+        if progress: progress(result.leidas)
+        result.segundos = time.perf_counter() - started
+        return result
+
+    def commit(self, batch, result, pending_rows):
+        if batch and not self.dry_run:
+            with connection(self.db_path) as conn:
+                if self.new_categories:
+                    conn.executemany("INSERT OR IGNORE INTO categorias_finanzas (nombre) VALUES (?)", [(name,) for name in self.new_categories])
+                    self.new_categories.clear()
+                conn.executemany(INSERT_SQL, batch)
+                # Commit explícito: aunque la conexión venga prestada de un bloque exterior
+                # (p. ej. el QueryExecutor), cada lote es su propia transacción.
+                conn.commit()
+        result.importadas += pending_rows
+        batch.clear()
+
+
+def sniff_dialect(f):
+    sample = f.read(64 * 1024); f.seek(0)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",;\t|")
+    except csv.Error:
+        return "excel"
+
+
+def import_file(path, rejects_path=None, progress=None, **options):
+    """Importa un archivo CSV; `options` son los argumentos de TransactionImporter."""
+    importer = TransactionImporter(**options)
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if rejects_path:
+            with open(rejects_path, "w", newline="", encoding="utf-8") as rejects:
+                return importer.run(f, progress, csv.writer(rejects))
+        return importer.run(f, progress)
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import sys
+    import db
+    parser = argparse.ArgumentParser(description="Importa movimientos a `finanzas` desde un CSV.")
+    parser.add_argument("archivo")
+    parser.add_argument("--db", default=None, help="ruta de la base de datos SQLite")
+    parser.add_argument("--tipo", choices=TIPOS, help="tipo para las filas que no lo traen")
+    parser.add_argument("--categoria", help="categoría para las filas que no la traen")
+    parser.add_argument("--map", action="append", default=[], metavar="CAMPO=COLUMNA",
+                        help=f"columna del archivo para un campo ({', '.join(COLUMNS)})")
+    parser.add_argument("--sin-comision", action="store_true", help="no añadir la comisión de retiro a los ingresos")
+    parser.add_argument("--crear-categorias", action="store_true", help="crear las categorías que no existan")
+    parser.add_argument("--chunk", type=int, default=CHUNK_SIZE, help="filas por transacción")
+    parser.add_argument("--rechazos", help="CSV donde volcar las filas rechazadas")
+    parser.add_argument("--dry-run", action="store_true", help="solo validar, sin escribir")
+    args = parser.parse_args()
+    column_map = {}
+    for mapping in args.map:
+        name, _, column = mapping.partition("=")
+        if name not in COLUMNS or not column: parser.error(f"--map inválido: {mapping!r}")
+        column_map[name] = column
+    defaults = {key: value for key, value in (("tipo", args.tipo), ("categoria", args.categoria)) if value}
+    # Una ruta mal escrita no debe crear (y migrar) una base vacía.
+    if not os.path.exists(args.db or db.DB_PATH): parser.error(f"no existe la base de datos {args.db or db.DB_PATH} (créala con `python db.py init`)")
+    migrate(args.db)
+    result = import_file(args.archivo, args.rechazos, db_path=args.db, column_map=column_map, defaults=defaults,
+                         apply_commission=not args.sin_comision, create_categories=args.crear_categorias,
+                         chunk_size=args.chunk, dry_run=args.dry_run)
+    print(result.summary())
+    for line, reason in result.rechazos[:20]:
+        print(f"  línea {line}: {reason}")
+    sys.exit(1 if result.rechazadas else 0)
@@ -0,0 +1,187 @@
+"""
+Métricas de las sentencias SQL: latencia, filas, consultas lentas y vistas.
+
+`install()` registra un listener en db.py que, por cada sentencia ejecutada
+en las conexiones del pool (consultas de queries.py, formularios, importador,
+exportación...), suma a su histograma de latencia y a su contador de filas.
+Las sentencias que superan `slow_ms` van al log `finanzas.sql` con su
+`EXPLAIN QUERY PLAN` (cacheado por sentencia para no repetirlo).
+
+Las sentencias se atribuyen a la vista en curso (`with view("mostrar_dashboard")`
+en la app, el endpoint en el servidor), y el QueryExecutor propaga la vista a
+sus workers: así se sabe cuántas sentencias emite cada pantalla o ruta.
+
+Coste por sentencia: dos `perf_counter()`, un lock y unas sumas; se puede dejar
+activo en producción. `prometheus()` da el formato de texto de Prometheus para
+/metrics. Las métricas son por proceso: con varios workers de Gunicorn, cada
+scrape ve las del worker que lo atiende.
+"""
+import contextvars
+import logging
+import os
+import re
+import sqlite3
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import db
+
+# Límites superiores (segundos) de los buckets del histograma de latencia.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SLOW_QUERY_MS = float(os.environ.get("FINANZAS_SLOW_QUERY_MS", "100"))
+# Tope de sentencias distintas con métricas propias; el resto se agrupa en OTHER.
+MAX_STATEMENTS = 300
+MAX_PLANS = 128
+OTHER = "(otras)"
+
+logger = logging.getLogger("finanzas.sql")
+
+_current_view = contextvars.ContextVar("finanzas_sql_view", default=None)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(sql):
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+class StatementStats:
+    __slots__ = ("count", "seconds", "rows", "buckets", "max_seconds")
+
+    def __init__(self):
+        self.count = 0; self.seconds = 0.0; self.rows = 0; self.max_seconds = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)  # el último es +Inf
+
+
+class QueryMetrics:
+    def __init__(self, slow_ms=SLOW_QUERY_MS):
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self._normalized = {}  # texto original -> normalizado, para no repetir la regex
+        self._plans = OrderedDict()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.statements = {}
+            self.views = {}  # vista -> [llamadas, sentencias]
+            self.slow_queries = 0
+
+    def __call__(self, conn, sql, params, seconds, rows):
+        key = self._normalized.get(sql)
+        if key is None:
+            key = normalize(sql)
+            if len(self._normalized) < MAX_STATEMENTS * 4: self._normalized[sql] = key
+        view = _current_view.get()
+        with self._lock:
+            stats = self.statements.get(key)
+            if stats is None:
+                if len(self.statements) >= MAX_STATEMENTS: key = OTHER
+                stats = self.statements.get(key) or self.statements.setdefault(key, StatementStats())
+            stats.count += 1; stats.seconds += seconds
+            if rows > 0: stats.rows += rows
+            if seconds > stats.max_seconds: stats.max_seconds = seconds
+            stats.buckets[bisect_left(BUCKETS, seconds)] += 1
+            if view is not None: self.views.setdefault(view, [0, 0])[1] += 1
+            slow = seconds * 1000 >= self.slow_ms
+            if slow: self.slow_queries += 1
+        if slow: self.log_slow(conn, key, sql, params, seconds, rows, view)
+
+    def log_slow(self, conn, key, sql, params, seconds, rows, view):
+        plan = self._plans.get(key)
+        if plan is None and params is not None:
+            try:
+                # Connection.execute sin instrumentar: el EXPLAIN no cuenta como sentencia.
+                plan = " | ".join(row[3] for row in sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, params))
+            except sqlite3.Error as e:
+                plan = f"(sin plan: {e})"
+            with self._lock:
+                self._plans[key] = plan
+                while len(self._plans) > MAX_PLANS: self._plans.popitem(last=False)
+        logger.warning("consulta lenta: %.1f ms, %d filas, vista %s: %s | plan: %s",
+                       seconds * 1000, max(rows, 0), view or "-", key, plan or "-")
+
+    def view_started(self, name):
+        with self._lock:
+            self.views.setdefault(name, [0, 0])[0] += 1
+
+    def summary(self, limit=20):
+        """Texto con las vistas y las sentencias que más tiempo acumulan."""
+        with self._lock:
+            views = sorted(self.views.items())
+            statements = sorted(self.statements.items(), key=lambda item: -item[1].seconds)[:limit]
+        lines = ["Sentencias por vista:"]
+        lines += [f"  {name:<30} {calls:>6} llamadas {count:>8} sentencias ({count / calls if calls else 0:.1f} por llamada)"
+                  for name, (calls, count) in views]
+        lines.append("Sentencias con más tiempo acumulado:")
+        lines += [f"  {stats.seconds * 1000:10.1f} ms {stats.count:>8}x {stats.rows:>10} filas  {key[:100]}" for key, stats in statements]
+        return "\n".join(lines)
+
+    def prometheus(self):
+        """Métricas en el formato de texto de Prometheus (versión 0.0.4)."""
+        lines = []
+        def header(name, kind, text):
+            lines.append(f"# HELP {name} {text}"); lines.append(f"# TYPE {name} {kind}")
+        with self._lock:
+            statements = [(label_value(key), stats.count, stats.seconds, stats.rows, list(stats.buckets)) for key, stats in self.statements.items()]
+            views = [(label_value(name), calls, count) for name, (calls, count) in self.views.items()]
+            slow = self.slow_queries
+        header("finanzas_sql_duration_seconds", "histogram", "Latencia de cada sentencia SQL (ejecución y lectura de filas).")
+        for label, count, seconds, _, buckets in statements:
+            cumulative = 0
+            for bound, hits in zip(BUCKETS + ("+Inf",), buckets):
+                cumulative += hits
+                lines.append(f'finanzas_sql_duration_seconds_bucket{{statement="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'finanzas_sql_duration_seconds_sum{{statement="{label}"}} {seconds:.6f}')
+            lines.append(f'finanzas_sql_duration_seconds_count{{statement="{label}"}} {count}')
+        header("finanzas_sql_rows_total", "counter", "Filas leídas o escritas por cada sentencia SQL.")
+        for label, _, _, rows, _ in statements:
+            lines.append(f'finanzas_sql_rows_total{{statement="{label}"}} {rows}')
+        header("finanzas_sql_slow_queries_total", "counter", "Sentencias que superaron el umbral de consulta lenta.")
+        lines.append(f"finanzas_sql_slow_queries_total {slow}")
+        header("finanzas_view_calls_total", "counter", "Veces que se abrió cada vista o se atendió cada ruta.")
+        for label, calls, _ in views:
+            lines.append(f'finanzas_view_calls_total{{view="{label}"}} {calls}')
+        header("finanzas_view_statements_total", "counter", "Sentencias SQL emitidas por cada vista o ruta.")
+        for label, _, count in views:
+            lines.append(f'finanzas_view_statements_total{{view="{label}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+def label_value(text):
+    return text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = QueryMetrics()
+
+
+def install(slow_ms=None):
+    """Empieza a medir las sentencias del pool (idempotente)."""
+    if slow_ms is not None: metrics.slow_ms = slow_ms
+    db.add_query_listener(metrics)
+    return metrics
+
+
+def uninstall():
+    db.remove_query_listener(metrics)
+
+
+def enter_view(name):
+    """Atribuye a `name` las sentencias siguientes de este contexto; devuelve el token para `exit_view`."""
+    metrics.view_started(name)
+    return _current_view.set(name)
+
+
+def exit_view(token):
+    _current_view.reset(token)
+
+
+@contextmanager
+def view(name):
+    token = enter_view(name)
+    try:
+        yield
+    finally:
+        exit_view(token)
@@ -0,0 +1,141 @@
+"""
+Importes en centavos y porcentajes en puntos básicos.
+
+La base guarda los importes (`monto`, `sueldo_fijo`, `inversion`, `sueldo`,
+`ventas`) como enteros en centavos y los porcentajes (`porcentaje`, `comision`)
+en puntos básicos: 1 % = 100 pb. Así las sumas en SQLite son aritmética entera
+exacta, y el único redondeo es el de aplicar un porcentaje (`percent_of`), que
+se hace una vez por total y no por fila.
+
+Los textos del usuario y de los CSV se convierten con Decimal, nunca pasando por
+float. Para mostrar, `format_money_many` y `format_columns` formatean una
+página entera de una vez con aritmética entera.
+"""
+import re
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+CENTS = 100
+BASIS_POINTS = 10000  # 100 %
+
+# '1,234' o '12,345,678': comas como separador de miles (grupos de tres cifras, sin punto decimal).
+_THOUSANDS_COMMAS = re.compile(r"-?[1-9]\d{0,2}(,\d{3})+")
+
+
+def to_cents(value):
+    """Centavos (int) de un importe en unidades: '1234.5', 1234.5, Decimal('1234.50')."""
+    if value is None: return None
+    if isinstance(value, int): return value * CENTS
+    try:
+        # repr() de un float es el decimal más corto que lo representa: 0.285 -> '0.285', no 0.28499...
+        amount = Decimal(repr(value)) if isinstance(value, float) else Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f"importe inválido: {value!r}")
+    if not amount.is_finite(): raise ValueError(f"importe inválido: {value!r}")
+    return int((amount * CENTS).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def to_basis_points(percent):
+    """Puntos básicos de un porcentaje: 15 -> 1500, '12.5' -> 1250."""
+    if percent is None: return None
+    return to_cents(percent)  # misma escala: 1 % = 100 pb
+
+
+def round_div(numerator, denominator):
+    """División entera redondeando a la mitad lejos de cero, como ROUND() de SQLite."""
+    quotient, remainder = divmod(abs(numerator), denominator)
+    if remainder * 2 >= denominator: quotient += 1
+    return quotient if numerator >= 0 else -quotient
+
+
+def percent_of(cents, basis_points):
+    """`basis_points` de `cents`, redondeado al centavo."""
+    return round_div(cents * basis_points, BASIS_POINTS)
+
+
+def percent_of_sql(cents, basis_points):
+    """Expresión SQL entera equivalente a `percent_of` (la división entera de SQLite trunca hacia cero)."""
+    product = f"({cents}) * ({basis_points})"
+    return f"((ABS({product}) + {BASIS_POINTS // 2}) / {BASIS_POINTS} * (CASE WHEN {product} < 0 THEN -1 ELSE 1 END))"
+
+
+def to_units(cents):
+    """Importe en unidades como float, para gráficos y JSON."""
+    return None if cents is None else cents / CENTS
+
+
+def decimal_text(cents):
+    """'1234.50': importe sin símbolo ni separadores de miles, para CSV."""
+    if cents is None: return ""
+    sign = "-" if cents < 0 else ""
+    units, rest = divmod(abs(cents), CENTS)
+    return f"{sign}{units}.{rest:02d}"
+
+
+def format_money_many(values, symbol="$"):
+    """Formatea una secuencia de importes en centavos ('$1,234.50'); None queda como ''."""
+    texts = []
+    for cents in values:
+        if cents is None:
+            texts.append(""); continue
+        units, rest = divmod(abs(cents), CENTS)
+        texts.append(f"{'-' if cents < 0 else ''}{symbol}{units:,}.{rest:02d}")
+    return texts
+
+
+def format_money(cents, symbol="$"):
+    return format_money_many((cents,), symbol)[0]
+
+
+def format_percent(basis_points):
+    """'12.5%' para 1250 pb."""
+    return "" if basis_points is None else f"{basis_points / 100:g}%"
+
+
+def format_columns(rows, money=(), percent=()):
+    """
+    Devuelve las filas como listas con las columnas `money` (índices) formateadas
+    como importes y las `percent` como porcentajes, columna a columna.
+    """
+    rows = [list(row) for row in rows]
+    for index in money:
+        for row, text in zip(rows, format_money_many([row[index] for row in rows])):
+            row[index] = text
+    for index in percent:
+        for row in rows:
+            row[index] = format_percent(row[index])
+    return rows
+
+
+class Money(int):
+    """
+    Importe en centavos. Es un int (se suma, compara y guarda en SQLite como tal);
+    `str()` lo muestra como '$1,234.50' y `units` lo da en unidades.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def parse(cls, text):
+        """
+        Acepta '1234.5', '$1,234.50', '1.234,50', '1234,5' o '1,234'. Una coma
+        seguida de grupos de tres cifras es de miles ('1,234' son 1234), no decimal.
+        """
+        text = str(text).strip().replace("$", "").replace(" ", "")
+        if "," in text and "." in text:
+            decimal = "," if text.rfind(",") > text.rfind(".") else "."
+            text = text.replace("." if decimal == "," else ",", "").replace(decimal, ".")
+        elif _THOUSANDS_COMMAS.fullmatch(text):
+            text = text.replace(",", "")
+        elif text.count(",") == 1:
+            text = text.replace(",", ".")
+        if not text: raise ValueError("importe vacío")
+        return cls(to_cents(text))
+
+    @property
+    def units(self):
+        return to_units(int(self))
+
+    def __str__(self):
+        return format_money(int(self))
+
+    def __repr__(self):
+        return f"Money({int(self)})"
@@ -0,0 +1,456 @@
+"""
+Consultas de lectura sobre el libro de finanzas, sin dependencias de interfaz.
+
+Las usan la app de escritorio (app.py), el servidor Flask (server.py) y los
+scripts de benchmarks. Todos los importes que devuelven son enteros en
+centavos (ver money.py); formatearlos es cosa de quien los muestra.
+"""
+import json
+import re
+from collections import namedtuple
+from datetime import datetime, timedelta
+from calendar import monthrange
+
+from db import NOTES_TABLES, get_db_data
+from money import percent_of, percent_of_sql, to_basis_points, to_cents
+from query_cache import cached_query
+
+def get_current_month_income():
+    query = "SELECT SUM(monto) FROM finanzas WHERE tipo = 'ingreso' AND fecha >= ? AND fecha < date(?, '+1 month')"
+    inicio_mes = datetime.now().strftime('%Y-%m-01')
+    result = cached_query(query, (inicio_mes, inicio_mes))
+    return result[0][0] or 0
+
+def get_expense_breakdown():
+    return get_dashboard_snapshot().expense_breakdown
+
+def get_top_creators_by_revenue(limit=5):
+    query = """SELECT c.nombre, SUM(f.monto) FROM creadoras c JOIN finanzas f ON c.id = f.creadora_id
+               WHERE f.tipo = 'ingreso' GROUP BY c.id ORDER BY SUM(f.monto) DESC LIMIT ?"""
+    return cached_query(query, (limit,))
+
+def get_top_creators_by_profitability(limit=5):
+    # Todo entero: la comisión (puntos básicos) se redondea al centavo como money.percent_of.
+    ingresos = "SUM(CASE WHEN f.tipo = 'ingreso' THEN f.monto ELSE 0 END)"
+    query = f"""SELECT c.nombre, {ingresos} - c.sueldo_fijo - {percent_of_sql(ingresos, "c.porcentaje")} - c.inversion as profit
+               FROM creadoras c LEFT JOIN finanzas f ON c.id = f.creadora_id
+               GROUP BY c.id HAVING profit > 0 ORDER BY profit DESC LIMIT ?"""
+    return cached_query(query, (limit,))
+
+def get_expense_by_category(limit=10):
+    query = """
+        SELECT NULLIF(categoria, ''), SUM(monto) as total
+        FROM finanzas
+        WHERE tipo = 'egreso'
+        GROUP BY categoria
+        ORDER BY total DESC
+        LIMIT ?
+    """
+    return cached_query(query, (limit,))
+
+def date_range_conditions(start_date=None, end_date=None, column="fecha"):
+    """
+    Traduce un rango de fechas YYYY-MM-DD (ambos extremos incluidos) a predicados
+    de rango sobre la columna sin envolverla en funciones, para que SQLite pueda
+    resolverlos con los índices sobre `fecha`.
+    """
+    conditions = []; params = []
+    if start_date:
+        conditions.append(f"{column} >= ?")
+        params.append(start_date)
+    if end_date:
+        conditions.append(f"{column} < date(?, '+1 day')")
+        params.append(end_date)
+    return conditions, params
+
+def split_month_range(start_date=None, end_date=None):
+    """
+    Divide un rango de fechas YYYY-MM-DD en los meses completos que cubre, que se
+    leen de `finanzas_mensual`, y los tramos de meses parciales de los extremos
+    como rangos (desde, hasta) semiabiertos, que se leen de `finanzas`.
+    """
+    start = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+    end = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+    first_full = start.strftime('%Y-%m') if start else None
+    last_full = end.strftime('%Y-%m') if end else None
+    partial = []
+    if start and start.day != 1:
+        next_month = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+        first_full = next_month.strftime('%Y-%m')
+        partial.append((start, min(next_month, end + timedelta(days=1)) if end else next_month))
+    if end and end.day != monthrange(end.year, end.month)[1]:
+        last_full = (end.replace(day=1) - timedelta(days=1)).strftime('%Y-%m')
+        month_start = max(end.replace(day=1), start) if start else end.replace(day=1)
+        if not partial or partial[0][1] <= month_start: partial.append((month_start, end + timedelta(days=1)))
+    partial = [(desde.isoformat(), hasta.isoformat()) for desde, hasta in partial if desde < hasta]
+    return first_full, last_full, partial
+
+def get_monthly_financial_trend(start_date=None, end_date=None):
+    """
+    Tendencia mensual de ingresos y egresos. Los meses completos salen del resumen
+    `finanzas_mensual`; solo los meses recortados por el rango tocan `finanzas`.
+    """
+    first_full, last_full, partial = split_month_range(start_date, end_date)
+    conditions = []; params = []
+    if first_full:
+        conditions.append("mes >= ?"); params.append(first_full)
+    if last_full:
+        conditions.append("mes <= ?"); params.append(last_full)
+    where = (" WHERE " + " AND ".join(conditions)) if conditions else ""
+    parts = [f"""SELECT mes, SUM(CASE WHEN tipo = 'ingreso' THEN total ELSE 0 END) as ingresos, SUM(CASE WHEN tipo = 'egreso' THEN total ELSE 0 END) as egresos
+                 FROM finanzas_mensual{where} GROUP BY mes"""]
+    for desde, hasta in partial:
+        parts.append("""SELECT mes, SUM(CASE WHEN tipo = 'ingreso' THEN monto ELSE 0 END), SUM(CASE WHEN tipo = 'egreso' THEN monto ELSE 0 END)
+                        FROM finanzas WHERE mes = substr(?, 1, 7) AND fecha >= ? AND fecha < ? GROUP BY mes""")
+        params += [desde, desde, hasta]
+    query = "SELECT mes, SUM(ingresos), SUM(egresos) FROM (" + " UNION ALL ".join(parts) + ") GROUP BY mes ORDER BY mes ASC"
+    data = cached_query(query, tuple(params))
+    return {"months": [row[0] for row in data], "incomes": [row[1] for row in data], "expenses": [row[2] for row in data]}
+
+def get_distinct_months():
+    """Obtiene una lista de meses únicos (YYYY-MM) de la base de datos."""
+    query = "SELECT DISTINCT mes FROM finanzas_mensual ORDER BY mes DESC"
+    data = cached_query(query)
+    return [row[0] for row in data]
+
+def get_financial_data_by_date(start_date, end_date):
+    conditions, params = date_range_conditions(start_date, end_date, column="f.fecha")
+    where = (" WHERE " + " AND ".join(conditions)) if conditions else ""
+    query = f"""SELECT f.id, f.tipo, f.categoria, f.monto, f.descripcion, STRFTIME('%Y-%m-%d %H:%M', f.fecha), c.nombre
+               FROM finanzas f LEFT JOIN creadoras c ON f.creadora_id = c.id{where} ORDER BY f.fecha DESC"""
+    return get_db_data(query, tuple(params))
+
+# --- SNAPSHOT DEL DASHBOARD (UNA SOLA PASADA SOBRE EL LIBRO) ---
+COMISION_RETIRO = 'Comisión Retiro Cripto'
+CATEGORIAS_EXCLUIDAS_OTROS = (COMISION_RETIRO, 'Sueldo', 'Inversion Creadora')
+
+# namedtuple y no dataclass: importar `dataclasses` duplica el arranque de la CLI.
+DashboardSnapshot = namedtuple("DashboardSnapshot", "ingresos_mes expense_breakdown expense_by_category top_revenue top_profitability")
+
+def get_dashboard_snapshot(top_limit=5, category_limit=10):
+    """
+    Calcula todos los KPIs y series del dashboard en una sola pasada sobre el
+    resumen `finanzas_mensual` (agrupado por tipo, categoría y creadora) y
+    combina el resultado con las tablas pequeñas de creadoras y empleados.
+    """
+    mes_actual = datetime.now().strftime('%Y-%m')
+    ledger = cached_query("""
+        SELECT tipo, NULLIF(categoria, ''), NULLIF(creadora_id, 0), SUM(total),
+               SUM(CASE WHEN mes = ? THEN total ELSE 0 END)
+        FROM finanzas_mensual GROUP BY tipo, categoria, creadora_id""", (mes_actual,))
+    creators = cached_query("SELECT id, nombre, sueldo_fijo, porcentaje, inversion FROM creadoras")
+    sueldos_empleados = cached_query("SELECT SUM(sueldo) FROM empleados")[0][0] or 0
+
+    ingresos_mes = 0; comisiones_retiro = 0; otros_egresos = 0
+    income_by_creator = {}; expense_by_category = {}
+    for tipo, categoria, creadora_id, total, total_mes in ledger:
+        total = total or 0
+        if categoria == COMISION_RETIRO: comisiones_retiro += total
+        if tipo == 'ingreso':
+            ingresos_mes += total_mes or 0
+            if creadora_id is not None:
+                income_by_creator[creadora_id] = income_by_creator.get(creadora_id, 0) + total
+        elif tipo == 'egreso':
+            expense_by_category[categoria] = expense_by_category.get(categoria, 0) + total
+            if categoria is not None and categoria not in CATEGORIAS_EXCLUIDAS_OTROS: otros_egresos += total
+
+    sueldos_creadoras = 0; inversiones = 0; comisiones_creadoras = 0
+    revenue = []; profitability = []
+    for creator_id, nombre, sueldo_fijo, porcentaje, inversion in creators:
+        sueldos_creadoras += sueldo_fijo or 0; inversiones += inversion or 0
+        ingresos = income_by_creator.get(creator_id)
+        if ingresos is not None:
+            revenue.append((nombre, ingresos))
+            if porcentaje and porcentaje > 0: comisiones_creadoras += percent_of(ingresos, porcentaje)
+        if None not in (sueldo_fijo, porcentaje, inversion):
+            ingresos = ingresos or 0
+            profit = ingresos - sueldo_fijo - percent_of(ingresos, porcentaje) - inversion
+            if profit > 0: profitability.append((nombre, profit))
+
+    expense_breakdown = {"Sueldos": sueldos_creadoras + sueldos_empleados, "Comisión Creadoras": comisiones_creadoras,
+                         "Comisión Retiros": comisiones_retiro, "Inversiones": inversiones, "Otros Egresos": otros_egresos}
+    by_value = lambda item: item[1]
+    return DashboardSnapshot(
+        ingresos_mes=ingresos_mes,
+        expense_breakdown=expense_breakdown,
+        expense_by_category=sorted(expense_by_category.items(), key=by_value, reverse=True)[:category_limit],
+        top_revenue=sorted(revenue, key=by_value, reverse=True)[:top_limit],
+        top_profitability=sorted(profitability, key=by_value, reverse=True)[:top_limit])
+
+# --- NUEVA FUNCIÓN PARA GASTOS DE SOCIOS ---
+def get_partner_expenses():
+    """Sueldos de creadoras y empleados más comisiones de creadoras, agrupados por socio en una sola consulta."""
+    query = f"""
+        WITH sueldos_creadoras AS (
+            SELECT socio_id, SUM(sueldo_fijo) AS total FROM creadoras
+            WHERE socio_id IS NOT NULL GROUP BY socio_id),
+        sueldos_empleados AS (
+            SELECT socio_id, SUM(sueldo) AS total FROM empleados
+            WHERE socio_id IS NOT NULL GROUP BY socio_id),
+        comisiones_por_creadora AS (
+            -- Suma entera exacta por creadora y un único redondeo, igual que el dashboard.
+            SELECT c.socio_id, {percent_of_sql("SUM(f.monto)", "c.porcentaje")} AS comision
+            FROM finanzas f JOIN creadoras c ON f.creadora_id = c.id
+            WHERE f.tipo = 'ingreso' AND c.porcentaje > 0 AND c.socio_id IS NOT NULL
+            GROUP BY c.id),
+        comisiones_creadoras AS (
+            SELECT socio_id, SUM(comision) AS total FROM comisiones_por_creadora GROUP BY socio_id)
+        SELECT s.nombre, IFNULL(sc.total, 0) + IFNULL(se.total, 0) + IFNULL(cc.total, 0) AS total_socio
+        FROM socios s
+        LEFT JOIN sueldos_creadoras sc ON sc.socio_id = s.id
+        LEFT JOIN sueldos_empleados se ON se.socio_id = s.id
+        LEFT JOIN comisiones_creadoras cc ON cc.socio_id = s.id
+        WHERE total_socio > 0 ORDER BY total_socio DESC, s.id ASC"""
+    return cached_query(query)
+
+# --- PAGINACIÓN KEYSET PARA LAS TABLAS ---
+PAGE_SIZE = 200
+
+def get_keyset_page(select_from, order_by, cursor=None, direction="next", limit=PAGE_SIZE, descending=False, group_by="", conditions=(), condition_params=()):
+    """
+    Devuelve una página de `select_from` ordenada por las columnas `order_by`
+    (la última debe ser única, p. ej. el id) empezando después de `cursor`
+    (direction="next") o antes de él ("prev"), siempre en orden de
+    visualización. Usa comparaciones de row values para que SQLite avance por
+    el índice en lugar de saltar filas con OFFSET. `conditions` son filtros
+    adicionales que se combinan con AND.
+    """
+    ascending = (direction == "next") != descending
+    where_parts = list(conditions); params = list(condition_params)
+    if cursor is not None:
+        where_parts.append(f"({', '.join(order_by)}) {'>' if ascending else '<'} ({', '.join('?' * len(order_by))})")
+        params += list(cursor)
+    where = (" WHERE " + " AND ".join(where_parts)) if where_parts else ""
+    order = ", ".join(f"{column} {'ASC' if ascending else 'DESC'}" for column in order_by)
+    rows = get_db_data(f"{select_from}{where} {group_by} ORDER BY {order} LIMIT ?", tuple(params + [limit]))
+    return rows if direction == "next" else rows[::-1]
+
+# --- PANTALLAS DE GESTIÓN (app.py) ---
+# Cada pantalla declara sus columnas y, por campo, la clave de orden (columnas SQL
+# que preceden al id en la clave keyset) y el filtro admitido: expresión y tipo
+# (ver filter_condition) y, si se filtra por otra tabla, (tabla, columna con su id). En `finanzas` cada orden sigue un índice (ver
+# db.SORT_INDEXES) para no ordenar el libro entero en cada página; las otras
+# tablas son pequeñas y se ordenan por cualquier columna.
+ManageView = namedtuple("ManageView", "columns source row_id sort_keys filters default_sort")
+
+# Los ingresos de cada creadora salen del resumen mensual, no de sumar `finanzas`.
+CREADORAS_VIEW = ManageView(
+    columns="c.id, c.nombre, IFNULL(t.ingresos, 0), c.sueldo_fijo, c.porcentaje, c.inversion, s.nombre",
+    source="""creadoras c
+    LEFT JOIN (SELECT creadora_id, SUM(total) AS ingresos FROM finanzas_mensual WHERE tipo = 'ingreso' GROUP BY creadora_id) t ON t.creadora_id = c.id
+    LEFT JOIN socios s ON c.socio_id = s.id""",
+    row_id="c.id",
+    sort_keys={"id": (), "nombre": ("c.nombre",), "ingresos": ("IFNULL(t.ingresos, 0)",), "sueldo_fijo": ("IFNULL(c.sueldo_fijo, 0)",),
+               "porcentaje": ("IFNULL(c.porcentaje, 0)",), "inversion": ("IFNULL(c.inversion, 0)",), "socio": ("IFNULL(s.nombre, '')",)},
+    filters={"nombre": ("c.nombre", "texto"), "ingresos": ("IFNULL(t.ingresos, 0)", "importe"), "sueldo_fijo": ("c.sueldo_fijo", "importe"),
+             "porcentaje": ("c.porcentaje", "porcentaje"), "inversion": ("c.inversion", "importe"), "socio": ("s.nombre", "texto")},
+    default_sort=("nombre", False))
+
+EMPLEADOS_VIEW = ManageView(
+    columns="e.id, e.nombre, e.rol, e.sueldo, e.ventas, e.comision, s.nombre",
+    source="empleados e LEFT JOIN socios s ON e.socio_id = s.id",
+    row_id="e.id",
+    sort_keys={"id": (), "nombre": ("e.nombre",), "rol": ("IFNULL(e.rol, '')",), "sueldo": ("IFNULL(e.sueldo, 0)",),
+               "ventas": ("IFNULL(e.ventas, 0)",), "comision": ("IFNULL(e.comision, 0)",), "socio": ("IFNULL(s.nombre, '')",)},
+    filters={"nombre": ("e.nombre", "texto"), "rol": ("e.rol", "texto"), "sueldo": ("e.sueldo", "importe"),
+             "ventas": ("e.ventas", "importe"), "comision": ("e.comision", "porcentaje"), "socio": ("s.nombre", "texto")},
+    default_sort=("nombre", False))
+
+# Sin orden por creadora ni descripción (no hay índice que lo sirva; la
+# descripción se busca con search_finanzas_view_page). Tipo y categoría se
+# desempatan con las columnas siguientes de sus índices.
+FINANZAS_VIEW = ManageView(
+    columns="f.id, f.tipo, f.categoria, f.monto, c.nombre, f.descripcion, STRFTIME('%Y-%m-%d %H:%M', f.fecha)",
+    source="finanzas f LEFT JOIN creadoras c ON f.creadora_id = c.id",
+    row_id="f.id",
+    sort_keys={"id": (), "tipo": ("f.tipo", "f.fecha"), "categoria": ("f.categoria", "f.tipo", "f.monto"),
+               "monto": ("f.monto",), "fecha": ("f.fecha",)},
+    filters={"tipo": ("f.tipo", "exacto"), "categoria": ("f.categoria", "exacto"), "monto": ("f.monto", "importe"),
+             "creadora": ("nombre", "texto", ("creadoras", "f.creadora_id")), "fecha": ("f.fecha", "fecha")},
+    default_sort=("fecha", True))
+
+FILTER_HINTS = {
+    "texto": "Texto que contiene (sin distinguir mayúsculas)",
+    "exacto": "Valor exacto",
+    "importe": "Importe: 100, >100, <=50 o 100..200",
+    "porcentaje": "Porcentaje: 10, >10 o 5..20",
+    "fecha": "Fecha: 2025, 2025-06, 2025-06-15 o 2025-01..2025-03",
+}
+_COMPARISON = re.compile(r"(<=|>=|<|>|=)?\s*(\S+)")
+_PERIOD = re.compile(r"\d{4}(-\d{2}(-\d{2})?)?")
+
+def filter_condition(expression, kind, text):
+    """
+    (condición SQL, parámetros) para filtrar `expression` por el texto del
+    usuario según `kind` (ver FILTER_HINTS). Lanza ValueError si no se entiende.
+    Los filtros de importe y fecha son rangos, para que sirvan los índices.
+    """
+    text = text.strip()
+    if kind == "texto":
+        escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return f"{expression} LIKE ? ESCAPE '\\'", [f"%{escaped}%"]
+    if kind == "exacto":
+        return f"{expression} = ?", [text]
+    if kind == "fecha":
+        # Un periodo es un prefijo de 'YYYY-MM-DD HH:MM:SS': '~' va después de cualquier carácter de una fecha.
+        start, _, end = text.partition("..")
+        start, end = start.strip(), (end or start).strip()
+        if not (_PERIOD.fullmatch(start) and _PERIOD.fullmatch(end)): raise ValueError(f"fecha no válida: {text!r}")
+        return f"{expression} >= ? AND {expression} < ?", [start, end + "~"]
+    convert = to_basis_points if kind == "porcentaje" else to_cents
+    if ".." in text:
+        low, high = (convert(part) for part in text.split("..", 1))
+        return f"{expression} BETWEEN ? AND ?", [low, high]
+    match = _COMPARISON.fullmatch(text)
+    if not match: raise ValueError(f"filtro no válido: {text!r}")
+    return f"{expression} {match.group(1) or '='} ?", [convert(match.group(2))]
+
+LOOKUP_INLINE_IDS = 100
+
+def view_conditions(view, filters):
+    """Condiciones y parámetros de `filters` ({campo: texto}) sobre la pantalla `view`."""
+    conditions, params = [], []
+    for field, text in (filters or {}).items():
+        expression, kind, *lookup = view.filters[field]
+        condition, values = filter_condition(expression, kind, text)
+        if lookup:
+            # Se resuelve antes a una lista de ids: con ella a la vista, SQLite elige bien
+            # entre el índice de la otra tabla y el del orden (con una subconsulta no sabe).
+            # Pasadas las LOOKUP_INLINE_IDS, la lista va como un solo parámetro JSON: no choca con el límite de parámetros de SQLite.
+            table, column = lookup[0]
+            ids = [row[0] for row in get_db_data(f"SELECT id FROM {table} WHERE {condition}", tuple(values))]
+            if len(ids) > LOOKUP_INLINE_IDS:
+                condition, values = f"{column} IN (SELECT value FROM json_each(?))", [json.dumps(ids)]
+            else:
+                condition, values = (f"{column} IN ({', '.join('?' * len(ids))})" if ids else "0"), ids
+        conditions.append(condition); params += values
+    return conditions, params
+
+def get_view_page(view, cursor=None, direction="next", limit=PAGE_SIZE, sort=None, descending=False, filters=None):
+    """
+    Página de la pantalla `view` ordenada por el campo `sort` (por defecto el de
+    la pantalla) y filtrada por `filters`. Cada fila lleva detrás de las columnas
+    de la pantalla su clave keyset, que es lo que espera `cursor`.
+    """
+    if sort is None: sort, descending = view.default_sort
+    keys = view.sort_keys[sort] + (view.row_id,)
+    conditions, params = view_conditions(view, filters)
+    return get_keyset_page(f"SELECT {view.columns}, {', '.join(keys)} FROM {view.source}", keys, cursor, direction, limit, descending,
+                           conditions=conditions, condition_params=params)
+
+def get_creadoras_view_page(cursor=None, direction="next", limit=PAGE_SIZE, sort=None, descending=False, filters=None):
+    """Página de la pantalla de creadoras, con sus ingresos totales, por nombre salvo otro orden."""
+    return get_view_page(CREADORAS_VIEW, cursor, direction, limit, sort, descending, filters)
+
+def get_empleados_view_page(cursor=None, direction="next", limit=PAGE_SIZE, sort=None, descending=False, filters=None):
+    return get_view_page(EMPLEADOS_VIEW, cursor, direction, limit, sort, descending, filters)
+
+def get_finanzas_view_page(cursor=None, direction="next", limit=PAGE_SIZE, sort=None, descending=False, filters=None):
+    """Página de la pantalla de finanzas, del movimiento más reciente al más antiguo salvo otro orden."""
+    return get_view_page(FINANZAS_VIEW, cursor, direction, limit, sort, descending, filters)
+
+# --- LIBRO DE FINANZAS PAGINADO (API) ---
+FINANZAS_FIELDS = {
+    "id": "f.id", "tipo": "f.tipo", "categoria": "f.categoria", "monto": "f.monto",
+    "descripcion": "f.descripcion", "fecha": "f.fecha", "creadora_id": "f.creadora_id", "creadora": "c.nombre"}
+
+def finanzas_filters(start_date=None, end_date=None, tipo=None, categoria=None, creadora_id=None):
+    """Condiciones (sobre el alias `f`) y parámetros para los filtros del libro."""
+    conditions, params = date_range_conditions(start_date, end_date, column="f.fecha")
+    for column, value in (("f.tipo", tipo), ("f.categoria", categoria), ("f.creadora_id", creadora_id)):
+        if value is not None:
+            conditions.append(f"{column} = ?"); params.append(value)
+    return conditions, params
+
+def finanzas_select(fields, prefix="", source="finanzas f"):
+    columns = ", ".join(FINANZAS_FIELDS[field] for field in fields)
+    join = " LEFT JOIN creadoras c ON f.creadora_id = c.id" if "creadora" in fields else ""
+    return f"SELECT {prefix}{columns} FROM {source}{join}"
+
+def get_finanzas_page(fields=tuple(FINANZAS_FIELDS), cursor=None, limit=PAGE_SIZE, start_date=None, end_date=None, tipo=None, categoria=None, creadora_id=None):
+    """
+    Página de movimientos, del más reciente al más antiguo, con los filtros dados.
+    Devuelve (filas como dicts con solo `fields`, cursor de la siguiente página
+    o None). El cursor es la clave (fecha, id) de la última fila.
+    """
+    conditions, params = finanzas_filters(start_date, end_date, tipo, categoria, creadora_id)
+    select_from = finanzas_select(fields, prefix="f.fecha, f.id, ")
+    rows = get_keyset_page(select_from, ("f.fecha", "f.id"), cursor, "next", limit + 1, descending=True,
+                           conditions=conditions, condition_params=params)
+    next_cursor = (rows[limit - 1][0], rows[limit - 1][1]) if len(rows) > limit else None
+    return [dict(zip(fields, row[2:])) for row in rows[:limit]], next_cursor
+
+# --- BÚSQUEDA DE TEXTO (FTS5) ---
+# bm25 se calcula para cada coincidencia, y una palabra frecuente puede aparecer en
+# millones de movimientos: si hay más de SEARCH_WINDOW coincidencias, solo se
+# ordenan por relevancia las SEARCH_WINDOW más recientes, que FTS5 encuentra
+# recorriendo su índice por id (con menos, se ordenan todas). La API y la
+# pantalla de finanzas avisan cuando se aplica ese recorte.
+# (El peso de cada término en bm25 sí cuenta todas sus coincidencias, una vez por
+# consulta: unos 25 ms para una palabra presente en medio millón de movimientos.)
+SEARCH_WINDOW = 5000
+SEARCH_SOURCE = "finanzas_fts JOIN finanzas f ON f.id = finanzas_fts.rowid"
+SEARCH_ORDER = ("finanzas_fts.rank", "f.id")
+NOTES_BY_CODE = {code: table for table, code in NOTES_TABLES.items()}
+
+FINANZAS_SEARCH_VIEW = f"SELECT {FINANZAS_VIEW.columns}, finanzas_fts.rank, f.id FROM {SEARCH_SOURCE} LEFT JOIN creadoras c ON f.creadora_id = c.id"
+
+def fts_query(text):
+    """
+    Consulta FTS5 para un texto del usuario: todas sus palabras, la última como
+    prefijo (la que se está escribiendo). None si no tiene ninguna. Un prefijo
+    obliga a FTS5 a fusionar las listas de todos los términos que empiezan así,
+    por eso no se aplica a las palabras ya completas.
+    """
+    words = [f'"{word}"' for word in re.findall(r"\w+", text or "")]
+    if not words: return None
+    words[-1] += "*"
+    return " ".join(words)
+
+def search_window_start(match):
+    """Menor id de las SEARCH_WINDOW coincidencias más recientes de `match` (0 si no hay más que esas: se ordenan todas)."""
+    # La siguiente coincidencia dice si de verdad queda alguna fuera de la ventana.
+    rows = get_db_data("SELECT rowid FROM finanzas_fts WHERE finanzas_fts MATCH ? ORDER BY rowid DESC LIMIT 2 OFFSET ?", (match, SEARCH_WINDOW - 1))
+    return rows[0][0] if len(rows) == 2 else 0
+
+def search_finanzas_view_page(match, since, cursor=None, direction="next", limit=PAGE_SIZE, filters=None):
+    """
+    Página de resultados de la pantalla de finanzas para `match` (ver fts_query),
+    de más a menos relevante, con los filtros de la pantalla. `since`
+    (search_window_start) se calcula una vez por búsqueda para que la ventana no
+    cambie al paginar.
+    """
+    conditions, params = view_conditions(FINANZAS_VIEW, filters)
+    return get_keyset_page(FINANZAS_SEARCH_VIEW, SEARCH_ORDER, cursor, direction, limit,
+                           conditions=["finanzas_fts MATCH ?", "finanzas_fts.rowid >= ?"] + conditions, condition_params=[match, since] + params)
+
+def search_finanzas(text, fields=tuple(FINANZAS_FIELDS), cursor=None, limit=PAGE_SIZE, start_date=None, end_date=None, tipo=None, categoria=None, creadora_id=None):
+    """
+    Movimientos cuya descripción o categoría coincide con `text`, de más a menos
+    relevante, con los mismos filtros que get_finanzas_page. Devuelve (filas como dicts con solo `fields`, cursor de la
+    siguiente página o None, si solo se ordenaron las SEARCH_WINDOW
+    coincidencias más recientes); el cursor es (rank, id, inicio de la ventana).
+    """
+    match = fts_query(text)
+    if match is None: return [], None, False
+    since = cursor[2] if cursor else search_window_start(match)
+    select_from = finanzas_select(fields, prefix="finanzas_fts.rank, f.id, ", source=SEARCH_SOURCE)
+    conditions, params = finanzas_filters(start_date, end_date, tipo, categoria, creadora_id)
+    rows = get_keyset_page(select_from, SEARCH_ORDER, cursor[:2] if cursor else None, "next", limit + 1,
+                           conditions=["finanzas_fts MATCH ?", "finanzas_fts.rowid >= ?"] + conditions, condition_params=[match, since] + params)
+    next_cursor = (rows[limit - 1][0], rows[limit - 1][1], since) if len(rows) > limit else None
+    return [dict(zip(fields, row[2:])) for row in rows[:limit]], next_cursor, since > 0
+
+def search_notes(text, limit=20, offset=0):
+    """[(tabla, id, nombre, fragmento)] de creadoras, empleados y socios cuyo nombre o notas coinciden con `text`, por relevancia."""
+    match = fts_query(text)
+    if match is None: return []
+    rows = get_db_data("""SELECT rowid, nombre, snippet(notas_fts, 1, '[', ']', '…', 12) FROM notas_fts
+                          WHERE notas_fts MATCH ? ORDER BY rank LIMIT ? OFFSET ?""", (match, limit, offset))
+    return [(NOTES_BY_CODE[rowid % 4], rowid // 4, nombre, fragmento) for rowid, nombre, fragmento in rows]
+
+def get_table_versions(*tables):
+    """Versión y fecha de la última escritura (UTC) de cada tabla, según `table_versions`."""
+    placeholders = ", ".join("?" * len(tables))
+    rows = get_db_data(f"SELECT tabla, version, modificado FROM table_versions WHERE tabla IN ({placeholders})", tables)
+    return {tabla: (version, modificado) for tabla, version, modificado in rows}
@@ -0,0 +1,164 @@
+"""
+Caché de resultados de consultas de solo lectura.
+
+Cada resultado se guarda con la versión de las tablas que lee (`table_versions`,
+mantenida por triggers en db.py). Una escritura en `finanzas` invalida solo las
+consultas sobre `finanzas` o sus derivadas; las listas de socios o categorías
+siguen en caché. Para no leer las versiones en cada consulta se vigila
+`PRAGMA data_version` en una conexión propia: solo cambia cuando alguna otra
+conexión, de este u otro proceso, hace commit.
+"""
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import db
+from db import VERSIONED_TABLES, connection
+
+MAX_ENTRIES = 256
+
+# Tablas cuyo contenido se deriva de otra y comparten su versión.
+DERIVED_TABLES = {"finanzas_mensual": "finanzas"}
+
+
+def tables_in_query(conn, query, params=()):
+    """
+    Tablas versionadas que lee una consulta, según el autorizador de SQLite al
+    preparar su EXPLAIN (sin ejecutarla). Resuelve CTEs, subconsultas y joins.
+    Si lee alguna tabla sin versión devuelve una tupla vacía: no se puede cachear.
+    """
+    tables = set()
+    def authorizer(action, arg1, arg2, db_name, source):
+        if action == sqlite3.SQLITE_READ and arg1:
+            tables.add(DERIVED_TABLES.get(arg1, arg1))
+        return sqlite3.SQLITE_OK
+    conn.set_authorizer(authorizer)
+    try:
+        conn.execute("EXPLAIN " + query, params).fetchall()
+    finally:
+        conn.set_authorizer(None)
+    if not tables.issubset(VERSIONED_TABLES): return ()
+    return tuple(sorted(tables))
+
+
+def freeze_params(params):
+    if isinstance(params, dict): return tuple(sorted(params.items()))
+    return tuple(params)
+
+
+class QueryCache:
+    def __init__(self, db_path, max_entries=MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._tables = {}
+        self._lock = threading.Lock()
+        self._watch = None
+        self._data_version = None
+        self._versions = {}
+        self.hits = 0; self.misses = 0; self.evictions = 0
+
+    def table_versions(self):
+        with self._lock:
+            if self._watch is None:
+                self._watch = sqlite3.connect(self.db_path, check_same_thread=False)
+            data_version = self._watch.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self._data_version:
+                try:
+                    self._versions = dict(self._watch.execute("SELECT tabla, version FROM table_versions"))
+                except sqlite3.OperationalError:
+                    self._versions = {}
+                self._data_version = data_version
+            return self._versions
+
+    def get(self, query, params=()):
+        with connection(self.db_path) as conn:
+            tables = self._tables.get(query)
+            if tables is None: tables = self._tables[query] = tables_in_query(conn, query, params)
+            # Dentro de una transacción con escrituras propias sin confirmar la versión no es fiable.
+            if not tables or conn.in_transaction:
+                return conn.execute(query, params).fetchall()
+            current = self.table_versions()
+            if not all(table in current for table in tables):
+                return conn.execute(query, params).fetchall()
+            # Las versiones se leen antes que los datos: en el peor caso se guardan datos más nuevos que su versión.
+            versions = tuple(current[table] for table in tables)
+            key = (query, freeze_params(params))
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == versions:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return list(entry[1])
+                self.misses += 1
+            rows = conn.execute(query, params).fetchall()
+        with self._lock:
+            self._entries[key] = (versions, rows)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return list(rows)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": self.hits,
+                    "misses": self.misses, "evictions": self.evictions, "hit_ratio": self.hits / total if total else 0.0}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0; self.misses = 0; self.evictions = 0
+
+    def close(self):
+        with self._lock:
+            if self._watch is not None: self._watch.close()
+            self._watch = None; self._data_version = None
+            self._entries.clear()
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(db_path=None):
+    path = db_path or db.DB_PATH
+    cache = _caches.get(path)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.setdefault(path, QueryCache(path))
+    return cache
+
+
+# Un proceso de vida corta (la CLI) no amortiza la caché: puede desactivarla.
+ENABLED = True
+
+
+def cached_query(query, params=(), db_path=None):
+    """Como `db.get_db_data`, pero reutiliza el resultado mientras no cambien las tablas que lee."""
+    if not ENABLED: return db.get_db_data(query, params, db_path)
+    return get_cache(db_path).get(query, params)
+
+
+def cache_stats(db_path=None):
+    return get_cache(db_path).stats()
+
+
+def close_caches():
+    with _caches_lock:
+        for cache in _caches.values():
+            cache.close()
+        _caches.clear()
+
+
+def _forget_caches_after_fork():
+    # Igual que los pools de db.py: la conexión de vigilancia heredada no se toca.
+    global _caches_lock
+    _caches.clear()
+    _caches_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_caches_after_fork)
@@ -1,52 +1,327 @@
+"""
+Servidor web de finanzas.
 
-from flask import Flask, render_template, request, redirect, url_for, flash
-from forms import *
-import sqlite3
+`create_app()` construye la aplicación Flask y prepara el esquema una sola vez.
+Con Gunicorn (ver gunicorn.conf.py) la fábrica se ejecuta en el proceso maestro
+gracias a `preload_app`, y cada worker abre su propio pool de conexiones después
+del fork: ninguna conexión SQLite cruza de un proceso a otro.
 
-app = Flask(__name__)
-app.secret_key = 'your_secret_key'
+Las rutas /api/* exponen en JSON los mismos datos que las pantallas de app.py,
+con los importes en unidades (la base los guarda en centavos, ver money.py).
 
-DATABASE = 'db_ofmkevin.db'
+Por Socket.IO, un cliente se suscribe a las tablas que muestra ('suscribir') y
+recibe los cambios como eventos 'cambios' (ver changefeed.py) en lugar de volver
+a pedir la página entera. Cada worker emite a sus propios clientes a partir de la
+tabla `cambios` de la base, así que funciona con varios workers sin cola externa
+siempre que el cliente use solo el transporte websocket (el long-polling
+necesitaría sesiones fijas a un worker).
+"""
+import base64
+import binascii
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from calendar import monthrange
 
-def get_db_connection():
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+from flask import Flask, Response, current_app, g, render_template, request, jsonify, abort, stream_with_context
+from flask_socketio import SocketIO, emit, join_room
 
-@app.route('/')
-def index():
-    return render_template('index.html')
+import changefeed
+import db
+import export
+import instrumentation
+import query_cache
+import queries
+from money import to_units
 
-@app.route('/dashboard')
-def dashboard():
-    conn = get_db_connection()
-    # Cargar datos de ejemplo
-    finances = conn.execute('SELECT * FROM finances').fetchall()
-    conn.close()
-    return render_template('dashboard.html', finances=finances)
+MAX_LIMIT = 100
+FINANZAS_MAX_LIMIT = 500
 
-@app.route('/reports')
-def reports():
-    return render_template('reports.html')
+socketio = SocketIO()
 
-@app.route('/manage/creators')
-def manage_creators():
-    return render_template('manage_creators.html')
 
-@app.route('/manage/employees')
-def manage_employees():
-    return render_template('manage_employees.html')
+def int_arg(name, default, minimum=1, maximum=MAX_LIMIT):
+    value = request.args.get(name, default)
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        abort(400, description=f"'{name}' debe ser un número entero")
+    if not minimum <= value <= maximum:
+        abort(400, description=f"'{name}' debe estar entre {minimum} y {maximum}")
+    return value
 
-@app.route('/manage/partners')
-def manage_partners():
-    return render_template('manage_partners.html')
 
-@app.route('/finances')
-def finances():
-    conn = get_db_connection()
-    finances = conn.execute('SELECT * FROM finances').fetchall()
-    conn.close()
-    return render_template('finances.html', finances=finances)
+def date_arg(name, end=False):
+    """Lee una fecha YYYY-MM-DD o un mes YYYY-MM (primer o último día, según `end`)."""
+    value = request.args.get(name)
+    if not value: return None
+    for fmt in ('%Y-%m-%d', '%Y-%m'):
+        try:
+            parsed = datetime.strptime(value, fmt).date()
+            break
+        except ValueError:
+            continue
+    else:
+        abort(400, description=f"'{name}' debe tener el formato YYYY-MM-DD o YYYY-MM")
+    if fmt == '%Y-%m' and end: parsed = parsed.replace(day=monthrange(parsed.year, parsed.month)[1])
+    return parsed.isoformat()
+
+
+def series(rows, label, value):
+    """Pares (etiqueta, centavos) como objetos JSON con el importe en unidades."""
+    return [{label: row[0], value: to_units(row[1])} for row in rows]
+
+
+def encode_cursor(cursor):
+    return base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode().rstrip('=')
+
+
+def decode_cursor(value, types=(str, int)):
+    """Cursor de encode_cursor con un valor de cada tipo de `types` (por defecto (fecha, id))."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)))
+        if len(values) != len(types): raise ValueError(value)
+        return tuple(kind(item) for kind, item in zip(types, values))
+    except (binascii.Error, ValueError, TypeError):
+        abort(400, description="'cursor' no es válido")
+
+
+def ledger_validators(tables):
+    """
+    ETag y Last-Modified de una respuesta que depende de `tables`: la versión de
+    cada tabla más los parámetros de la petición. No hace falta ejecutar la
+    consulta para saber si el cliente ya tiene la página.
+    """
+    versions = queries.get_table_versions(*tables)
+    token = '|'.join(f"{table}:{versions.get(table, (0, None))[0]}" for table in tables) + '|' + request.query_string.decode()
+    etag = hashlib.sha1(token.encode()).hexdigest()[:20]
+    modified = [datetime.strptime(stamp, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+                for version, stamp in versions.values() if stamp]
+    return etag, max(modified) if modified else None
+
+
+def finanzas_args():
+    """Campos (?campos=) y filtros comunes a las rutas del libro de finanzas."""
+    fields = tuple(field for field in request.args.get('campos', '').split(',') if field) or tuple(queries.FINANZAS_FIELDS)
+    unknown = [field for field in fields if field not in queries.FINANZAS_FIELDS]
+    if unknown: abort(400, description=f"Campos desconocidos: {', '.join(unknown)}")
+    tipo = request.args.get('tipo')
+    if tipo not in (None, 'ingreso', 'egreso'): abort(400, description="'tipo' debe ser 'ingreso' o 'egreso'")
+    creadora = request.args.get('creadora')
+    if creadora is not None and not creadora.isdigit(): abort(400, description="'creadora' debe ser un id numérico")
+    return fields, {'start_date': date_arg('desde'), 'end_date': date_arg('hasta', end=True), 'tipo': tipo,
+                    'categoria': request.args.get('categoria'), 'creadora_id': int(creadora) if creadora else None}
+
+
+def snapshot_with_change_id(read):
+    """
+    (cambio, resultado de `read()`) leídos en la misma transacción: el resultado
+    refleja exactamente los cambios hasta `cambio`, y el cliente aplica los
+    eventos posteriores. Dentro de la transacción no se usa la caché de consultas.
+    """
+    with db.connection() as conn:
+        conn.execute("BEGIN")
+        return changefeed.latest_change_id(conn), read()
+
+
+@socketio.on('connect')
+def on_connect(auth=None):
+    # La tarea se arranca aquí y no en create_app: con preload_app, create_app corre en el maestro.
+    changefeed.start(socketio, current_app.config['DATABASE'])
+
+
+@socketio.on('suscribir')
+def on_subscribe(data=None):
+    """
+    {'tablas': [...], 'desde': id}: une al cliente a las salas de esas tablas y,
+    con 'desde', le reenvía lo que se perdió. Responde con el último id de cambio.
+    Un evento puede llegar dos veces (reenvío y emisión en curso): el cliente
+    descarta los ids que ya aplicó.
+    """
+    data = data if isinstance(data, dict) else {}
+    tablas = [tabla for tabla in data.get('tablas') or ('finanzas',) if tabla in db.CHANGE_FEED_COLUMNS]
+    for tabla in tablas: join_room(tabla)
+    desde = data.get('desde')
+    if not isinstance(desde, int) or desde < 0:
+        with db.connection() as conn:
+            return {'tablas': tablas, 'cambio': changefeed.latest_change_id(conn)}
+    events, cambio, complete = changefeed.changes_since(desde)
+    if not complete:
+        for tabla in tablas: emit('recargar', {'tabla': tabla, 'cambio': cambio})
+    else:
+        events = [event for event in events if event['tabla'] in tablas]
+        if events: emit('cambios', events)
+    return {'tablas': tablas, 'cambio': cambio}
+
+
+def init_worker():
+    """Abre la primera conexión del pool del worker para que no la pague la primera petición."""
+    with db.connection():
+        pass
+
+
+def create_app(db_path=None, config=None):
+    app = Flask(__name__)
+    app.config.update(
+        SECRET_KEY=os.environ.get('SECRET_KEY', 'your_secret_key'),
+        DATABASE=db_path or os.environ.get('FINANZAS_DB', db.DB_PATH))
+    if config: app.config.update(config)
+
+    # Las consultas de queries.py usan la base por defecto del proceso.
+    db.DB_PATH = app.config['DATABASE']
+    db.init_db()
+    # El maestro no debe llevarse conexiones abiertas a los workers.
+    db.close_all(); query_cache.close_caches()
+    socketio.init_app(app, async_mode=os.environ.get('SOCKETIO_ASYNC_MODE'))
+    instrumentation.install()
+
+    # Cada petición es una "vista": sus sentencias SQL se cuentan bajo el nombre del endpoint.
+    @app.before_request
+    def start_sql_view():
+        if request.endpoint not in (None, 'metrics', 'static'):
+            g.sql_view = instrumentation.enter_view(request.endpoint)
+
+    @app.teardown_request
+    def end_sql_view(error=None):
+        token = g.pop('sql_view', None)
+        if token is not None: instrumentation.exit_view(token)
+
+    @app.errorhandler(400)
+    def bad_request(error):
+        return jsonify(error=error.description), 400
+
+    @app.route('/')
+    def index():
+        return render_template('index.html')
+
+    @app.route('/dashboard')
+    @app.route('/api/dashboard')
+    def dashboard():
+        read = lambda: queries.get_dashboard_snapshot(top_limit=int_arg('top', 5), category_limit=int_arg('categorias', 10))
+        live = request.args.get('cambio') in ('1', 'true')
+        cambio, snapshot = snapshot_with_change_id(read) if live else (None, read())
+        data = dict(
+            ingresos_mes=to_units(snapshot.ingresos_mes),
+            gastos={concepto: to_units(total) for concepto, total in snapshot.expense_breakdown.items()},
+            gastos_por_categoria=series(snapshot.expense_by_category, 'categoria', 'total'),
+            top_ingresos=series(snapshot.top_revenue, 'nombre', 'ingresos'),
+            top_rentabilidad=series(snapshot.top_profitability, 'nombre', 'rentabilidad'))
+        # ?cambio=1 (dashboard en vivo): id desde el que aplicar eventos y mes de `ingresos_mes`.
+        if live: data.update(cambio=cambio, mes=datetime.now().strftime('%Y-%m'))
+        return jsonify(data)
+
+    @app.route('/reports')
+    @app.route('/api/trend')
+    def trend():
+        # ?desde=&hasta= como fecha o como mes; sin ellos, toda la historia.
+        data = queries.get_monthly_financial_trend(date_arg('desde'), date_arg('hasta', end=True))
+        return jsonify([{'mes': mes, 'ingresos': to_units(ingresos), 'egresos': to_units(egresos)}
+                        for mes, ingresos, egresos in zip(data['months'], data['incomes'], data['expenses'])])
+
+    @app.route('/api/months')
+    def months():
+        return jsonify(queries.get_distinct_months())
+
+    @app.route('/api/top-creators')
+    def top_creators():
+        by = request.args.get('by', 'revenue')
+        if by == 'revenue':
+            return jsonify(series(queries.get_top_creators_by_revenue(int_arg('limit', 5)), 'nombre', 'ingresos'))
+        if by == 'profitability':
+            return jsonify(series(queries.get_top_creators_by_profitability(int_arg('limit', 5)), 'nombre', 'rentabilidad'))
+        abort(400, description="'by' debe ser 'revenue' o 'profitability'")
+
+    @app.route('/api/expenses/categories')
+    def expenses_by_category():
+        return jsonify(series(queries.get_expense_by_category(int_arg('limit', 10)), 'categoria', 'total'))
+
+    @app.route('/api/partner-expenses')
+    def partner_expenses():
+        return jsonify(series(queries.get_partner_expenses(), 'socio', 'total'))
+
+    @app.route('/api/finanzas')
+    def finanzas():
+        fields, filters = finanzas_args()
+        cursor = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+        limit = int_arg('limit', 100, maximum=FINANZAS_MAX_LIMIT)
+
+        # Validadores antes de consultar: una página sin cambios responde 304 sin tocar `finanzas`.
+        etag, last_modified = ledger_validators(('finanzas', 'creadoras') if 'creadora' in fields else ('finanzas',))
+        not_modified = (request.if_none_match.contains_weak(etag) if request.if_none_match
+                        else last_modified is not None and request.if_modified_since is not None and last_modified <= request.if_modified_since)
+        if not_modified:
+            response = app.response_class(status=304)
+        else:
+            rows, next_cursor = queries.get_finanzas_page(fields, cursor, limit, **filters)
+            if 'monto' in fields:
+                for row in rows: row['monto'] = to_units(row['monto'])
+            response = jsonify(items=rows, next_cursor=encode_cursor(next_cursor) if next_cursor else None)
+        response.set_etag(etag, weak=True)
+        if last_modified: response.last_modified = last_modified
+        response.cache_control.no_cache = True
+        response.cache_control.private = True
+        return response
+
+    @app.route('/api/finanzas/buscar')
+    def finanzas_buscar():
+        # ?q=texto&limit=&cursor=&campos= y los filtros de /api/finanzas: movimientos por relevancia (descripción y
+        # categoría). Con más de `ventana` coincidencias, `solo_recientes` indica que solo se ordenaron las `ventana` más recientes.
+        fields, filters = finanzas_args()
+        text = request.args.get('q', '').strip()
+        if queries.fts_query(text) is None: abort(400, description="'q' debe tener al menos una palabra")
+        cursor = decode_cursor(request.args['cursor'], (float, int, int)) if request.args.get('cursor') else None
+        rows, next_cursor, recent_only = queries.search_finanzas(text, fields, cursor, int_arg('limit', 50, maximum=FINANZAS_MAX_LIMIT), **filters)
+        if 'monto' in fields:
+            for row in rows: row['monto'] = to_units(row['monto'])
+        return jsonify(items=rows, next_cursor=encode_cursor(next_cursor) if next_cursor else None,
+                       solo_recientes=recent_only, ventana=queries.SEARCH_WINDOW)
+
+    @app.route('/api/notas/buscar')
+    def notas_buscar():
+        # ?q=texto&limit=&offset=: creadoras, empleados y socios por nombre o notas.
+        text = request.args.get('q', '').strip()
+        if queries.fts_query(text) is None: abort(400, description="'q' debe tener al menos una palabra")
+        hits = queries.search_notes(text, int_arg('limit', 20, maximum=100), int_arg('offset', 0, minimum=0, maximum=10_000))
+        return jsonify(items=[{'tabla': tabla, 'id': row_id, 'nombre': nombre, 'fragmento': fragmento}
+                              for tabla, row_id, nombre, fragmento in hits])
+
+    @app.route('/api/cambios')
+    def cambios():
+        # Alternativa a Socket.IO por sondeo: ?desde=<último id aplicado>&tablas=finanzas,creadoras
+        tablas = [tabla for tabla in request.args.get('tablas', '').split(',') if tabla] or list(db.CHANGE_FEED_COLUMNS)
+        unknown = [tabla for tabla in tablas if tabla not in db.CHANGE_FEED_COLUMNS]
+        if unknown: abort(400, description=f"Tablas desconocidas: {', '.join(unknown)}")
+        if not request.args.get('desde'):
+            with db.connection() as conn:
+                return jsonify(cambios=[], cambio=changefeed.latest_change_id(conn), recargar=False)
+        events, cambio, complete = changefeed.changes_since(int_arg('desde', 0, minimum=0, maximum=2**63 - 1))
+        return jsonify(cambios=[event for event in events if event['tabla'] in tablas], cambio=cambio, recargar=not complete)
+
+    @app.route('/metrics')
+    def metrics():
+        # Métricas de este worker en formato Prometheus, más las de la caché de consultas.
+        cache = query_cache.cache_stats()
+        lines = [instrumentation.metrics.prometheus()]
+        for name, key, kind in (('finanzas_query_cache_hits_total', 'hits', 'counter'), ('finanzas_query_cache_misses_total', 'misses', 'counter'),
+                                ('finanzas_query_cache_evictions_total', 'evictions', 'counter'), ('finanzas_query_cache_entries', 'entries', 'gauge')):
+            lines.append(f"# TYPE {name} {kind}\n{name} {cache[key]}\n")
+        return Response(''.join(lines), mimetype='text/plain; version=0.0.4')
+
+    @app.route('/api/finanzas/export')
+    def finanzas_export():
+        # ?formato=csv|ndjson&gzip=1 más los mismos filtros y campos que /api/finanzas.
+        fields, filters = finanzas_args()
+        fmt = request.args.get('formato', 'csv')
+        if fmt not in export.FORMATS: abort(400, description=f"'formato' debe ser uno de: {', '.join(export.FORMATS)}")
+        compress = request.args.get('gzip') in ('1', 'true')
+        filename = f"finanzas.{fmt}" + ('.gz' if compress else '')
+        chunks = export.export_chunks(fmt, fields, compress, **filters)
+        return Response(stream_with_context(chunks), mimetype='application/gzip' if compress else export.MIMETYPES[fmt],
+                        headers={'Content-Disposition': f'attachment; filename="{filename}"', 'Cache-Control': 'no-store'})
+
+    return app
+
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    socketio.run(create_app(), debug=os.environ.get('FLASK_DEBUG') == '1', allow_unsafe_werkzeug=True)
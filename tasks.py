@@ -0,0 +1,116 @@
+"""
+Ejecución de consultas fuera del hilo de Tk.
+
+Tkinter no es seguro entre hilos: los workers solo ejecutan la consulta y
+dejan el resultado en una cola, y el hilo principal la vacía con `after()`
+para llamar a los callbacks. Al navegar a otra vista se cancelan las tareas
+pendientes; las que ya están ejecutando SQL se interrumpen y su resultado se
+descarta.
+"""
+import contextvars
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from db import connection
+
+
+class Task:
+    def __init__(self, func, args, kwargs, on_done, on_error, generation, db_path, persistent=False):
+        self.func = func; self.args = args; self.kwargs = kwargs
+        self.on_done = on_done; self.on_error = on_error
+        self.generation = generation; self.db_path = db_path
+        self.persistent = persistent
+        self.cancelled = False
+        self.future = None
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            if self.future is not None: self.future.cancel()
+            if self._conn is not None: self._conn.interrupt()
+
+
+class QueryExecutor:
+    def __init__(self, root, max_workers=3, poll_ms=25):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="finanzas-db")
+        self._results = queue.SimpleQueue()
+        self._pending = set()
+        self._generation = 0
+        self._polling = False
+
+    def submit(self, func, *args, on_done=None, on_error=None, db_path=None, persistent=False, **kwargs):
+        """
+        Ejecuta `func(*args, **kwargs)` en un worker y llama a `on_done(resultado)`
+        (o a `on_error(excepción)`) en el hilo de Tk. Toda la tarea comparte una
+        misma conexión del pool, así que puede interrumpirse al cancelarla.
+        Las tareas `persistent` (p. ej. una exportación) sobreviven al cambio de
+        vista y solo se detienen con `Task.cancel()`.
+        """
+        task = Task(func, args, kwargs, on_done, on_error, self._generation, db_path, persistent)
+        self._pending.add(task)
+        # La tarea corre con el contexto de quien la encola (p. ej. la vista de instrumentation.py).
+        task.future = self._pool.submit(contextvars.copy_context().run, self._run, task)
+        # Cancelada antes de empezar, `_run` no llega a ejecutarse: se informa desde aquí.
+        task.future.add_done_callback(lambda future: future.cancelled() and self._results.put((task, None, None)))
+        self._schedule_poll()
+        return task
+
+    def cancel_pending(self):
+        """Descarta todas las tareas en curso; se llama al cambiar de vista."""
+        self._generation += 1
+        for task in list(self._pending):
+            if task.persistent: continue
+            task.cancel()
+            self._pending.discard(task)
+
+    def shutdown(self):
+        for task in list(self._pending): task.cancel()
+        self._pending.clear()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, task):
+        # Siempre se informa de la tarea, aunque se cancele, para que `_poll` la saque de `_pending`.
+        outcome = (task, None, None)
+        try:
+            if task.cancelled: return
+            with connection(task.db_path) as conn:
+                with task._lock:
+                    if task.cancelled: return
+                    task._conn = conn
+                try:
+                    outcome = (task, task.func(*task.args, **task.kwargs), None)
+                finally:
+                    with task._lock: task._conn = None
+        except sqlite3.OperationalError as e:
+            if not task.cancelled: outcome = (task, None, e)
+        except Exception as e:
+            outcome = (task, None, e)
+        finally:
+            self._results.put(outcome)
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        self._polling = False
+        while True:
+            try:
+                task, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending.discard(task)
+            if task.cancelled or (task.generation != self._generation and not task.persistent): continue
+            if error is not None:
+                if task.on_error: task.on_error(error)
+                else: self.root.report_callback_exception(type(error), error, error.__traceback__)
+            elif task.on_done:
+                task.on_done(result)
+        if self._pending: self._schedule_poll()
@@ -0,0 +1,73 @@
+"""Fixtures comunes: bases temporales, al día o con el esquema antiguo sin migrar."""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+import query_cache
+
+# Esquema de las bases creadas antes de las migraciones (`PRAGMA user_version` 0),
+# con los importes en unidades REAL.
+LEGACY_SCHEMA = (
+    """CREATE TABLE socios (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL UNIQUE, notas TEXT DEFAULT '')""",
+    """CREATE TABLE creadoras (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL, sueldo_fijo REAL DEFAULT 0,
+        porcentaje REAL DEFAULT 0, notas TEXT DEFAULT '', inversion REAL DEFAULT 0, socio_id INTEGER REFERENCES socios(id) ON DELETE SET NULL)""",
+    """CREATE TABLE empleados (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL, rol TEXT, sueldo REAL DEFAULT 0,
+        ventas REAL DEFAULT 0, comision REAL DEFAULT 0, notas TEXT DEFAULT '', socio_id INTEGER REFERENCES socios(id) ON DELETE SET NULL)""",
+    """CREATE TABLE finanzas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, tipo TEXT NOT NULL, categoria TEXT, monto REAL DEFAULT 0,
+        descripcion TEXT, fecha DATETIME DEFAULT CURRENT_TIMESTAMP,
+        creadora_id INTEGER, FOREIGN KEY (creadora_id) REFERENCES creadoras (id) ON DELETE SET NULL)""",
+    """CREATE TABLE categorias_finanzas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL UNIQUE)""",
+)
+
+
+def create_legacy_db(path, version=0):
+    """Base con el esquema antiguo, llevada con las migraciones hasta `version` (sin pasar de ahí)."""
+    conn = sqlite3.connect(path)
+    try:
+        for statement in LEGACY_SCHEMA:
+            conn.execute(statement)
+        conn.executemany("INSERT INTO categorias_finanzas (nombre) VALUES (?)", [(name,) for name in db.DEFAULT_CATEGORIES])
+        for step in db.MIGRATIONS[:version]:
+            step(conn.cursor())
+        conn.execute(f"PRAGMA user_version = {version}")
+        conn.commit()
+    finally:
+        conn.close()
+    return path
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(monkeypatch):
+    # Cada prueba usa su propia base: nada de pools, cachés ni interruptores globales compartidos.
+    monkeypatch.setattr(query_cache, "ENABLED", query_cache.ENABLED)
+    monkeypatch.setattr(db, "DB_PATH", db.DB_PATH)
+    yield
+    query_cache.close_caches()
+    db.close_all()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Base vacía con el esquema al día, también como `db.DB_PATH`."""
+    path = str(tmp_path / "finanzas.db")
+    db.DB_PATH = path
+    db.init_db(path)
+    return path
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    """Base sin migrar (versión 0), también como `db.DB_PATH`."""
+    path = create_legacy_db(str(tmp_path / "legacy.db"))
+    db.DB_PATH = path
+    return path
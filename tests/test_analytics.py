@@ -0,0 +1,116 @@
+"""LedgerArrays.refresh: tras cualquier mezcla de escrituras, los arrays coinciden con una carga desde cero."""
+import numpy as np
+import pytest
+
+import db
+from analytics import LedgerArrays, percent_of_array
+from money import percent_of
+
+
+def columns(ledger):
+    # Los códigos de categoría dependen del orden de carga: se comparan los nombres.
+    return {"ids": ledger.ids.tolist(), "amount": ledger.amount.tolist(), "day": ledger.day.tolist(),
+            "category": [ledger.categories[code] for code in ledger.category], "creator": ledger.creator.tolist(),
+            "is_income": ledger.is_income.tolist()}
+
+
+def assert_matches_fresh_load(ledger, path):
+    fresh = LedgerArrays(path)
+    fresh.refresh()
+    assert columns(ledger) == columns(fresh)
+    assert ledger.amount.dtype == np.int64
+
+
+def insert(conn, tipo="ingreso", categoria="Otro", monto=100, fecha="2024-01-01 10:00:00", creadora_id=None):
+    return conn.execute("INSERT INTO finanzas (tipo, categoria, monto, fecha, creadora_id) VALUES (?, ?, ?, ?, ?)",
+                        (tipo, categoria, monto, fecha, creadora_id)).lastrowid
+
+
+@pytest.fixture
+def ledger(db_path):
+    with db.connection(db_path) as conn:
+        conn.execute("INSERT INTO creadoras (nombre) VALUES ('Luna')")
+        for day in range(1, 11):
+            insert(conn, "ingreso" if day % 2 else "egreso", "Otro" if day % 3 else "Sueldo", day * 1000, f"2024-01-{day:02d} 10:00:00", 1 if day % 2 else None)
+    ledger = LedgerArrays(db_path)
+    assert ledger.refresh() == "recargada"
+    return ledger
+
+
+def test_refresh_without_changes(ledger, db_path):
+    assert ledger.refresh() == "igual"
+    assert_matches_fresh_load(ledger, db_path)
+
+
+def test_refresh_appends_inserts(ledger, db_path):
+    with db.connection(db_path) as conn:
+        insert(conn, categoria="Marketing", monto=1234, fecha="2024-02-01 09:00:00", creadora_id=1)
+        insert(conn, "egreso", monto=99)
+    assert ledger.refresh() == "añadidas"
+    assert "Marketing" in ledger.categories
+    assert_matches_fresh_load(ledger, db_path)
+
+
+def test_refresh_after_insert_and_update_of_old_row(ledger, db_path):
+    with db.connection(db_path) as conn:
+        insert(conn, monto=500, fecha="2024-03-01 10:00:00")
+        conn.execute("UPDATE finanzas SET monto = 7777, categoria = 'Marketing', fecha = '2023-12-31 10:00:00' WHERE id = 2")
+    assert ledger.refresh() == "recargada"
+    assert_matches_fresh_load(ledger, db_path)
+    assert ledger.amount[ledger.ids == 2].tolist() == [7777]
+
+
+def test_refresh_after_insert_and_delete_of_new_row(ledger, db_path):
+    with db.connection(db_path) as conn:
+        kept = insert(conn, monto=300)
+        dropped = insert(conn, monto=400)
+        conn.execute("DELETE FROM finanzas WHERE id = ?", (dropped,))
+    assert ledger.refresh() == "recargada"
+    assert_matches_fresh_load(ledger, db_path)
+    assert ledger.ids[-1] == kept
+
+
+def test_refresh_after_delete_and_reinsert(ledger, db_path):
+    # Tantas escrituras como filas nuevas no basta: el borrado también cuenta.
+    with db.connection(db_path) as conn:
+        conn.execute("DELETE FROM finanzas WHERE id = 5")
+        insert(conn, monto=600)
+    ledger.refresh()
+    assert_matches_fresh_load(ledger, db_path)
+
+
+def test_refresh_after_mixed_writes_in_several_rounds(ledger, db_path):
+    with db.connection(db_path) as conn:
+        insert(conn, monto=1)
+    ledger.refresh()
+    with db.connection(db_path) as conn:
+        new = insert(conn, monto=2)
+        conn.execute("UPDATE finanzas SET tipo = 'egreso' WHERE id = ?", (new,))
+        insert(conn, monto=3, creadora_id=1)
+    ledger.refresh()
+    assert_matches_fresh_load(ledger, db_path)
+    with db.connection(db_path) as conn:
+        insert(conn, monto=4)
+    assert ledger.refresh() == "añadidas"
+    assert_matches_fresh_load(ledger, db_path)
+
+
+def test_percent_of_array_matches_percent_of():
+    cents = np.arange(-20000, 20001, 37, dtype=np.int64)
+    for basis_points in (0, 1, 50, 100, 1250, 1500, 5000, 10000):
+        assert percent_of_array(cents, basis_points).tolist() == [percent_of(int(value), basis_points) for value in cents]
+    # Medios centavos exactos, en ambos signos.
+    assert percent_of_array(np.array([50, -50, 150, -150, 250, -250]), 100).tolist() == [1, -1, 2, -2, 3, -3]
+
+
+def test_creator_profitability_rounds_commission_like_percent_of(db_path):
+    with db.connection(db_path) as conn:
+        conn.executemany("INSERT INTO creadoras (nombre, sueldo_fijo, porcentaje, inversion) VALUES (?, 0, ?, 0)",
+                         [("Reembolsos", 100), ("Medio centavo", 100), ("Mixta", 1250)])
+        for creadora_id, montos in ((1, (-150, -0)), (2, (150,)), (3, (12345, -20000))):
+            for monto in montos: insert(conn, monto=monto, creadora_id=creadora_id)
+    ledger = LedgerArrays(db_path); ledger.refresh()
+    result = {name: (income, commission) for name, income, commission, _ in ledger.creator_profitability()}
+    assert result == {name: (income, percent_of(income, rate)) for name, income, rate in
+                      (("Reembolsos", -150, 100), ("Medio centavo", 150, 100), ("Mixta", -7655, 1250))}
+    assert result["Reembolsos"] == (-150, -2) and result["Mixta"] == (-7655, -957)
@@ -0,0 +1,50 @@
+import json
+import sqlite3
+
+import db
+import finanzas
+
+
+def insert_legacy_income(path, monto, fecha):
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("INSERT INTO finanzas (tipo, categoria, monto, descripcion, fecha) VALUES ('ingreso', 'Ingreso General', ?, 'Pago', ?)", (monto, fecha))
+    conn.close()
+
+
+def test_report_migrates_legacy_database(legacy_db, capsys):
+    insert_legacy_income(legacy_db, 100.25, "2025-01-15 10:00:00")
+    assert finanzas.main(["--db", legacy_db, "report", "monthly", "--from", "2025-01", "--to", "2025-01"]) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report == [{"mes": "2025-01", "ingresos": 100.25, "egresos": 0.0, "beneficio": 100.25}]
+
+
+def test_import_into_legacy_database_converts_amounts_once(legacy_db, tmp_path):
+    insert_legacy_income(legacy_db, 100.25, "2025-01-15 10:00:00")
+    csv_path = tmp_path / "pagos.csv"
+    csv_path.write_text("tipo,categoria,monto,descripcion,fecha\ningreso,Ingreso General,100.25,Pago importado,2025-01-20\n", encoding="utf-8")
+    assert finanzas.main(["--db", legacy_db, "import", str(csv_path), "--sin-comision"]) == 0
+    # El importador puede tener conexiones del pool abiertas: se leen por una nueva.
+    db.close_all()
+    conn = sqlite3.connect(legacy_db)
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == db.SCHEMA_VERSION
+        assert conn.execute("SELECT descripcion, monto FROM finanzas ORDER BY id").fetchall() == [("Pago", 10025), ("Pago importado", 10025)]
+    finally:
+        conn.close()
+
+
+def test_missing_database_is_an_error(tmp_path, capsys):
+    path = tmp_path / "mal_escrita.db"
+    assert finanzas.main(["--db", str(path), "report", "months"]) == 2
+    assert "no existe la base de datos" in capsys.readouterr().err
+    assert not path.exists()
+
+
+def test_init_creates_the_database(tmp_path, capsys):
+    path = str(tmp_path / "nueva.db")
+    assert finanzas.main(["--db", path, "init"]) == 0
+    assert finanzas.main(["--db", path, "report", "months"]) == 0
+    assert json.loads(capsys.readouterr().out) == []
+    with db.connection(path) as conn:
+        assert db.schema_version(conn) == db.SCHEMA_VERSION
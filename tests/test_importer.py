@@ -0,0 +1,52 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+import db
+from conftest import create_legacy_db
+from importer import SchemaError, TransactionImporter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSV = "tipo,categoria,monto,descripcion,fecha\ningreso,Ingreso General,100.25,Pago importado,2025-01-20\n"
+
+
+def test_standalone_importer_migrates_legacy_database(legacy_db, tmp_path):
+    conn = sqlite3.connect(legacy_db)
+    with conn:
+        conn.execute("INSERT INTO finanzas (tipo, categoria, monto, descripcion, fecha) VALUES ('egreso', 'Otro', 12.5, 'Viejo', '2025-01-02')")
+    conn.close()
+    csv_path = tmp_path / "pagos.csv"
+    csv_path.write_text(CSV, encoding="utf-8")
+    subprocess.run([sys.executable, os.path.join(ROOT, "importer.py"), str(csv_path), "--db", legacy_db, "--sin-comision"],
+                   cwd=tmp_path, check=True, capture_output=True)
+    conn = sqlite3.connect(legacy_db)
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == db.SCHEMA_VERSION
+        assert conn.execute("SELECT descripcion, monto FROM finanzas ORDER BY id").fetchall() == [("Viejo", 1250), ("Pago importado", 10025)]
+    finally:
+        conn.close()
+
+
+def test_importer_refuses_database_with_real_amounts(tmp_path):
+    path = create_legacy_db(str(tmp_path / "v3.db"), version=db.INTEGER_MONEY_VERSION - 1)
+    with pytest.raises(SchemaError):
+        TransactionImporter(db_path=path)
+    conn = sqlite3.connect(path)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM finanzas").fetchone()[0] == 0
+    finally:
+        conn.close()
+
+
+def test_importer_script_refuses_missing_database(tmp_path):
+    csv_path = tmp_path / "pagos.csv"
+    csv_path.write_text(CSV, encoding="utf-8")
+    missing = tmp_path / "mal_escrita.db"
+    result = subprocess.run([sys.executable, os.path.join(ROOT, "importer.py"), str(csv_path), "--db", str(missing)],
+                            cwd=tmp_path, capture_output=True, text=True)
+    assert result.returncode == 2
+    assert "no existe la base de datos" in result.stderr
+    assert not missing.exists()
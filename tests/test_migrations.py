@@ -0,0 +1,119 @@
+"""Migraciones: de bases en versiones anteriores (importes REAL, NULL en columnas de orden) hasta el esquema actual."""
+import sqlite3
+
+import pytest
+
+import db
+import queries
+from conftest import create_legacy_db
+
+
+@pytest.fixture
+def version_3_db(tmp_path):
+    """Base con resumen mensual y versiones de tablas, pero con importes REAL y filas ya borradas."""
+    path = create_legacy_db(str(tmp_path / "v3.db"), version=3)
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO socios (nombre) VALUES ('Ana')")
+    conn.executemany("INSERT INTO creadoras (id, nombre, sueldo_fijo, porcentaje, inversion, socio_id) VALUES (?, ?, ?, ?, ?, 1)",
+                     [(1, "Luna", 300.5, 12.5, 0.285), (2, "Sol", 0, 15, 1000), (9, "Borrada", 0, 0, 0)])
+    conn.executemany("INSERT INTO empleados (id, nombre, rol, sueldo, ventas, comision, socio_id) VALUES (?, ?, 'Chatter', ?, ?, ?, 1)",
+                     [(1, "Eva", 800.1, 1234.56, 7.5), (5, "Borrado", 0, 0, 0)])
+    conn.executemany("INSERT INTO finanzas (id, tipo, categoria, monto, descripcion, fecha, creadora_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     [(1, "ingreso", "Ingreso General", 100.25, "Pago", "2024-01-05 10:00:00", 1),
+                      (2, "egreso", "Marketing", 0.285, "Anuncio", "2024-01-06 10:00:00", None),
+                      (3, "ingreso", "Ingreso General", 1.005, "Propina", "2024-02-01 10:00:00", 2),
+                      (40, "egreso", "Otro", 5, "Borrado", "2024-02-02 10:00:00", None)])
+    # Los ids más altos se borran: AUTOINCREMENT no debe volver a darlos tras la migración.
+    conn.execute("DELETE FROM creadoras WHERE id = 9")
+    conn.execute("DELETE FROM empleados WHERE id = 5")
+    conn.execute("DELETE FROM finanzas WHERE id = 40")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_migrates_version_3_to_current(version_3_db):
+    assert db.migrate(version_3_db) == db.SCHEMA_VERSION - 3
+    with db.connection(version_3_db) as conn:
+        assert db.schema_version(conn) == db.SCHEMA_VERSION
+        assert conn.execute("SELECT id, sueldo_fijo, porcentaje, inversion FROM creadoras ORDER BY id").fetchall() == [(1, 30050, 1250, 29), (2, 0, 1500, 100000)]
+        assert conn.execute("SELECT id, sueldo, ventas, comision FROM empleados").fetchall() == [(1, 80010, 123456, 750)]
+        assert conn.execute("SELECT id, monto, typeof(monto) FROM finanzas ORDER BY id").fetchall() == [(1, 10025, "integer"), (2, 29, "integer"), (3, 101, "integer")]
+        # El resumen mensual se recalcula con los importes en centavos.
+        assert conn.execute("SELECT mes, tipo, total, cantidad FROM finanzas_mensual ORDER BY mes, tipo").fetchall() == [
+            ("2024-01", "egreso", 29, 1), ("2024-01", "ingreso", 10025, 1), ("2024-02", "ingreso", 101, 1)]
+        assert conn.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+        assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+
+
+def test_migration_keeps_autoincrement_sequences(version_3_db):
+    db.migrate(version_3_db)
+    with db.connection(version_3_db) as conn:
+        assert dict(conn.execute("SELECT name, seq FROM sqlite_sequence WHERE name IN ('creadoras', 'empleados', 'finanzas')").fetchall()) == {
+            "creadoras": 9, "empleados": 5, "finanzas": 40}
+        assert conn.execute("INSERT INTO creadoras (nombre) VALUES ('Nueva')").lastrowid == 10
+        assert conn.execute("INSERT INTO empleados (nombre) VALUES ('Nuevo')").lastrowid == 6
+        assert conn.execute("INSERT INTO finanzas (tipo, categoria, monto) VALUES ('ingreso', 'Otro', 100)").lastrowid == 41
+        conn.rollback()
+
+
+def test_migrate_is_idempotent(version_3_db):
+    db.migrate(version_3_db)
+    with db.connection(version_3_db) as conn:
+        before = conn.execute("SELECT id, monto FROM finanzas ORDER BY id").fetchall()
+    assert db.migrate(version_3_db) == 0
+    with db.connection(version_3_db) as conn:
+        assert conn.execute("SELECT id, monto FROM finanzas ORDER BY id").fetchall() == before
+
+
+@pytest.fixture
+def version_6_db(tmp_path):
+    """Base anterior a los índices de orden, con importes y categorías NULL."""
+    path = create_legacy_db(str(tmp_path / "v6.db"), version=6)
+    conn = sqlite3.connect(path)
+    conn.executemany("INSERT INTO finanzas (tipo, categoria, monto, descripcion, fecha) VALUES (?, ?, ?, ?, ?)",
+                     [("egreso", None, 500, "Sin categoría", "2024-01-05 10:00:00"),
+                      ("egreso", "", 700, "Categoría vacía", "2024-01-06 10:00:00"),
+                      ("egreso", "Marketing", None, "Sin monto", "2024-01-07 10:00:00"),
+                      ("ingreso", "Ingreso General", 1000, "Pago", "2024-01-08 10:00:00")])
+    conn.execute("DELETE FROM finanzas WHERE descripcion = 'Pago'")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_sort_migration_backfills_nulls_without_change_feed(version_6_db):
+    with db.connection(version_6_db) as conn:
+        changes = conn.execute("SELECT COUNT(*), MAX(id) FROM cambios").fetchone()
+        rollup = conn.execute("SELECT * FROM finanzas_mensual ORDER BY 1, 2, 3, 4").fetchall()
+    db.migrate(version_6_db)
+    with db.connection(version_6_db) as conn:
+        assert conn.execute("SELECT descripcion, categoria, monto FROM finanzas ORDER BY id").fetchall() == [
+            ("Sin categoría", "", 500), ("Categoría vacía", "", 700), ("Sin monto", "Marketing", 0)]
+        assert conn.execute("SELECT COUNT(*), MAX(id) FROM cambios").fetchone() == changes
+        assert conn.execute("SELECT * FROM finanzas_mensual ORDER BY 1, 2, 3, 4").fetchall() == rollup
+        assert conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'finanzas'").fetchone() == (4,)
+        conn.execute("INSERT INTO finanzas_fts (finanzas_fts) VALUES ('integrity-check')")
+        assert {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'finanzas'")} == {
+            f"trg_finanzas_{kind}_{event}" for kind in ("mensual", "version", "cambios", "fts") for event in ("insert", "update", "delete")}
+
+
+@pytest.mark.parametrize("statement", (
+    "INSERT INTO finanzas (tipo, categoria, monto) VALUES ('egreso', NULL, 100)",
+    "INSERT INTO finanzas (tipo, categoria, monto) VALUES ('egreso', 'Otro', NULL)",
+    "UPDATE finanzas SET categoria = NULL",
+    "UPDATE finanzas SET monto = NULL",
+))
+def test_sort_columns_reject_null(db_path, statement):
+    with db.connection(db_path) as conn:
+        conn.execute("INSERT INTO finanzas (tipo, categoria, monto) VALUES ('egreso', 'Otro', 100)")
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute(statement)
+        conn.rollback()
+
+
+def test_empty_category_reads_as_none(version_6_db):
+    db.migrate(version_6_db)
+    db.DB_PATH = version_6_db
+    assert queries.get_expense_by_category() == [(None, 1200), ("Marketing", 0)]
+    assert queries.get_dashboard_snapshot().expense_by_category == [(None, 1200), ("Marketing", 0)]
@@ -0,0 +1,97 @@
+"""Conversión de textos a centavos y redondeo de porcentajes."""
+import sqlite3
+
+import pytest
+
+from money import Money, percent_of, percent_of_sql, round_div, to_basis_points, to_cents
+
+
+@pytest.mark.parametrize("text, cents", (
+    ("1,234.50", 123450),
+    ("$1,234.50", 123450),
+    ("1.234,50", 123450),
+    ("1234,5", 123450),
+    ("1234.5", 123450),
+    ("1,234", 123400),
+    ("12,345,678", 1234567800),
+    ("-1,234", -123400),
+    ("12,5", 1250),
+    ("0,285", 29),
+    ("1,2345", 123),
+    ("1.234,56", 123456),
+    ("1,234.56", 123456),
+    ("-12.5", -1250),
+    ("-$1,234.50", -123450),
+    ("-1.234,50", -123450),
+    ("0.285", 29),
+    ("0", 0),
+))
+def test_money_parse(text, cents):
+    assert Money.parse(text) == cents
+
+
+@pytest.mark.parametrize("text", ("", "$", "abc", "1.2.3,4,5", "1,23,4", "12,34,567", "nan", "inf"))
+def test_money_parse_rejects_invalid_text(text):
+    with pytest.raises(ValueError):
+        Money.parse(text)
+
+
+@pytest.mark.parametrize("value, cents", (
+    (0.285, 29),  # como float: 0.28499... si se multiplicara por 100 directamente
+    ("0.285", 29),
+    (-0.285, -29),
+    (1.005, 101),
+    ("0.005", 1),
+    ("-0.005", -1),
+    ("0.004", 0),
+    (12, 1200),
+    (-3, -300),
+    ("  7.10 ", 710),
+    (None, None),
+))
+def test_to_cents(value, cents):
+    assert to_cents(value) == cents
+
+
+def test_to_cents_does_not_accept_thousands_separators():
+    # Los separadores los interpreta Money.parse; to_cents solo acepta números.
+    with pytest.raises(ValueError):
+        to_cents("1,234.50")
+
+
+def test_to_basis_points():
+    assert to_basis_points(15) == 1500
+    assert to_basis_points("12.5") == 1250
+    assert to_basis_points(None) is None
+
+
+@pytest.mark.parametrize("cents, basis_points, expected", (
+    (50, 100, 1),       # 0.5 -> 1
+    (-50, 100, -1),     # -0.5 -> -1, lejos de cero
+    (149, 100, 1),
+    (150, 100, 2),
+    (-150, 100, -2),
+    (-149, 100, -1),
+    (250, 100, 3),      # no es redondeo bancario: 2.5 -> 3
+    (12345, 1250, 1543),  # 1543.125
+    (0, 1500, 0),
+))
+def test_percent_of_rounds_half_away_from_zero(cents, basis_points, expected):
+    assert percent_of(cents, basis_points) == expected
+
+
+def test_round_div_matches_sqlite_round():
+    conn = sqlite3.connect(":memory:")
+    for numerator in range(-1000, 1001, 7):
+        assert round_div(numerator, 40) == conn.execute("SELECT CAST(ROUND(? / 40.0) AS INTEGER)", (numerator,)).fetchone()[0]
+    conn.close()
+
+
+def test_percent_of_sql_matches_percent_of():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (cents INTEGER, bp INTEGER)")
+    rows = [(cents, bp) for cents in range(-20000, 20001, 37) for bp in (0, 1, 50, 100, 1250, 10000)] + [(50, 100), (-50, 100), (-150, 100), (-7655, 1250)]
+    conn.executemany("INSERT INTO t VALUES (?, ?)", rows)
+    result = conn.execute(f"SELECT cents, bp, {percent_of_sql('cents', 'bp')} FROM t").fetchall()
+    assert result == [(cents, bp, percent_of(cents, bp)) for cents, bp in rows]
+    conn.close()
@@ -0,0 +1,69 @@
+"""get_partner_expenses: una sola sentencia sin importar el número de socios, y los mismos totales que el cálculo socio a socio."""
+import random
+
+import pytest
+
+import db
+import query_cache
+from money import percent_of
+from queries import get_partner_expenses
+
+
+def seed(path, partners, rows, rng):
+    db.init_db(path)
+    with db.connection(path) as conn:
+        conn.executemany("INSERT INTO socios (nombre) VALUES (?)", [(f"Socio {i}",) for i in range(partners)])
+        conn.executemany("INSERT INTO creadoras (nombre, sueldo_fijo, porcentaje, socio_id) VALUES (?, ?, ?, ?)",
+                         [(f"Creadora {i}", rng.choice((0, 30000, 50000)), rng.choice((0, 1000, 1250, 2000)), rng.choice((None, rng.randint(1, partners))))
+                          for i in range(partners * 3)])
+        conn.executemany("INSERT INTO empleados (nombre, rol, sueldo, socio_id) VALUES (?, 'Chatter', ?, ?)",
+                         [(f"Empleado {i}", rng.choice((0, 40000, 80000)), rng.choice((None, rng.randint(1, partners)))) for i in range(partners * 2)])
+        conn.executemany("INSERT INTO finanzas (tipo, categoria, monto, descripcion, creadora_id) VALUES (?, 'Ingreso General', ?, '', ?)",
+                         [(rng.choice(("ingreso", "ingreso", "egreso")), rng.randint(1, 200001), rng.randint(1, partners * 3)) for _ in range(rows)])
+        # Reembolsos: ingresos negativos que pueden dejar en negativo el total de una creadora.
+        conn.executemany("INSERT INTO finanzas (tipo, categoria, monto, descripcion, creadora_id) VALUES ('ingreso', 'Ingreso General', ?, 'Reembolso', ?)",
+                         [(-rng.randint(1, 2000000), rng.randint(1, partners * 3)) for _ in range(partners)])
+    db.DB_PATH = path
+    query_cache.ENABLED = False  # cada llamada debe llegar a SQLite
+
+
+def per_partner_expenses():
+    """El cálculo anterior, con tres consultas por socio y la comisión redondeada por creadora."""
+    expenses = []
+    for partner_id, name in db.get_db_data("SELECT id, nombre FROM socios ORDER BY id"):
+        creators = db.get_db_data("SELECT IFNULL(SUM(sueldo_fijo), 0) FROM creadoras WHERE socio_id = ?", (partner_id,))[0][0]
+        employees = db.get_db_data("SELECT IFNULL(SUM(sueldo), 0) FROM empleados WHERE socio_id = ?", (partner_id,))[0][0]
+        commissions = sum(percent_of(income, rate) for income, rate in db.get_db_data(
+            """SELECT SUM(f.monto), c.porcentaje FROM finanzas f JOIN creadoras c ON f.creadora_id = c.id
+               WHERE f.tipo = 'ingreso' AND c.porcentaje > 0 AND c.socio_id = ? GROUP BY c.id""", (partner_id,)))
+        total = creators + employees + commissions
+        if total > 0: expenses.append((name, total))
+    return sorted(expenses, key=lambda row: row[1], reverse=True)
+
+
+def statement_count(path):
+    statements = []
+    with db.connection(path) as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            get_partner_expenses()
+        finally:
+            conn.set_trace_callback(None)
+    return len(statements)
+
+
+def test_statement_count_does_not_grow_with_partners(tmp_path):
+    counts = []
+    for partners in (1, 20):
+        path = str(tmp_path / f"socios_{partners}.db")
+        seed(path, partners, 500, random.Random(partners))
+        counts.append(statement_count(path))
+    assert counts[0] == counts[1] == 1
+
+
+@pytest.mark.parametrize("seed_value", (1, 2, 3))
+def test_matches_per_partner_loop(tmp_path, seed_value):
+    seed(str(tmp_path / "socios.db"), 25, 2000, random.Random(seed_value))
+    expected = per_partner_expenses()
+    assert get_partner_expenses() == expected
+    assert expected  # la base de prueba tiene socios con gastos
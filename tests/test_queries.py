@@ -0,0 +1,41 @@
+"""Consultas del libro: rangos de fechas con extremos opcionales y comisiones redondeadas como money.percent_of."""
+import pytest
+
+import db
+from money import percent_of
+from queries import get_financial_data_by_date, get_top_creators_by_profitability
+
+
+@pytest.fixture
+def ledger_db(db_path):
+    with db.connection(db_path) as conn:
+        conn.execute("INSERT INTO creadoras (nombre) VALUES ('Luna')")
+        conn.executemany("INSERT INTO finanzas (tipo, categoria, monto, descripcion, fecha, creadora_id) VALUES (?, 'Otro', ?, ?, ?, ?)",
+                         [("ingreso", 100, "Enero", "2024-01-15 10:00:00", 1), ("egreso", 200, "Febrero", "2024-02-29 23:59:00", None),
+                          ("ingreso", 300, "Marzo", "2024-03-01 00:00:00", None)])
+    return db_path
+
+
+@pytest.mark.parametrize("start_date, end_date, expected", (
+    (None, None, ["Marzo", "Febrero", "Enero"]),
+    ("2024-02-01", None, ["Marzo", "Febrero"]),
+    (None, "2024-02-29", ["Febrero", "Enero"]),
+    ("2024-02-01", "2024-02-29", ["Febrero"]),
+))
+def test_financial_data_by_date(ledger_db, start_date, end_date, expected):
+    rows = get_financial_data_by_date(start_date, end_date)
+    assert [row[4] for row in rows] == expected
+
+
+def test_financial_data_by_date_row_shape(ledger_db):
+    assert get_financial_data_by_date(None, "2024-01-31") == [(1, "ingreso", "Otro", 100, "Enero", "2024-01-15 10:00", "Luna")]
+
+
+def test_profitability_rounds_negative_commissions_like_percent_of(db_path):
+    with db.connection(db_path) as conn:
+        conn.executemany("INSERT INTO creadoras (nombre, sueldo_fijo, porcentaje, inversion) VALUES (?, ?, ?, 0)",
+                         [("Reembolsos", -1000, 100), ("Medio centavo", 0, 100)])
+        conn.executemany("INSERT INTO finanzas (tipo, categoria, monto, creadora_id) VALUES ('ingreso', 'Otro', ?, ?)", [(-150, 1), (150, 2)])
+    # Reembolsos: -150 - (-1000) - percent_of(-150, 100) = 852; Medio centavo: 150 - 2 = 148.
+    assert get_top_creators_by_profitability() == [("Reembolsos", -150 + 1000 - percent_of(-150, 100)), ("Medio centavo", 150 - percent_of(150, 100))]
+    assert [profit for _, profit in get_top_creators_by_profitability()] == [852, 148]
@@ -0,0 +1,92 @@
+"""Caché de consultas: qué invalida una escritura y qué no se cachea."""
+import sqlite3
+
+import pytest
+
+import db
+import query_cache
+from query_cache import cache_stats, cached_query
+
+FINANZAS_QUERY = "SELECT COUNT(*), SUM(monto) FROM finanzas"
+SOCIOS_QUERY = "SELECT nombre FROM socios ORDER BY id"
+ROLLUP_QUERY = "SELECT SUM(total) FROM finanzas_mensual"
+
+
+@pytest.fixture
+def cache_db(db_path):
+    query_cache.ENABLED = True
+    with db.connection(db_path) as conn:
+        conn.execute("INSERT INTO socios (nombre) VALUES ('Ana')")
+        conn.execute("INSERT INTO finanzas (tipo, categoria, monto) VALUES ('ingreso', 'Otro', 100)")
+    return db_path
+
+
+def counts():
+    stats = cache_stats()
+    return stats["hits"], stats["misses"]
+
+
+def external_write(path, statement):
+    # Otra conexión, como la de otro proceso (servidor, CLI).
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute(statement)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_repeated_query_is_a_hit(cache_db):
+    assert cached_query(FINANZAS_QUERY) == [(1, 100)]
+    assert cached_query(FINANZAS_QUERY) == [(1, 100)]
+    assert counts() == (1, 1)
+
+
+def test_external_write_invalidates_only_queries_on_that_table(cache_db):
+    for query in (FINANZAS_QUERY, SOCIOS_QUERY, ROLLUP_QUERY):
+        cached_query(query)
+    assert counts() == (0, 3)
+
+    external_write(cache_db, "INSERT INTO finanzas (tipo, categoria, monto) VALUES ('ingreso', 'Otro', 250)")
+    assert cached_query(FINANZAS_QUERY) == [(2, 350)]
+    assert cached_query(ROLLUP_QUERY) == [(350,)]  # derivada de finanzas
+    assert counts() == (0, 5)
+    assert cached_query(SOCIOS_QUERY) == [("Ana",)]
+    assert counts() == (1, 5)
+
+    external_write(cache_db, "INSERT INTO socios (nombre) VALUES ('Beto')")
+    assert cached_query(SOCIOS_QUERY) == [("Ana",), ("Beto",)]
+    assert cached_query(FINANZAS_QUERY) == [(2, 350)]
+    assert counts() == (2, 6)
+
+
+def test_query_on_unversioned_table_is_not_cached(cache_db):
+    query = "SELECT COUNT(*) FROM cambios"
+    with db.connection(cache_db) as conn:
+        assert query_cache.tables_in_query(conn, query) == ()
+        # Una tabla versionada junto a otra sin versión tampoco se puede cachear.
+        assert query_cache.tables_in_query(conn, "SELECT * FROM socios JOIN cambios ON cambios.fila_id = socios.id") == ()
+    assert cached_query(query)[0][0] > 0
+    external_write(cache_db, "DELETE FROM cambios")
+    assert cached_query(query) == [(0,)]
+    assert counts() == (0, 0)
+    assert cache_stats()["entries"] == 0
+
+
+def test_calls_inside_a_write_transaction_bypass_the_cache(cache_db):
+    assert cached_query(SOCIOS_QUERY) == [("Ana",)]
+    with db.connection(cache_db) as conn:
+        conn.execute("INSERT INTO socios (nombre) VALUES ('Sin confirmar')")
+        assert conn.in_transaction
+        # Ve su propia escritura sin confirmar, y no la guarda en la caché.
+        assert cached_query(SOCIOS_QUERY) == [("Ana",), ("Sin confirmar",)]
+        assert counts() == (0, 1)
+        conn.rollback()
+    assert cached_query(SOCIOS_QUERY) == [("Ana",)]
+    assert counts() == (1, 1)
+
+
+def test_disabled_cache_always_reads(cache_db):
+    query_cache.ENABLED = False
+    cached_query(FINANZAS_QUERY); cached_query(FINANZAS_QUERY)
+    assert counts() == (0, 0)
@@ -0,0 +1,67 @@
+"""
+`EXPLAIN QUERY PLAN` de las consultas filtradas por fecha y de las páginas de la
+pantalla de finanzas: deben usar los índices de `finanzas` (o el resumen
+`finanzas_mensual`) y no recorrer la tabla. Se ejecutan las funciones reales de
+queries.py sobre una base con datos y estadísticas (ANALYZE) y se captura la
+sentencia SQL que emiten.
+"""
+import random
+
+import pytest
+
+import db
+import query_cache
+import queries
+
+EXPECTED = (
+    ("get_current_month_income", lambda: queries.get_current_month_income(), "idx_finanzas_tipo_fecha"),
+    ("get_monthly_financial_trend", lambda: queries.get_monthly_financial_trend(), "finanzas_mensual"),
+    ("get_monthly_financial_trend (rango)", lambda: queries.get_monthly_financial_trend("2024-01-15", "2024-03-10"), "idx_finanzas_mes"),
+    ("get_distinct_months", lambda: queries.get_distinct_months(), "finanzas_mensual"),
+    ("get_financial_data_by_date", lambda: queries.get_financial_data_by_date("2024-01-01", "2024-01-31"), "idx_finanzas_fecha"),
+    ("get_expense_by_category", lambda: queries.get_expense_by_category(), "idx_finanzas_categoria_tipo"),
+    ("get_top_creators_by_revenue", lambda: queries.get_top_creators_by_revenue(), "idx_finanzas_creadora_tipo"),
+    ("get_finanzas_page", lambda: queries.get_finanzas_page(cursor=("2024-06-01 12:00:00", 100), limit=100), "idx_finanzas_fecha"),
+    ("get_finanzas_view_page (por monto)", lambda: queries.get_finanzas_view_page((20000, 100), sort="monto", descending=True), "idx_finanzas_monto"),
+    ("get_finanzas_view_page (por tipo)", lambda: queries.get_finanzas_view_page(("egreso", "2024-06-01 12:00:00", 100), sort="tipo"), "idx_finanzas_tipo_fecha"),
+    ("get_finanzas_view_page (por categoría)", lambda: queries.get_finanzas_view_page(("Otro", "egreso", 100, 100), sort="categoria"), "idx_finanzas_categoria_tipo"),
+)
+
+
+@pytest.fixture(scope="module")
+def seeded_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("plans") / "plans.db")
+    db.init_db(path)
+    rng = random.Random(7)
+    with db.connection(path) as conn:
+        conn.executemany("INSERT INTO creadoras (nombre) VALUES (?)", [(f"Creadora {i}",) for i in range(50)])
+        conn.executemany("INSERT INTO finanzas (tipo, categoria, monto, fecha, creadora_id) VALUES (?, ?, ?, ?, ?)",
+                         [(rng.choice(("ingreso", "egreso")), rng.choice(("Marketing", "Sueldo", "Otro", "Ingreso General")),
+                           rng.randint(100, 50000), f"{rng.choice((2023, 2024))}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 12:00:00",
+                           rng.choice((None, rng.randint(1, 50)))) for _ in range(5000)])
+        conn.execute("ANALYZE")
+    return path
+
+
+def captured_plan(path, func):
+    statements = []
+    with db.connection(path) as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            func()
+        finally:
+            conn.set_trace_callback(None)
+    plan = []
+    for sql in statements:
+        if "finanzas" in sql: plan += db.explain_query_plan(sql, db_path=path)
+    return plan
+
+
+@pytest.mark.parametrize("name, func, index", EXPECTED, ids=[name for name, _, _ in EXPECTED])
+def test_query_uses_index(seeded_path, name, func, index):
+    db.DB_PATH = seeded_path
+    query_cache.ENABLED = False  # la consulta debe llegar a SQLite
+    plan = captured_plan(seeded_path, func)
+    assert any(index in step for step in plan), plan
+    full_scans = [step for step in plan if step.startswith(("SCAN finanzas", "SCAN f")) and "INDEX" not in step and "finanzas_mensual" not in step]
+    assert not full_scans, plan
@@ -0,0 +1,170 @@
+"""Búsqueda FTS5: los triggers mantienen `finanzas_fts` y `notas_fts` al día, y la ventana de relevancia se aplica solo si hace falta."""
+import pytest
+
+import db
+import instrumentation
+import queries
+import query_cache
+
+
+def integrity_check(conn):
+    # Lanza sqlite3.DatabaseError si el índice no coincide con su contenido.
+    conn.execute("INSERT INTO finanzas_fts (finanzas_fts) VALUES ('integrity-check')")
+    conn.execute("INSERT INTO notas_fts (notas_fts) VALUES ('integrity-check')")
+
+
+def finanzas_hits(conn, word):
+    return [row[0] for row in conn.execute("SELECT rowid FROM finanzas_fts WHERE finanzas_fts MATCH ? ORDER BY rowid", (word,))]
+
+
+def notas_hits(conn, word):
+    return [row[0] for row in conn.execute("SELECT rowid FROM notas_fts WHERE notas_fts MATCH ? ORDER BY rowid", (word,))]
+
+
+def test_finanzas_fts_follows_insert_update_delete(db_path):
+    with db.connection(db_path) as conn:
+        first = conn.execute("INSERT INTO finanzas (tipo, categoria, monto, descripcion) VALUES ('egreso', 'Marketing', 100, 'Campaña de verano')").lastrowid
+        second = conn.execute("INSERT INTO finanzas (tipo, categoria, monto, descripcion) VALUES ('egreso', 'Otro', 100, 'Campaña de invierno')").lastrowid
+        assert finanzas_hits(conn, "campana") == [first, second]  # sin acentos
+        assert finanzas_hits(conn, "marketing") == [first]
+        integrity_check(conn)
+
+        conn.execute("UPDATE finanzas SET descripcion = 'Anuncio de verano', categoria = 'Otro' WHERE id = ?", (first,))
+        assert finanzas_hits(conn, "campana") == [second]
+        assert finanzas_hits(conn, "anuncio") == [first]
+        assert finanzas_hits(conn, "marketing") == []
+        # Editar columnas que no se indexan no toca el índice.
+        conn.execute("UPDATE finanzas SET monto = 500 WHERE id = ?", (first,))
+        assert finanzas_hits(conn, "anuncio") == [first]
+        integrity_check(conn)
+
+        conn.execute("DELETE FROM finanzas WHERE id = ?", (second,))
+        assert finanzas_hits(conn, "campana") == []
+        assert finanzas_hits(conn, "verano") == [first]
+        integrity_check(conn)
+
+
+@pytest.mark.parametrize("table, insert", (
+    ("creadoras", "INSERT INTO creadoras (nombre, notas) VALUES (?, ?)"),
+    ("empleados", "INSERT INTO empleados (nombre, notas) VALUES (?, ?)"),
+    ("socios", "INSERT INTO socios (nombre, notas) VALUES (?, ?)"),
+))
+def test_notas_fts_follows_insert_update_delete(db_path, table, insert):
+    code = db.NOTES_TABLES[table]
+    with db.connection(db_path) as conn:
+        row_id = conn.execute(insert, ("Valentina", "Prefiere pagos por transferencia")).lastrowid
+        other = conn.execute(insert, ("Otra", "Sin notas")).lastrowid
+        assert notas_hits(conn, "transferencia") == [row_id * 4 + code]
+        assert notas_hits(conn, "valentina") == [row_id * 4 + code]
+        integrity_check(conn)
+
+        conn.execute(f"UPDATE {table} SET notas = 'Pagos en cripto' WHERE id = ?", (row_id,))
+        assert notas_hits(conn, "transferencia") == []
+        assert notas_hits(conn, "cripto") == [row_id * 4 + code]
+        conn.execute(f"UPDATE {table} SET nombre = 'Valeria' WHERE id = ?", (row_id,))
+        assert notas_hits(conn, "valentina") == []
+        assert notas_hits(conn, "valeria") == [row_id * 4 + code]
+        integrity_check(conn)
+
+        conn.execute(f"DELETE FROM {table} WHERE id = ?", (row_id,))
+        assert notas_hits(conn, "cripto OR valeria") == []
+        assert notas_hits(conn, "otra") == [other * 4 + code]
+        integrity_check(conn)
+    assert queries.search_notes("otra") == [(table, other, "Otra", "Sin notas")]
+
+
+@pytest.fixture
+def search_db(db_path):
+    query_cache.ENABLED = False
+    with db.connection(db_path) as conn:
+        # Cada descripción repite "cuota" i % 3 + 1 veces, para que bm25 no empate todo.
+        conn.executemany("INSERT INTO finanzas (tipo, categoria, monto, descripcion) VALUES ('ingreso', 'Otro', 100, ?)",
+                         [(" ".join(["cuota"] * (i % 3 + 1)) + f" mensual {i}",) for i in range(30)])
+    return db_path
+
+
+def ranked_ids(text, limit):
+    ids, cursor = [], None
+    while True:
+        rows, cursor, recent_only = queries.search_finanzas(text, ("id",), cursor, limit)
+        ids += [row["id"] for row in rows]
+        if cursor is None: return ids, recent_only
+
+
+def test_search_ranks_every_match_below_the_window(search_db):
+    ids, recent_only = ranked_ids("cuota", 4)
+    assert not recent_only
+    assert sorted(ids) == list(range(1, 31))
+    # Las que más repiten la palabra primero.
+    assert set(ids[:10]) == {i + 1 for i in range(30) if i % 3 == 2}
+
+
+def test_search_ranks_only_recent_matches_above_the_window(search_db, monkeypatch):
+    monkeypatch.setattr(queries, "SEARCH_WINDOW", 12)
+    ids, recent_only = ranked_ids("cuota", 5)
+    assert recent_only
+    assert sorted(ids) == list(range(19, 31))
+    # Con exactamente SEARCH_WINDOW coincidencias se ordenan todas.
+    monkeypatch.setattr(queries, "SEARCH_WINDOW", 30)
+    assert ranked_ids("cuota", 5) == (ranked_ids("cuota", 50)[0], False)
+
+
+def test_search_api_reports_the_window(search_db, monkeypatch):
+    from server import create_app
+    app = create_app(search_db)
+    try:
+        client = app.test_client()
+        body = client.get("/api/finanzas/buscar?q=cuota&campos=id").get_json()
+        assert (body["solo_recientes"], body["ventana"], len(body["items"])) == (False, queries.SEARCH_WINDOW, 30)
+        monkeypatch.setattr(queries, "SEARCH_WINDOW", 12)
+        body = client.get("/api/finanzas/buscar?q=cuota&campos=id").get_json()
+        assert (body["solo_recientes"], body["ventana"], len(body["items"])) == (True, 12, 12)
+    finally:
+        instrumentation.uninstall()
+
+
+@pytest.fixture
+def search_client(db_path):
+    from server import create_app
+    query_cache.ENABLED = False
+    with db.connection(db_path) as conn:
+        conn.execute("INSERT INTO creadoras (nombre) VALUES ('Luna')")
+        conn.executemany("INSERT INTO finanzas (tipo, categoria, monto, descripcion, fecha, creadora_id) VALUES (?, ?, 100, ?, ?, ?)",
+                         [("ingreso", "Ingreso General", "Pago suscripción", "2024-01-10 10:00:00", 1),
+                          ("egreso", "Marketing", "Pago anuncio", "2024-02-10 10:00:00", None),
+                          ("egreso", "Otro", "Pago hosting", "2024-03-10 10:00:00", None),
+                          ("ingreso", "Otro", "Pago propina", "2024-03-20 10:00:00", None)])
+    app = create_app(db_path)
+    try:
+        yield app.test_client()
+    finally:
+        instrumentation.uninstall()
+
+
+@pytest.mark.parametrize("filters, expected", (
+    ("", {1, 2, 3, 4}),
+    ("&tipo=egreso", {2, 3}),
+    ("&categoria=Otro", {3, 4}),
+    ("&creadora=1", {1}),
+    ("&desde=2024-02&hasta=2024-03-15", {2, 3}),
+    ("&tipo=ingreso&desde=2024-03", {4}),
+))
+def test_search_api_applies_ledger_filters(search_client, filters, expected):
+    body = search_client.get(f"/api/finanzas/buscar?q=pago&campos=id{filters}").get_json()
+    assert {item["id"] for item in body["items"]} == expected
+
+
+def test_search_api_filters_hold_across_pages(search_client):
+    ids, cursor = [], None
+    while True:
+        body = search_client.get("/api/finanzas/buscar?q=pago&campos=id,tipo&tipo=egreso&limit=1" + (f"&cursor={cursor}" if cursor else "")).get_json()
+        assert all(item["tipo"] == "egreso" for item in body["items"])
+        ids += [item["id"] for item in body["items"]]
+        cursor = body["next_cursor"]
+        if cursor is None: break
+    assert sorted(ids) == [2, 3]
+
+
+@pytest.mark.parametrize("filters", ("&tipo=otro", "&creadora=luna", "&desde=ayer"))
+def test_search_api_rejects_invalid_filters(search_client, filters):
+    assert search_client.get(f"/api/finanzas/buscar?q=pago{filters}").status_code == 400
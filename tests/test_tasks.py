@@ -0,0 +1,78 @@
+"""QueryExecutor: las tareas canceladas, en cola o en curso, salen de `_pending` y el sondeo se detiene."""
+import threading
+import time
+
+import db
+from tasks import QueryExecutor
+
+SLOW_QUERY = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT COUNT(*) FROM n"
+
+
+class FakeRoot:
+    """Sustituye a Tk: guarda los `after()` para ejecutarlos a mano."""
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, func):
+        self.scheduled.append(func)
+
+    def report_callback_exception(self, *exc_info):
+        raise exc_info[1]
+
+
+def drain(executor, root, timeout=5.0):
+    """Ejecuta los sondeos programados hasta que no quede ninguno."""
+    deadline = time.monotonic() + timeout
+    while root.scheduled:
+        assert time.monotonic() < deadline, "el sondeo no se detiene"
+        root.scheduled.pop(0)()
+        time.sleep(0.01)
+
+
+def test_cancelled_tasks_leave_pending_and_polling_stops(db_path):
+    root = FakeRoot(); executor = QueryExecutor(root, max_workers=1)
+    started = threading.Event(); done = []
+    def slow():
+        started.set()
+        return db.get_db_data(SLOW_QUERY)
+    try:
+        running = executor.submit(slow, on_done=done.append, on_error=done.append)
+        queued = executor.submit(db.get_db_data, "SELECT 1", on_done=done.append, on_error=done.append)
+        assert started.wait(5); time.sleep(0.1)  # interrupt() solo corta una sentencia ya en marcha
+        queued.cancel(); running.cancel()
+        assert queued.future.cancelled()
+        drain(executor, root)
+        assert executor._pending == set()
+        assert done == []  # ni resultado ni error de las canceladas
+    finally:
+        executor.shutdown()
+
+
+def test_cancelled_persistent_task_leaves_pending(db_path):
+    root = FakeRoot(); executor = QueryExecutor(root, max_workers=1)
+    started = threading.Event()
+    def slow():
+        started.set()
+        return db.get_db_data(SLOW_QUERY)
+    try:
+        export = executor.submit(slow, persistent=True)
+        assert started.wait(5); time.sleep(0.1)  # interrupt() solo corta una sentencia ya en marcha
+        executor.cancel_pending()  # no la toca: es persistente
+        assert executor._pending == {export}
+        export.cancel()
+        drain(executor, root)
+        assert executor._pending == set()
+    finally:
+        executor.shutdown()
+
+
+def test_completed_task_calls_on_done(db_path):
+    root = FakeRoot(); executor = QueryExecutor(root)
+    done = []
+    try:
+        executor.submit(db.get_db_data, "SELECT 41 + 1", on_done=done.append)
+        drain(executor, root)
+        assert done == [[(42,)]]
+        assert executor._pending == set()
+    finally:
+        executor.shutdown()
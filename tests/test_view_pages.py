@@ -0,0 +1,165 @@
+"""Páginas keyset de las pantallas de gestión (get_view_page): orden con empates, paginación en ambos sentidos y filtros."""
+import random
+import sqlite3
+
+import pytest
+
+import db
+import queries
+import query_cache
+from queries import CREADORAS_VIEW, EMPLEADOS_VIEW, FINANZAS_VIEW, filter_condition, get_view_page
+
+VIEWS = {"creadoras": CREADORAS_VIEW, "empleados": EMPLEADOS_VIEW, "finanzas": FINANZAS_VIEW}
+DISPLAY_COLUMNS = 7
+key_of = lambda row: tuple(row[DISPLAY_COLUMNS:])
+
+
+@pytest.fixture(scope="module")
+def seeded_path(tmp_path_factory):
+    """Pocos valores distintos por columna, para que casi todas las claves de orden empaten."""
+    path = str(tmp_path_factory.mktemp("views") / "views.db")
+    db.init_db(path)
+    rng = random.Random(25)
+    with db.connection(path) as conn:
+        conn.executemany("INSERT INTO socios (nombre) VALUES (?)", [("Ana",), ("Beto",)])
+        conn.executemany("INSERT INTO creadoras (nombre, sueldo_fijo, porcentaje, inversion, socio_id) VALUES (?, ?, ?, ?, ?)",
+                         [(("Luna", "Sol", "Mar")[i % 3], rng.choice((None, 0, 30000)), rng.choice((None, 1000, 1250)),
+                           rng.choice((None, 0, 5000)), rng.choice((None, 1, 2))) for i in range(40)])
+        conn.executemany("INSERT INTO empleados (nombre, rol, sueldo, ventas, comision, socio_id) VALUES (?, ?, ?, ?, ?, ?)",
+                         [(rng.choice(("Eva", "Iván")), rng.choice((None, "Chatter", "Editor")), rng.choice((None, 40000)),
+                           rng.choice((None, 0, 125000)), rng.choice((None, 500)), rng.choice((None, 1, 2))) for _ in range(40)])
+        conn.executemany("INSERT INTO finanzas (tipo, categoria, monto, descripcion, fecha, creadora_id) VALUES (?, ?, ?, ?, ?, ?)",
+                         [(rng.choice(("ingreso", "egreso")), rng.choice(("Otro", "Sueldo", "Ingreso General", "")), rng.choice((100, 2500, 2500, 99999)),
+                           f"Movimiento {i}", f"2024-0{rng.randint(1, 3)}-0{rng.randint(1, 2)} 10:00:00", rng.choice((None, 1, 2, 3)))
+                          for i in range(150)])
+    return path
+
+
+@pytest.fixture
+def view_db(seeded_path):
+    db.DB_PATH = seeded_path
+    query_cache.ENABLED = False
+    return seeded_path
+
+
+def walk(view, direction, cursor, **options):
+    """Ids de todas las páginas de 7 filas desde `cursor` en `direction`, en orden de visualización."""
+    pages = []
+    while True:
+        page = get_view_page(view, cursor, direction, 7, **options)
+        if not page: break
+        pages.append([row[0] for row in page])
+        cursor = key_of(page[-1] if direction == "next" else page[0])
+    return [row_id for page in (pages if direction == "next" else pages[::-1]) for row_id in page]
+
+
+SORTS = [(name, sort, descending) for name, view in VIEWS.items() for sort in view.sort_keys for descending in (False, True)]
+
+
+@pytest.mark.parametrize("name, sort, descending", SORTS, ids=[f"{name}-{sort}-{'desc' if desc else 'asc'}" for name, sort, desc in SORTS])
+def test_pages_cover_every_row_once_in_both_directions(view_db, name, sort, descending):
+    view = VIEWS[name]
+    everything = get_view_page(view, limit=10 ** 6, sort=sort, descending=descending)
+    expected = [row[0] for row in everything]
+    assert sorted(expected) == [row[0] for row in db.get_db_data(f"SELECT id FROM {name} ORDER BY id")]
+    keys = [key_of(row) for row in everything]
+    assert keys == sorted(keys, reverse=descending)
+    assert len(set(key[:-1] for key in keys)) < len(keys)  # hay empates que desempata el id
+
+    forward = walk(view, "next", None, sort=sort, descending=descending)
+    assert forward == expected
+    backward = walk(view, "prev", keys[-1], sort=sort, descending=descending)
+    assert backward == expected[:-1]
+
+
+def test_pages_move_back_from_the_middle(view_db):
+    everything = get_view_page(FINANZAS_VIEW, limit=10 ** 6, sort="categoria")
+    middle = everything[70]
+    before = get_view_page(FINANZAS_VIEW, key_of(middle), "prev", 7, sort="categoria")
+    after = get_view_page(FINANZAS_VIEW, key_of(middle), "next", 7, sort="categoria")
+    assert [row[0] for row in before] == [row[0] for row in everything[63:70]]
+    assert [row[0] for row in after] == [row[0] for row in everything[71:78]]
+
+
+FILTERS = (
+    ("finanzas", {"tipo": "egreso"}, "tipo = 'egreso'"),
+    ("finanzas", {"categoria": "Otro"}, "categoria = 'Otro'"),
+    ("finanzas", {"monto": "25"}, "monto = 2500"),
+    ("finanzas", {"monto": "> 25"}, "monto > 2500"),
+    ("finanzas", {"monto": "<=25"}, "monto <= 2500"),
+    ("finanzas", {"monto": "1..25"}, "monto BETWEEN 100 AND 2500"),
+    ("finanzas", {"fecha": "2024"}, "fecha LIKE '2024%'"),
+    ("finanzas", {"fecha": "2024-02"}, "fecha LIKE '2024-02%'"),
+    ("finanzas", {"fecha": "2024-02-01"}, "fecha LIKE '2024-02-01%'"),
+    ("finanzas", {"fecha": "2024-01..2024-02"}, "fecha >= '2024-01' AND fecha < '2024-03'"),
+    ("finanzas", {"creadora": "lun"}, "creadora_id IN (SELECT id FROM creadoras WHERE nombre LIKE '%lun%')"),
+    ("finanzas", {"creadora": "nadie"}, "0"),
+    ("finanzas", {"tipo": "ingreso", "fecha": "2024-03"}, "tipo = 'ingreso' AND fecha LIKE '2024-03%'"),
+    ("creadoras", {"nombre": "SO"}, "nombre LIKE '%so%'"),
+    ("creadoras", {"sueldo_fijo": ">=300"}, "sueldo_fijo >= 30000"),
+    ("creadoras", {"porcentaje": "12.5"}, "porcentaje = 1250"),
+    ("creadoras", {"porcentaje": "5..11"}, "porcentaje BETWEEN 500 AND 1100"),
+    ("creadoras", {"socio": "ana"}, "socio_id = 1"),
+    ("empleados", {"rol": "chat"}, "rol LIKE '%chat%'"),
+    ("empleados", {"comision": "<6"}, "comision < 600"),
+    ("empleados", {"ventas": "0"}, "ventas = 0"),
+)
+
+
+@pytest.mark.parametrize("name, filters, where", FILTERS, ids=[f"{name}-{'-'.join(f'{k}={v}' for k, v in filters.items())}" for name, filters, _ in FILTERS])
+def test_filters(view_db, name, filters, where):
+    expected = [row[0] for row in db.get_db_data(f"SELECT id FROM {name} WHERE {where} ORDER BY id")]
+    ids = walk(VIEWS[name], "next", None, sort="id", filters=filters)
+    assert ids == expected
+    assert expected or filters == {"creadora": "nadie"}
+
+
+def test_text_filter_escapes_like_wildcards(view_db):
+    assert get_view_page(CREADORAS_VIEW, filters={"nombre": "%"}) == []
+    assert get_view_page(CREADORAS_VIEW, filters={"nombre": "_"}) == []
+
+
+@pytest.mark.parametrize("kind, text", (
+    ("importe", "abc"),
+    ("importe", ">abc"),
+    ("importe", "1..x"),
+    ("importe", "> 1 2"),
+    ("porcentaje", "diez"),
+    ("fecha", "ayer"),
+    ("fecha", "2024-1"),
+    ("fecha", "2024-01-01 10:00"),
+    ("fecha", "2024..marzo"),
+))
+def test_invalid_filter_raises(kind, text):
+    with pytest.raises(ValueError):
+        filter_condition("x", kind, text)
+
+
+def test_invalid_filter_raises_from_view_page(view_db):
+    with pytest.raises(ValueError):
+        get_view_page(FINANZAS_VIEW, filters={"monto": "mucho"})
+
+
+@pytest.fixture
+def many_creators_db(db_path):
+    query_cache.ENABLED = False
+    with db.connection(db_path) as conn:
+        conn.executemany("INSERT INTO creadoras (nombre) VALUES (?)", [(f"Creadora {i}",) for i in range(300)])
+        conn.executemany("INSERT INTO finanzas (tipo, categoria, monto, fecha, creadora_id) VALUES ('ingreso', 'Otro', 100, ?, ?)",
+                         [(f"2024-01-{i % 28 + 1:02d} 10:00:00", None if i % 10 == 0 else i % 300 + 1) for i in range(600)])
+        # Un límite de parámetros bajo, como el de 999 de versiones antiguas de SQLite.
+        conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 50)
+    return db_path
+
+
+@pytest.mark.parametrize("inline_ids", (0, 100, 1000))
+def test_creator_filter_with_many_matches(many_creators_db, monkeypatch, inline_ids):
+    monkeypatch.setattr(queries, "LOOKUP_INLINE_IDS", inline_ids)
+    expected = [row[0] for row in db.get_db_data("SELECT id FROM finanzas WHERE creadora_id IS NOT NULL ORDER BY id")]
+    if inline_ids > 300:
+        with pytest.raises(sqlite3.OperationalError):  # 300 parámetros no caben
+            get_view_page(FINANZAS_VIEW, filters={"creadora": "creadora"})
+        return
+    assert walk(FINANZAS_VIEW, "next", None, sort="id", filters={"creadora": "creadora"}) == expected
+    assert walk(FINANZAS_VIEW, "next", None, sort="id", filters={"creadora": "creadora 12"}) == [
+        row[0] for row in db.get_db_data("SELECT id FROM finanzas WHERE creadora_id IN (13, 121, 122, 123, 124, 125, 126, 127, 128, 129, 130) ORDER BY id")]